@@ -0,0 +1,328 @@
+import os
+import struct
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Union
+from concurrent.futures import ThreadPoolExecutor
+from Crypto.Cipher import AES, ChaCha20_Poly1305
+from backends import get_backend
+from benchmark_core import save_figure
+from streaming import _write_all
+from timing import measure, throughput
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+# Định dạng: header 16 byte rồi các chunk (bản mã || tag 16 byte).
+# Header: MAGIC (4) | mã thuật toán (1) | chunk_size uint32 BE (4) | nonce prefix (7).
+# Nonce chunk i (12 byte) = prefix (7) || i uint32 BE (4) || cờ chunk cuối (1): như cấu trúc STREAM,
+# chunk cuối được xác thực với cờ 1 nên cắt bớt hay nối thêm chunk đều bị phát hiện.
+# Header là associated data của mọi chunk, nên đổi thuật toán/chunk_size/prefix cũng bị phát hiện.
+MAGIC = b'AEC1'
+HEADER_SIZE = 16
+PREFIX_SIZE = 7
+TAG_SIZE = 16
+MAX_CHUNKS = 2 ** 32
+DEFAULT_AEAD_CHUNK_SIZE = 64 * 1024
+
+class AeadAlgorithm(NamedTuple):
+    """Thuật toán AEAD của định dạng chunk"""
+    name: str
+    algorithm_id: int   # Byte thứ 5 của header
+    key_size: int       # byte, dùng khi benchmark tạo khóa
+    new_aead: Callable[[bytes, bytes], Any]
+    raw_backend: str    # Backend mã dòng cùng lõi (trong backends.py) để so sánh
+
+AEAD_ALGORITHMS: Dict[str, AeadAlgorithm] = {
+    'chacha20-poly1305': AeadAlgorithm('chacha20-poly1305', 1, 32,
+                                       lambda key, nonce: ChaCha20_Poly1305.new(key=key, nonce=nonce),
+                                       'chacha20'),
+    'aes-gcm': AeadAlgorithm('aes-gcm', 2, 32,
+                             lambda key, nonce: AES.new(key, AES.MODE_GCM, nonce=nonce, mac_len=TAG_SIZE),
+                             'aes-256-ctr'),
+}
+
+def get_aead(name: str) -> AeadAlgorithm:
+    if name not in AEAD_ALGORITHMS:
+        raise ValueError(f"Thuật toán AEAD không hợp lệ: {name} (hỗ trợ: {', '.join(AEAD_ALGORITHMS)})")
+    return AEAD_ALGORITHMS[name]
+
+def make_header(algorithm: str = 'chacha20-poly1305', chunk_size: int = DEFAULT_AEAD_CHUNK_SIZE,
+                nonce_prefix: Optional[bytes] = None) -> bytes:
+    """Tạo header mới; nonce_prefix mặc định là 7 byte ngẫu nhiên (mỗi stream một prefix)
+
+    Prefix 56-bit ngẫu nhiên: nên đổi khóa trước khoảng 2^24 stream để xác suất trùng prefix
+    (trùng nonce) không đáng kể.
+    """
+    if not 0 < chunk_size < 2 ** 32:
+        raise ValueError("Kích thước chunk phải nằm trong (0, 2^32)")
+    if nonce_prefix is None:
+        nonce_prefix = os.urandom(PREFIX_SIZE)
+    elif len(nonce_prefix) != PREFIX_SIZE:
+        raise ValueError(f"Nonce prefix phải dài {PREFIX_SIZE} byte")
+    return MAGIC + struct.pack('>BI', get_aead(algorithm).algorithm_id, chunk_size) + nonce_prefix
+
+def parse_header(header: Buffer) -> tuple:
+    """Trả về (thuật toán, chunk_size, nonce_prefix) của header"""
+    header = bytes(header[:HEADER_SIZE])
+    if len(header) < HEADER_SIZE or header[:4] != MAGIC:
+        raise ValueError("Dữ liệu không phải định dạng AEAD chunk (sai magic hoặc thiếu header)")
+    algorithm_id, chunk_size = struct.unpack('>BI', header[4:9])
+    for algorithm in AEAD_ALGORITHMS.values():
+        if algorithm.algorithm_id == algorithm_id:
+            break
+    else:
+        raise ValueError(f"Mã thuật toán AEAD không hỗ trợ: {algorithm_id}")
+    if chunk_size == 0:
+        raise ValueError("Header có kích thước chunk bằng 0")
+    return algorithm.name, chunk_size, header[9:]
+
+def chunk_nonce(nonce_prefix: bytes, index: int, final: bool) -> bytes:
+    """Nonce 12 byte của chunk index, suy ra từ counter"""
+    if not 0 <= index < MAX_CHUNKS:
+        raise ValueError(f"Chỉ số chunk vượt giới hạn {MAX_CHUNKS} chunk mỗi stream")
+    return nonce_prefix + struct.pack('>IB', index, final)
+
+def num_chunks(length: int, chunk_size: int) -> int:
+    """Số chunk của length byte bản rõ (luôn có ít nhất một chunk cuối, có thể rỗng)"""
+    return max(1, -(-length // chunk_size))
+
+def encrypted_size(length: int, chunk_size: int) -> int:
+    return HEADER_SIZE + length + TAG_SIZE * num_chunks(length, chunk_size)
+
+def _new_chunk_cipher(new_aead: Callable[[bytes, bytes], Any], key: bytes, header: bytes,
+                      nonce_prefix: bytes, index: int, final: bool) -> Any:
+    cipher = new_aead(key, chunk_nonce(nonce_prefix, index, final))
+    cipher.update(header)
+    return cipher
+
+def _seal(new_aead: Callable[[bytes, bytes], Any], key: bytes, header: bytes, nonce_prefix: bytes,
+          index: int, final: bool, chunk: Buffer, output: memoryview):
+    length = len(chunk)
+    cipher = _new_chunk_cipher(new_aead, key, header, nonce_prefix, index, final)
+    cipher.encrypt(chunk, output=output[:length])
+    output[length:length + TAG_SIZE] = cipher.digest()
+
+def _open(new_aead: Callable[[bytes, bytes], Any], key: bytes, header: bytes, nonce_prefix: bytes,
+          index: int, final: bool, chunk: Buffer, output: Optional[memoryview]) -> Optional[bytes]:
+    length = len(chunk) - TAG_SIZE
+    if length < 0:
+        raise ValueError(f"Chunk {index} ngắn hơn tag xác thực")
+    cipher = _new_chunk_cipher(new_aead, key, header, nonce_prefix, index, final)
+    chunk = memoryview(chunk)
+    plaintext = cipher.decrypt(chunk[:length], output=None if output is None else output[:length])
+    try:
+        cipher.verify(chunk[length:])
+    except ValueError:
+        raise ValueError(f"Xác thực thất bại ở chunk {index}: dữ liệu bị sửa, cắt bớt hoặc sai khóa") from None
+    return plaintext
+
+def encrypt_chunk(key: bytes, header: bytes, index: int, final: bool, chunk: Buffer) -> bytes:
+    """Mã hóa độc lập một chunk của stream có header này, trả về bản mã || tag"""
+    algorithm, _, nonce_prefix = parse_header(header)
+    output = bytearray(len(chunk) + TAG_SIZE)
+    _seal(AEAD_ALGORITHMS[algorithm].new_aead, key, header, nonce_prefix, index, final, chunk, memoryview(output))
+    return bytes(output)
+
+def decrypt_chunk(key: bytes, header: bytes, index: int, final: bool, chunk: Buffer) -> bytes:
+    """Giải mã và xác thực độc lập một chunk (bản mã || tag); ValueError nếu tag sai"""
+    algorithm, _, nonce_prefix = parse_header(header)
+    return _open(AEAD_ALGORITHMS[algorithm].new_aead, key, header, nonce_prefix, index, final, chunk, None)
+
+def _chunk_count(body: int, chunk_size: int) -> int:
+    """Số chunk suy ra từ độ dài phần sau header; ValueError nếu chunk cuối thiếu tag"""
+    stride = chunk_size + TAG_SIZE
+    count = -(-body // stride)
+    if count == 0 or body - (count - 1) * stride < TAG_SIZE:
+        raise ValueError("Dữ liệu bị cắt bớt: thiếu chunk cuối")
+    return count
+
+def _run_chunks(task: Callable[[int], None], count: int, num_workers: int):
+    """Chạy task(i) cho mọi chunk, song song bằng thread pool nếu num_workers > 1
+
+    pycryptodome nhả GIL trong lời gọi C nên các luồng xử lý chunk song song thật.
+    """
+    if num_workers <= 1 or count == 1:
+        for i in range(count):
+            task(i)
+        return
+    with ThreadPoolExecutor(max_workers=num_workers) as pool:
+        for future in [pool.submit(task, i) for i in range(count)]:
+            future.result()
+
+def encrypt_stream(key: bytes, data: Buffer, algorithm: str = 'chacha20-poly1305',
+                   chunk_size: int = DEFAULT_AEAD_CHUNK_SIZE, num_workers: int = 1,
+                   nonce_prefix: Optional[bytes] = None) -> bytearray:
+    """Mã hóa data thành định dạng AEAD chunk; các chunk được ghi thẳng vào buffer kết quả"""
+    header = make_header(algorithm, chunk_size, nonce_prefix)
+    new_aead = get_aead(algorithm).new_aead
+    nonce_prefix = header[-PREFIX_SIZE:]
+    length = len(data)
+    count = num_chunks(length, chunk_size)
+    if count > MAX_CHUNKS:
+        raise ValueError(f"Dữ liệu cần hơn {MAX_CHUNKS} chunk, hãy tăng kích thước chunk")
+    output = bytearray(encrypted_size(length, chunk_size))
+    output[:HEADER_SIZE] = header
+    with memoryview(data) as src, memoryview(output) as dst:
+        def task(i: int):
+            start = i * chunk_size
+            n = min(chunk_size, length - start)
+            out = HEADER_SIZE + i * (chunk_size + TAG_SIZE)
+            _seal(new_aead, key, header, nonce_prefix, i, i == count - 1, src[start:start + n],
+                  dst[out:out + n + TAG_SIZE])
+        _run_chunks(task, count, num_workers)
+    return output
+
+def decrypt_stream(key: bytes, blob: Buffer, num_workers: int = 1) -> bytearray:
+    """Giải mã và xác thực mọi chunk; ValueError nếu bất kỳ chunk nào sai (không trả về dữ liệu nào)"""
+    algorithm, chunk_size, nonce_prefix = parse_header(blob)
+    new_aead = AEAD_ALGORITHMS[algorithm].new_aead
+    header = bytes(blob[:HEADER_SIZE])
+    body = len(blob) - HEADER_SIZE
+    count = _chunk_count(body, chunk_size)
+    stride = chunk_size + TAG_SIZE
+    output = bytearray(body - TAG_SIZE * count)
+    with memoryview(blob) as src, memoryview(output) as dst:
+        def task(i: int):
+            start = HEADER_SIZE + i * stride
+            chunk = src[start:min(start + stride, len(src))]
+            out = i * chunk_size
+            _open(new_aead, key, header, nonce_prefix, i, i == count - 1, chunk,
+                  dst[out:out + len(chunk) - TAG_SIZE])
+        _run_chunks(task, count, num_workers)
+    return output
+
+def encrypt_file(key: bytes, src_path: str, dst_path: str, algorithm: str = 'chacha20-poly1305',
+                 chunk_size: int = DEFAULT_AEAD_CHUNK_SIZE) -> int:
+    """Mã hóa file theo luồng sang định dạng AEAD chunk, trả về số byte bản rõ đã xử lý"""
+    header = make_header(algorithm, chunk_size)
+    new_aead = get_aead(algorithm).new_aead
+    nonce_prefix = header[-PREFIX_SIZE:]
+    in_buf = bytearray(chunk_size)
+    out_buf = bytearray(chunk_size + TAG_SIZE)
+    in_view, out_view = memoryview(in_buf), memoryview(out_buf)
+    with open(src_path, 'rb', buffering=0) as src, open(dst_path, 'wb', buffering=0) as dst:
+        length = os.fstat(src.fileno()).st_size
+        count = num_chunks(length, chunk_size)
+        if count > MAX_CHUNKS:
+            raise ValueError(f"File cần hơn {MAX_CHUNKS} chunk, hãy tăng kích thước chunk")
+        _write_all(dst, memoryview(header))
+        for i in range(count):
+            n = src.readinto(in_buf)
+            _seal(new_aead, key, header, nonce_prefix, i, i == count - 1, in_view[:n], out_view)
+            _write_all(dst, out_view[:n + TAG_SIZE])
+    return length
+
+def decrypt_file(key: bytes, src_path: str, dst_path: str) -> int:
+    """Giải mã file định dạng AEAD chunk theo luồng, trả về số byte bản rõ
+
+    Mỗi chunk được xác thực trước khi ghi; nếu xác thực thất bại, file đích bị xóa.
+    """
+    try:
+        with open(src_path, 'rb', buffering=0) as src, open(dst_path, 'wb', buffering=0) as dst:
+            header = src.read(HEADER_SIZE)
+            algorithm, chunk_size, nonce_prefix = parse_header(header)
+            new_aead = AEAD_ALGORITHMS[algorithm].new_aead
+            count = _chunk_count(os.fstat(src.fileno()).st_size - HEADER_SIZE, chunk_size)
+            stride = chunk_size + TAG_SIZE
+            in_buf = bytearray(stride)
+            out_buf = bytearray(chunk_size)
+            in_view, out_view = memoryview(in_buf), memoryview(out_buf)
+            total = 0
+            for i in range(count):
+                n = src.readinto(in_buf)
+                _open(new_aead, key, header, nonce_prefix, i, i == count - 1, in_view[:n], out_view)
+                _write_all(dst, out_view[:n - TAG_SIZE])
+                total += n - TAG_SIZE
+        return total
+    except ValueError:
+        os.remove(dst_path)
+        raise
+
+def _raw_chunked(new_cipher: Callable[[bytes, bytes], Any], nonce_size: int, key: bytes,
+                 data: Buffer, chunk_size: int, output: bytearray, num_workers: int, decrypt: bool):
+    """Mã dòng không xác thực với cùng cách chia chunk (mỗi chunk một cipher, nonce từ counter)"""
+    length = len(data)
+    with memoryview(data) as src, memoryview(output) as dst:
+        def task(i: int):
+            start = i * chunk_size
+            stop = min(start + chunk_size, length)
+            cipher = new_cipher(key, i.to_bytes(nonce_size, 'big'))
+            (cipher.decrypt if decrypt else cipher.encrypt)(src[start:stop], output=dst[start:stop])
+        _run_chunks(task, num_chunks(length, chunk_size), num_workers)
+
+def benchmark_aead(chunk_sizes: Sequence[int] = (4096, 65536, 1024 * 1024, 4 * 1024 * 1024),
+                   payload_size: int = 16, algorithms: Sequence[str] = tuple(AEAD_ALGORITHMS),
+                   num_runs: int = 10, warmup: int = 2, min_sample_time: float = 0.05,
+                   num_workers: int = 1) -> List[Dict[str, Any]]:
+    """So sánh throughput AEAD (mã hóa, giải mã + xác thực) với mã dòng thô cùng lõi theo kích thước chunk
+
+    payload_size (MB) dữ liệu được chia chunk giống nhau cho cả hai; mã dòng thô dùng backend
+    raw_backend của thuật toán (ChaCha20 cho ChaCha20-Poly1305, AES-256-CTR cho AES-GCM).
+    Returns:
+        List dict {algorithm, chunk_size, aead_encrypt, aead_decrypt, raw_encrypt, raw_decrypt}
+    """
+    data = os.urandom(payload_size * 1024 * 1024)
+    raw_buf = bytearray(len(data))
+    results = []
+    for name in algorithms:
+        algorithm = get_aead(name)
+        raw = get_backend(algorithm.raw_backend)
+        key = os.urandom(algorithm.key_size)
+        raw_key = os.urandom(raw.key_size)
+        for chunk_size in chunk_sizes:
+            # Verify một lần (không tính thời gian)
+            blob = encrypt_stream(key, data, name, chunk_size, num_workers)
+            assert decrypt_stream(key, blob, num_workers) == data, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+
+            result = {'algorithm': name, 'chunk_size': chunk_size}
+            result['aead_encrypt'] = measure(
+                lambda _: encrypt_stream(key, data, name, chunk_size, num_workers),
+                lambda: None, num_runs, warmup, min_sample_time)
+            result['aead_decrypt'] = measure(
+                lambda _: decrypt_stream(key, blob, num_workers),
+                lambda: None, num_runs, warmup, min_sample_time)
+            result['raw_encrypt'] = measure(
+                lambda _: _raw_chunked(raw.new_cipher, raw.nonce_size, raw_key, data, chunk_size,
+                                       raw_buf, num_workers, decrypt=False),
+                lambda: None, num_runs, warmup, min_sample_time)
+            result['raw_decrypt'] = measure(
+                lambda _: _raw_chunked(raw.new_cipher, raw.nonce_size, raw_key, data, chunk_size,
+                                       raw_buf, num_workers, decrypt=True),
+                lambda: None, num_runs, warmup, min_sample_time)
+            result['payload_size'] = payload_size
+            results.append(result)
+    return results
+
+def format_aead(results: List[Dict[str, Any]]) -> str:
+    """Bảng throughput median (MB/s) AEAD và mã dòng thô, kèm tỉ lệ AEAD/thô khi mã hóa"""
+    header = (f"{'Thuật toán':<18} | {'Chunk (KB)':>10} | {'AEAD enc':>9} | {'AEAD dec':>9} | "
+              f"{'Thô enc':>9} | {'Thô dec':>9} | {'AEAD/thô':>8}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        mb_s = {key: throughput(r['payload_size'], r[key])[0]
+                for key in ('aead_encrypt', 'aead_decrypt', 'raw_encrypt', 'raw_decrypt')}
+        lines.append(f"{r['algorithm']:<18} | {r['chunk_size'] / 1024:>10g} | {mb_s['aead_encrypt']:>9.1f} | "
+                     f"{mb_s['aead_decrypt']:>9.1f} | {mb_s['raw_encrypt']:>9.1f} | {mb_s['raw_decrypt']:>9.1f} | "
+                     f"{mb_s['aead_encrypt'] / mb_s['raw_encrypt']:>8.2f}")
+    return "\n".join(lines)
+
+def plot_aead(results: List[Dict[str, Any]], output_name: str = 'aead_vs_raw.png'):
+    """Vẽ throughput theo kích thước chunk: AEAD (nét liền) và mã dòng thô (nét đứt), mã hóa và giải mã"""
+    # Import tại chỗ: matplotlib chiếm phần lớn thời gian khởi động module
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(15, 6))
+    for index, (operation, title) in enumerate([('encrypt', 'Mã hóa'), ('decrypt', 'Giải mã + xác thực')], start=1):
+        plt.subplot(1, 2, index)
+        for name in dict.fromkeys(r['algorithm'] for r in results):
+            rows = [r for r in results if r['algorithm'] == name]
+            chunk_kb = [r['chunk_size'] / 1024 for r in rows]
+            line, = plt.plot(chunk_kb, [throughput(r['payload_size'], r[f'aead_{operation}'])[0] for r in rows],
+                             '-o', label=name)
+            plt.plot(chunk_kb, [throughput(r['payload_size'], r[f'raw_{operation}'])[0] for r in rows],
+                     '--s', color=line.get_color(), alpha=0.7, label=f"{get_aead(name).raw_backend} (thô)")
+        plt.xscale('log', base=2)
+        plt.xlabel('Kích thước chunk (KB)')
+        plt.ylabel('Throughput (MB/s, median)')
+        plt.title(f'{title}: AEAD và mã dòng thô')
+        plt.legend(fontsize=8)
+        plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    save_figure(plt, output_name)
@@ -0,0 +1,185 @@
+"""Tự dò kích thước chunk và số worker tối ưu cho từng cipher trên máy hiện tại
+
+Kết quả được lưu vào data/tuning_profile.json theo khóa suy ra từ thông tin CPU (get_system_info);
+encrypt_file/decrypt_file và encrypt_parallel/decrypt_parallel của các module benchmark tự đọc
+profile khi không truyền chunk_size/num_workers.
+
+Ví dụ:
+    python autotune.py                       # dò cho aes-ctr và chacha20
+    python autotune.py --cipher chacha20 --file-size 128
+    python autotune.py --show
+"""
+import os
+import sys
+import json
+import hashlib
+import argparse
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+from system_info import CPU_FEATURES, get_system_info, format_system_info
+
+TUNING_PROFILE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "data", "tuning_profile.json")
+TUNABLE_CIPHERS = ('aes-ctr', 'chacha20')
+DEFAULT_CHUNK_SIZES = [64 * 1024, 256 * 1024, 1024 * 1024, 4 * 1024 * 1024, 16 * 1024 * 1024]
+_profiles: Dict[str, Optional[dict]] = {}  # Cache trong tiến trình: đường dẫn -> mục của host này
+
+def default_worker_counts() -> List[int]:
+    """1, 2, 4, ... tới số core, luôn gồm số core"""
+    cpu_count = os.cpu_count() or 1
+    counts = []
+    workers = 1
+    while workers < cpu_count:
+        counts.append(workers)
+        workers *= 2
+    counts.append(cpu_count)
+    return counts
+
+def profile_key(system_info: Optional[dict] = None) -> str:
+    """Khóa profile: CPU, kiến trúc, cờ CPU, AES-NI của pycryptodome và số core"""
+    if system_info is None:
+        system_info = get_system_info()
+    parts = [system_info['cpu_brand'], system_info['architecture'], str(os.cpu_count()),
+             str(system_info['pycryptodome_aesni'])]
+    parts.extend(f"{flag}={system_info[flag]}" for flag in CPU_FEATURES)
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:16]
+
+def _read_profiles(path: str) -> dict:
+    try:
+        with open(path, encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def load_profile(path: str = TUNING_PROFILE, refresh: bool = False) -> Optional[dict]:
+    """Mục profile của máy hiện tại ({'system', 'tuned_at', 'ciphers'}), None nếu chưa dò
+
+    Kết quả được cache trong tiến trình; không có file profile thì không cần đọc thông tin CPU.
+    """
+    if path in _profiles and not refresh:
+        return _profiles[path]
+    profile = None
+    if os.path.exists(path):
+        profile = _read_profiles(path).get(profile_key())
+    _profiles[path] = profile
+    return profile
+
+def get_tuning(cipher: str, path: str = TUNING_PROFILE) -> Dict[str, Any]:
+    """Cấu hình đã dò cho cipher ({'chunk_size', 'num_workers', ...}), rỗng nếu chưa có"""
+    profile = load_profile(path)
+    if profile is None:
+        return {}
+    return profile['ciphers'].get(cipher, {})
+
+def tuned_chunk_size(cipher: str, default: int) -> int:
+    return get_tuning(cipher).get('chunk_size', default)
+
+def tuned_num_workers(cipher: str, default: Optional[int] = None) -> Optional[int]:
+    return get_tuning(cipher).get('num_workers', default)
+
+def _mean_throughput(size: int, encrypt_stats, decrypt_stats) -> float:
+    """Throughput trung bình mã hóa và giải mã (MB/s theo median)"""
+    return (size / encrypt_stats.median + size / decrypt_stats.median) / 2
+
+def tune_cipher(cipher: str, chunk_sizes: Sequence[int] = DEFAULT_CHUNK_SIZES,
+                worker_counts: Optional[Sequence[int]] = None, file_size: int = 64,
+                parallel_size: int = 64, num_runs: int = 3,
+                work_dir: Optional[str] = None) -> Dict[str, Any]:
+    """Quét kích thước chunk (mã hóa file theo luồng) và số worker (mã hóa song song) cho một cipher
+
+    Dùng benchmark_*_stream với file file_size MB và benchmark_*_parallel với buffer parallel_size MB.
+    Returns:
+        {'chunk_size', 'num_workers', 'chunk_sweep': {chunk: MB/s}, 'worker_sweep': {workers: MB/s}}
+    """
+    # Import tại chỗ: các module benchmark import autotune để đọc profile
+    if cipher == 'aes-ctr':
+        from aes_ctr_benchmark import benchmark_aes_ctr_stream as benchmark_stream
+        from aes_ctr_benchmark import benchmark_aes_ctr_parallel as benchmark_parallel
+    elif cipher == 'chacha20':
+        from chacha20_benchmark import benchmark_chacha20_stream as benchmark_stream
+        from chacha20_benchmark import benchmark_chacha20_parallel as benchmark_parallel
+    else:
+        raise ValueError(f"Cipher không hợp lệ: {cipher} (hỗ trợ: {', '.join(TUNABLE_CIPHERS)})")
+    if worker_counts is None:
+        worker_counts = default_worker_counts()
+
+    chunk_sweep = {}
+    for chunk_size in chunk_sizes:
+        encrypt_stats, decrypt_stats = benchmark_stream([file_size], num_runs, chunk_size, work_dir)
+        chunk_sweep[chunk_size] = _mean_throughput(file_size, encrypt_stats[0], decrypt_stats[0])
+    worker_sweep = dict(zip(worker_counts, benchmark_parallel(parallel_size, list(worker_counts), num_runs)))
+
+    return {'chunk_size': max(chunk_sweep, key=chunk_sweep.get),
+            'num_workers': max(worker_sweep, key=worker_sweep.get),
+            'chunk_sweep': chunk_sweep, 'worker_sweep': worker_sweep}
+
+def tune(ciphers: Sequence[str] = TUNABLE_CIPHERS, path: str = TUNING_PROFILE, **kwargs: Any) -> dict:
+    """Dò mọi cipher rồi lưu vào profile của máy hiện tại (giữ nguyên mục của các máy khác)
+
+    kwargs được chuyển cho tune_cipher. Returns: mục profile vừa lưu.
+    """
+    system_info = get_system_info()
+    profiles = _read_profiles(path)
+    key = profile_key(system_info)
+    entry = profiles.get(key) or {'ciphers': {}}
+    entry['system'] = system_info
+    entry['tuned_at'] = datetime.now().isoformat(timespec='seconds')
+    for cipher in ciphers:
+        print(f"Đang dò {cipher}...", file=sys.stderr)
+        entry['ciphers'][cipher] = tune_cipher(cipher, **kwargs)
+    profiles[key] = entry
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(profiles, f, indent=2, ensure_ascii=False)
+    _profiles.pop(path, None)  # Lần đọc sau lấy profile mới
+    return entry
+
+def format_profile(entry: dict) -> str:
+    """Cấu hình đã chọn và kết quả quét (MB/s) của từng cipher"""
+    lines = [format_system_info(entry['system']), f"Dò lúc: {entry['tuned_at']}"]
+    for cipher, tuning in entry['ciphers'].items():
+        lines.append(f"{cipher}: chunk {tuning['chunk_size'] // 1024} KB, {tuning['num_workers']} worker")
+        # Khóa của sweep là chuỗi sau khi đọc lại từ JSON
+        lines.append("  chunk (KB): " + ", ".join(f"{int(size) // 1024}={mb_s:.0f}"
+                                                   for size, mb_s in tuning['chunk_sweep'].items()))
+        lines.append("  worker:     " + ", ".join(f"{workers}={mb_s:.0f}"
+                                                   for workers, mb_s in tuning['worker_sweep'].items()))
+    return "\n".join(lines)
+
+def parse_list(text: str) -> List[int]:
+    """Kiểu argparse cho danh sách số nguyên dương phân cách bằng dấu phẩy (dùng chung cho các CLI)"""
+    values = [int(value.strip()) for value in text.split(',') if value.strip()]
+    if not values or any(value <= 0 for value in values):
+        raise argparse.ArgumentTypeError("Cần các số nguyên dương, phân cách bằng dấu phẩy")
+    return values
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Dò kích thước chunk và số worker tối ưu cho máy hiện tại")
+    parser.add_argument('--cipher', choices=TUNABLE_CIPHERS + ('all',), default='all')
+    parser.add_argument('--chunk-sizes', type=parse_list, default=DEFAULT_CHUNK_SIZES,
+                        help="Kích thước chunk (byte), phân cách bằng dấu phẩy")
+    parser.add_argument('--workers', type=parse_list, help="Số worker cần thử (mặc định: 1, 2, 4, ... số core)")
+    parser.add_argument('--file-size', type=int, default=64, help="Kích thước file (MB) khi dò chunk")
+    parser.add_argument('--parallel-size', type=int, default=64, help="Kích thước buffer (MB) khi dò worker")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--work-dir', help="Thư mục chứa file tạm (nên nằm trên đĩa sẽ dùng thật)")
+    parser.add_argument('--profile', default=TUNING_PROFILE)
+    parser.add_argument('--show', action='store_true', help="Chỉ in profile hiện có của máy này")
+    args = parser.parse_args(argv)
+
+    if args.show:
+        entry = load_profile(args.profile)
+        if entry is None:
+            print("Chưa có profile cho máy này, hãy chạy autotune.py", file=sys.stderr)
+            return 1
+    else:
+        ciphers = TUNABLE_CIPHERS if args.cipher == 'all' else (args.cipher,)
+        entry = tune(ciphers, args.profile, chunk_sizes=args.chunk_sizes, worker_counts=args.workers,
+                     file_size=args.file_size, parallel_size=args.parallel_size, num_runs=args.runs,
+                     work_dir=args.work_dir)
+        entry = load_profile(args.profile)
+    print(format_profile(entry))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
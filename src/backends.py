@@ -0,0 +1,158 @@
+"""Registry các backend cipher dùng chung một lõi benchmark (benchmark_core)
+
+Mỗi backend là adapter new_cipher(key, nonce) trả về đối tượng có encrypt/decrypt(data, output=None).
+Backend của thư viện `cryptography` (OpenSSL) chỉ được đăng ký khi thư viện này đã được cài.
+"""
+import os
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from Crypto.Cipher import AES, ChaCha20
+from Crypto.Util import Counter
+from benchmark_core import measure_payload, save_figure
+from memory_profile import MemoryTracker
+from system_info import get_system_info, format_system_info
+from timing import TimingStats, throughput
+
+class CipherBackend(NamedTuple):
+    """Một backend cipher trong registry"""
+    name: str
+    library: str        # Thư viện cài đặt: pycryptodome, numpy, cryptography
+    key_size: int       # byte
+    nonce_size: int     # byte
+    new_cipher: Callable[[bytes, bytes], Any]
+    description: str
+
+BACKENDS: Dict[str, CipherBackend] = {}
+
+def register_backend(name: str, library: str, key_size: int, nonce_size: int,
+                     new_cipher: Callable[[bytes, bytes], Any], description: str = ''):
+    """Đăng ký (hoặc thay thế) một backend"""
+    BACKENDS[name] = CipherBackend(name, library, key_size, nonce_size, new_cipher, description)
+
+def get_backend(name: str) -> CipherBackend:
+    if name not in BACKENDS:
+        raise ValueError(f"Backend không hợp lệ: {name} (hỗ trợ: {', '.join(BACKENDS)})")
+    return BACKENDS[name]
+
+def available_backends() -> List[str]:
+    return list(BACKENDS)
+
+def _aes_ctr(key: bytes, nonce: bytes):
+    """AES-CTR: nonce 64-bit, counter 64-bit big-endian bắt đầu từ 0 (giống create_cipher của AES-CTR)"""
+    return AES.new(key, AES.MODE_CTR, counter=Counter.new(64, prefix=nonce, initial_value=0))
+
+def _chacha20(key: bytes, nonce: bytes):
+    """ChaCha20 (nonce 12 byte) hoặc XChaCha20 (nonce 24 byte) của pycryptodome"""
+    return ChaCha20.new(key=key, nonce=nonce)
+
+def _chacha20_numpy(key: bytes, nonce: bytes):
+    from chacha20_numpy import NumpyChaCha20
+    return NumpyChaCha20(key, nonce)
+
+for _bits in (128, 192, 256):
+    register_backend(f'aes-{_bits}-ctr', 'pycryptodome', _bits // 8, 8, _aes_ctr, f'AES-{_bits} CTR (AES-NI nếu có)')
+register_backend('chacha20', 'pycryptodome', 32, 12, _chacha20, 'ChaCha20 IETF (RFC 8439)')
+register_backend('xchacha20', 'pycryptodome', 32, 24, _chacha20, 'XChaCha20, nonce 192-bit')
+register_backend('chacha20-numpy', 'numpy', 32, 12, _chacha20_numpy, 'ChaCha20 vector hóa bằng NumPy')
+
+class _OpenSSLCipher:
+    """Adapter cho Cipher của `cryptography`: encrypt/decrypt(data, output=None) như pycryptodome
+
+    update_into cần buffer dài hơn dữ liệu (len + block - 1), nên với output có đúng kích thước
+    kết quả được chép vào output sau update (không zero-copy hoàn toàn).
+    """
+
+    def __init__(self, cipher):
+        self._cipher = cipher
+        self._context = None
+
+    def encrypt(self, data: bytes, output: Optional[bytearray] = None) -> Optional[bytes]:
+        if self._context is None:
+            self._context = self._cipher.encryptor()
+        result = self._context.update(data)
+        if output is None:
+            return result
+        output[:] = result
+        return None
+
+    decrypt = encrypt  # Mã dòng: giải mã giống mã hóa
+
+try:
+    from cryptography.hazmat.primitives.ciphers import Cipher, algorithms, modes
+
+    def _openssl_aes_ctr(key: bytes, nonce: bytes):
+        # IV 16 byte = nonce 64-bit || counter 64-bit bắt đầu từ 0, khớp backend pycryptodome
+        return _OpenSSLCipher(Cipher(algorithms.AES(key), modes.CTR(nonce + bytes(8))))
+
+    def _openssl_chacha20(key: bytes, nonce: bytes):
+        # cryptography nhận nonce 16 byte = counter 32-bit little-endian || nonce 96-bit
+        return _OpenSSLCipher(Cipher(algorithms.ChaCha20(key, bytes(4) + nonce), mode=None))
+
+    for _bits in (128, 192, 256):
+        register_backend(f'aes-{_bits}-ctr-openssl', 'cryptography', _bits // 8, 8, _openssl_aes_ctr,
+                         f'AES-{_bits} CTR qua OpenSSL')
+    register_backend('chacha20-openssl', 'cryptography', 32, 12, _openssl_chacha20, 'ChaCha20 qua OpenSSL')
+except ImportError:
+    pass  # `cryptography` là tùy chọn
+
+def benchmark_backends(file_sizes: List[int], names: Optional[Sequence[str]] = None, num_runs: int = 10,
+                       output_mode: str = 'alloc', warmup: int = 2, min_sample_time: float = 0.05,
+                       memory: Optional[Dict[str, List[dict]]] = None,
+                       progress: Optional[Callable[[dict], None]] = None) -> Dict[str, Tuple[List[TimingStats], List[TimingStats]]]:
+    """Chạy cùng một phương pháp đo cho nhiều backend trên cùng payload
+
+    Với mỗi kích thước, dữ liệu được sinh một lần và dùng cho mọi backend; mỗi backend một khóa riêng.
+    memory: dict tên backend -> list, được thêm kết quả đo bộ nhớ theo phase nếu truyền vào.
+    Returns:
+        Dict tên backend -> (encrypt_stats, decrypt_stats)
+    """
+    backends = [get_backend(name) for name in (names or available_backends())]
+    keys = {backend.name: os.urandom(backend.key_size) for backend in backends}
+    results = {backend.name: ([], []) for backend in backends}
+    for size in file_sizes:
+        data = os.urandom(size * 1024 * 1024)
+        for backend in backends:
+            tracker = MemoryTracker(enabled=memory is not None)
+            encrypt, decrypt = measure_payload(backend.new_cipher, keys[backend.name], backend.nonce_size,
+                                               data, size, output_mode, num_runs, warmup, min_sample_time,
+                                               tracker, progress)
+            results[backend.name][0].append(encrypt)
+            results[backend.name][1].append(decrypt)
+            if memory is not None:
+                memory.setdefault(backend.name, []).append(tracker.phases)
+            if progress is not None:
+                progress({'type': 'result', 'size': size, 'backend': backend.name,
+                          'encrypt': encrypt, 'decrypt': decrypt})
+        del data
+    return results
+
+def format_backends(file_sizes: List[int], results: Dict[str, tuple]) -> str:
+    """Bảng throughput median (MB/s) mã hóa/giải mã theo backend và kích thước"""
+    header = f"{'Backend':<22} | " + " | ".join(f"{f'{size} MB (enc/dec)':>19}" for size in file_sizes)
+    lines = [header, "-" * len(header)]
+    for name, (encrypt_stats, decrypt_stats) in results.items():
+        cells = [f"{throughput(size, enc)[0]:>9.1f}/{throughput(size, dec)[0]:<9.1f}"
+                 for size, enc, dec in zip(file_sizes, encrypt_stats, decrypt_stats)]
+        lines.append(f"{name:<22} | " + " | ".join(cells))
+    return "\n".join(lines)
+
+def plot_backends(file_sizes: List[int], results: Dict[str, tuple],
+                  output_name: str = 'backends_comparison.png'):
+    """Vẽ throughput mã hóa và giải mã của các backend cạnh nhau (median, error bars theo CI)"""
+    # Import tại chỗ: matplotlib chiếm phần lớn thời gian khởi động module
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(15, 6))
+    for index, (operation, title) in enumerate([(0, 'Mã hóa'), (1, 'Giải mã')], start=1):
+        plt.subplot(1, 2, index)
+        for name, stats in results.items():
+            values = [throughput(size, s) for size, s in zip(file_sizes, stats[operation])]
+            yerr = [[v[0] - v[1] for v in values], [v[2] - v[0] for v in values]]
+            plt.errorbar(file_sizes, [v[0] for v in values], yerr=yerr, fmt='-o',
+                         label=name, capsize=4, capthick=1, elinewidth=1)
+        plt.xlabel('Kích thước file (MB)')
+        plt.ylabel('Throughput (MB/s)')
+        plt.title(f'{title}: throughput theo backend')
+        plt.legend(fontsize=8)
+        plt.grid(True, alpha=0.3)
+    plt.figtext(0.02, 0.02, format_system_info(get_system_info()), fontsize=8)
+    plt.tight_layout()
+    save_figure(plt, output_name)
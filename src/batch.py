@@ -0,0 +1,66 @@
+import os
+from typing import Any, Callable, Dict, List, Sequence, Tuple
+import numpy as np
+from timing import measure
+
+def block_layout(messages: Sequence[bytes], block_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Bố cục các thông điệp trong một buffer liên tục, mỗi thông điệp bắt đầu tại biên block
+
+    Returns:
+        lengths: Độ dài từng thông điệp (byte)
+        blocks: Số block của từng thông điệp
+        first_blocks: Chỉ số block đầu tiên của từng thông điệp trong buffer
+    """
+    lengths = np.fromiter(map(len, messages), dtype=np.int64, count=len(messages))
+    blocks = (lengths + block_size - 1) // block_size
+    first_blocks = np.cumsum(blocks) - blocks
+    return lengths, blocks, first_blocks
+
+def block_counters(blocks: np.ndarray, first_blocks: np.ndarray) -> np.ndarray:
+    """Counter trong thông điệp của từng block trong buffer (0, 1, ... cho mỗi thông điệp)"""
+    total = int(blocks.sum())
+    return np.arange(total, dtype=np.int64) - np.repeat(first_blocks, blocks)
+
+def pack_messages(messages: Sequence[bytes], blocks: np.ndarray, block_size: int) -> bytes:
+    """Ghép các thông điệp vào một buffer, đệm 0 tới biên block"""
+    return b''.join([m.ljust(int(b) * block_size, b'\0') for m, b in zip(messages, blocks)])
+
+def unpack_messages(packed: bytes, lengths: np.ndarray, first_blocks: np.ndarray, block_size: int) -> List[bytes]:
+    """Tách buffer đã xử lý thành danh sách thông điệp, bỏ phần đệm"""
+    return [packed[start:start + length]
+            for start, length in zip((first_blocks * block_size).tolist(), lengths.tolist())]
+
+def check_batch(nonces: Sequence[bytes], messages: Sequence[bytes], nonce_size: int):
+    """Kiểm tra số lượng nonce/thông điệp và độ dài nonce"""
+    if len(nonces) != len(messages):
+        raise ValueError("Số nonce phải bằng số thông điệp")
+    if any(len(nonce) != nonce_size for nonce in nonces):
+        raise ValueError(f"Mỗi nonce phải dài {nonce_size} byte")
+
+def benchmark_batch(encrypt_batch: Callable[[bytes, Sequence[bytes], Sequence[bytes]], List[bytes]],
+                    encrypt: Callable[[bytes, bytes, bytes], bytes],
+                    key_size: int, nonce_size: int, message_sizes: List[int],
+                    batch_size: int = 1000, num_runs: int = 5) -> List[Dict[str, Any]]:
+    """So sánh số thông điệp/giây giữa gọi encrypt từng thông điệp và encrypt_batch
+
+    Returns:
+        Danh sách dict cho từng kích thước: size, single_ops_per_sec, batch_ops_per_sec, speedup
+    """
+    key = os.urandom(key_size)
+    results = []
+    for size in message_sizes:
+        messages = [os.urandom(size) for _ in range(batch_size)]
+        nonces = [os.urandom(nonce_size) for _ in range(batch_size)]
+
+        # Kết quả batch phải khớp từng byte với đường mã hóa từng thông điệp
+        expected = [encrypt(key, nonce, message) for nonce, message in zip(nonces, messages)]
+        assert encrypt_batch(key, nonces, messages) == expected, "Lỗi: Kết quả batch khác kết quả từng thông điệp!"
+
+        single = measure(lambda _: [encrypt(key, nonce, message) for nonce, message in zip(nonces, messages)],
+                         num_samples=num_runs, warmup=1)
+        batched = measure(lambda _: encrypt_batch(key, nonces, messages), num_samples=num_runs, warmup=1)
+        single = batch_size / single.median
+        batched = batch_size / batched.median
+        results.append({'size': size, 'single_ops_per_sec': single,
+                        'batch_ops_per_sec': batched, 'speedup': batched / single})
+    return results
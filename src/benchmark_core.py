@@ -0,0 +1,409 @@
+import os
+from functools import partial
+from typing import Any, Callable, List, NamedTuple, Optional, Sequence, Tuple
+from system_info import get_system_info, format_system_info
+from timing import TimingStats, measure, throughput
+from output_modes import prepare_buffers, compare_output_modes, format_output_modes
+from memory_profile import MemoryTracker, plot_memory, format_memory
+from gui_worker import sample_callback, BenchmarkWorker, LiveThroughputChart
+
+class CipherDescriptor(NamedTuple):
+    """Mô tả một cipher cho giao diện dùng chung (create_gui)"""
+    name: str                   # Tên hiển thị, vd. 'AES-CTR'
+    key_size: int               # byte
+    encrypt: Callable[[bytes, bytes, bytes], bytes]  # encrypt(key, nonce, data) của module cipher
+    decrypt: Callable[[bytes, bytes, bytes], bytes]
+    new_nonces: Callable[[], Any]  # Tạo NonceAllocator cho một khóa
+    benchmark: Callable[..., Tuple[List[TimingStats], List[TimingStats]]]  # benchmark_aes_ctr / benchmark_chacha20
+    output_name: str            # Tên file biểu đồ trong data/
+    algorithm_info: str
+    # Tùy chọn riêng của cipher: (tham số của benchmark, nhãn checkbox, giá trị truyền vào khi được chọn)
+    options: Sequence[Tuple[str, str, Any]] = ()
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
+
+def measure_payload(new_cipher: Callable[[bytes, bytes], Any], key: bytes, nonce_size: int,
+                    data: bytes, size: int, output_mode: str = 'alloc', num_runs: int = 10,
+                    warmup: int = 2, min_sample_time: float = 0.05,
+                    tracker: Optional[MemoryTracker] = None,
+                    progress: Optional[Callable[[dict], None]] = None) -> Tuple[TimingStats, TimingStats]:
+    """Đo mã hóa/giải mã một payload với new_cipher(key, nonce)
+
+    Kết quả được verify một lần theo đúng output_mode ngoài vùng đo thời gian (các phase
+    setup/encrypt/decrypt/verify của tracker). size (MB) chỉ dùng để gắn nhãn sự kiện progress.
+    Returns:
+        (encrypt_stats, decrypt_stats)
+    """
+    if tracker is None:
+        tracker = MemoryTracker(enabled=False)
+    with tracker.phase('data'):
+        enc_buf, dec_buf = prepare_buffers(data, output_mode)
+    inplace = output_mode == 'inplace'
+    src = enc_buf if inplace else data
+    
+    # Verify kết quả một lần theo đúng chế độ output (không tính thời gian)
+    nonce = os.urandom(nonce_size)
+    with tracker.phase('setup'):
+        cipher = new_cipher(key, nonce)
+    with tracker.phase('encrypt'):
+        encrypted = cipher.encrypt(src, output=enc_buf)
+    if enc_buf is not None:
+        encrypted = bytes(enc_buf)  # Bản sao để đo giải mã, không tính vào phase encrypt
+    with tracker.phase('setup'):
+        cipher = new_cipher(key, nonce)
+    with tracker.phase('decrypt'):
+        decrypted = cipher.decrypt(enc_buf if inplace else encrypted, output=dec_buf)
+    if dec_buf is not None:
+        decrypted = dec_buf
+    with tracker.phase('verify'):
+        assert data == decrypted, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+    
+    # Mỗi lần gọi dùng cipher mới (nonce mới khi mã hóa), tạo sẵn ngoài vùng đo
+    encrypt_stats = measure(lambda cipher: cipher.encrypt(src, output=enc_buf),
+                            lambda: new_cipher(key, os.urandom(nonce_size)),
+                            num_runs, warmup, min_sample_time,
+                            on_sample=sample_callback(progress, size, 'encrypt'))
+    dec_src = dec_buf if inplace else encrypted
+    decrypt_stats = measure(lambda cipher: cipher.decrypt(dec_src, output=dec_buf),
+                            lambda: new_cipher(key, nonce),
+                            num_runs, warmup, min_sample_time,
+                            on_sample=sample_callback(progress, size, 'decrypt'))
+    return encrypt_stats, decrypt_stats
+
+def benchmark_cipher(new_cipher: Callable[[bytes, bytes], Any], key_size: int, nonce_size: int,
+                     file_sizes: List[int], num_runs: int = 10, output_mode: str = 'alloc',
+                     warmup: int = 2, min_sample_time: float = 0.05,
+                     memory: Optional[List[dict]] = None,
+                     progress: Optional[Callable[[dict], None]] = None) -> Tuple[List[TimingStats], List[TimingStats]]:
+    """Lõi benchmark dùng chung cho mọi cipher: new_cipher(key, nonce) tạo cipher mới
+
+    Tham số giống benchmark_aes_ctr/benchmark_chacha20 (kích thước file tính bằng MB).
+    Returns:
+        encrypt_stats, decrypt_stats: Thống kê thời gian cho từng kích thước
+    """
+    key = os.urandom(key_size)
+    encrypt_stats = []
+    decrypt_stats = []
+    
+    for size in file_sizes:
+        tracker = MemoryTracker(enabled=memory is not None)
+        with tracker.phase('data'):
+            data = os.urandom(size * 1024 * 1024)  # Tạo dữ liệu ngẫu nhiên
+        encrypt, decrypt = measure_payload(new_cipher, key, nonce_size, data, size, output_mode,
+                                           num_runs, warmup, min_sample_time, tracker, progress)
+        encrypt_stats.append(encrypt)
+        decrypt_stats.append(decrypt)
+        if memory is not None:
+            memory.append(tracker.phases)
+        if progress is not None:
+            progress({'type': 'result', 'size': size, 'encrypt': encrypt, 'decrypt': decrypt})
+        
+        # Giải phóng bộ nhớ
+        del data
+    
+    return encrypt_stats, decrypt_stats
+
+def save_figure(plt, output_name: str):
+    """Lưu figure hiện tại của pyplot vào data/output_name rồi đóng figure"""
+    try:
+        os.makedirs(DATA_DIR, exist_ok=True)
+        output_file = os.path.join(DATA_DIR, output_name)
+        plt.savefig(output_file, dpi=300, bbox_inches='tight')
+        print(f"Đã lưu biểu đồ tại: {output_file}")
+    except Exception as e:
+        print(f"Lỗi khi lưu biểu đồ: {str(e)}")
+    finally:
+        plt.close()
+
+def plot_results(file_sizes: List[int], 
+                encrypt_stats: List[TimingStats], decrypt_stats: List[TimingStats],
+                output_name: str = 'performance.png',
+                x_values: Optional[list] = None, x_label: str = 'Kích thước file (MB)',
+                memory: Optional[List[dict]] = None):
+    """Vẽ biểu đồ kết quả: median, error bars theo khoảng tin cậy, vùng mờ p5-p95
+    
+    file_sizes dùng để tính throughput; x_values (mặc định là file_sizes) là trục hoành,
+    ví dụ thứ tự các lần chạy khi vẽ xu hướng từ lịch sử benchmark.
+    memory: Kết quả đo bộ nhớ theo phase (tham số memory của benchmark), vẽ thêm biểu đồ thứ ba
+    """
+    # Import tại chỗ: matplotlib chiếm phần lớn thời gian khởi động module
+    import matplotlib.pyplot as plt
+    system_info = get_system_info()
+    if x_values is None:
+        x_values = file_sizes
+    
+    plt.rcParams['figure.facecolor'] = 'white'
+    plt.rcParams['axes.facecolor'] = 'white'
+    plt.rcParams['axes.grid'] = True
+    plt.rcParams['grid.alpha'] = 0.3
+    plt.rcParams['lines.linewidth'] = 2
+    
+    num_plots = 3 if memory else 2
+    plt.figure(figsize=(7.5 * num_plots, 6))
+    
+    # Biểu đồ thời gian
+    plt.subplot(1, num_plots, 1)
+    for stats, fmt, color, label in [(encrypt_stats, 'b-o', 'b', 'Encryption'), (decrypt_stats, 'r-o', 'r', 'Decryption')]:
+        medians = [s.median for s in stats]
+        yerr = [[s.median - s.ci_low for s in stats], [s.ci_high - s.median for s in stats]]
+        plt.errorbar(x_values, medians, yerr=yerr, fmt=fmt,
+                    label=label, capsize=5, capthick=1, elinewidth=1)
+        plt.fill_between(x_values, [s.p5 for s in stats], [s.p95 for s in stats], color=color, alpha=0.1)
+    plt.xlabel(x_label)
+    plt.ylabel('Thời gian xử lý (giây, median)')
+    plt.title(f'Thời gian mã hóa/giải mã theo {x_label.split(" (")[0].lower()}')
+    plt.legend()
+    plt.grid(True)
+    
+    # Biểu đồ throughput
+    plt.subplot(1, num_plots, 2)
+    for stats, fmt, label in [(encrypt_stats, 'b-o', 'Encryption'), (decrypt_stats, 'r-o', 'Decryption')]:
+        values = [throughput(size, s) for size, s in zip(file_sizes, stats)]
+        yerr = [[v[0] - v[1] for v in values], [v[2] - v[0] for v in values]]
+        plt.errorbar(x_values, [v[0] for v in values], yerr=yerr,
+                    fmt=fmt, label=label, capsize=5, capthick=1, elinewidth=1)
+    plt.xlabel(x_label)
+    plt.ylabel('Throughput (MB/s)')
+    plt.title(f'Throughput theo {x_label.split(" (")[0].lower()}')
+    plt.legend()
+    plt.grid(True)
+    
+    if memory:
+        plt.subplot(1, num_plots, 3)
+        plot_memory(x_values, memory, x_label)
+    
+    # Thêm thông tin cấu hình
+    plt.figtext(0.02, 0.02, format_system_info(system_info), fontsize=8)
+    
+    plt.tight_layout()
+    
+    save_figure(plt, output_name)
+
+def create_gui(cipher: CipherDescriptor):
+    """Tạo giao diện đồ họa cho demo và benchmark của một cipher"""
+    import tkinter as tk
+    from tkinter import ttk, scrolledtext, messagebox
+    
+    # Một khóa cho cả phiên demo, nonce lấy từ counter nên mỗi lần mã hóa có nonce mới
+    demo_key = os.urandom(cipher.key_size)
+    demo_nonces = cipher.new_nonces()
+    
+    def demo_encryption() -> Tuple[bytes, bytes, bytes, bytes]:
+        """Demo mã hóa/giải mã với văn bản"""
+        text = demo_text.get('1.0', tk.END).strip()
+        if not text:
+            raise ValueError("Vui lòng nhập text để mã hóa")
+        
+        key = demo_key
+        plaintext = text.encode('utf-8')
+        nonce = demo_nonces.next_nonce(len(plaintext))
+        
+        encrypted = cipher.encrypt(key, nonce, plaintext)
+        decrypted = cipher.decrypt(key, nonce, encrypted)
+        
+        return encrypted, key, nonce, decrypted
+    
+    def run_demo():
+        try:
+            encrypted, key, nonce, decrypted = demo_encryption()
+            
+            demo_output.delete('1.0', tk.END)
+            demo_output.insert(tk.END, f"=== Demo {cipher.name} ===\n\n")
+            demo_output.insert(tk.END, f"Plaintext: {demo_text.get('1.0', tk.END).strip()}\n\n")
+            demo_output.insert(tk.END, f"Encrypted (hex): {encrypted.hex()}\n\n")
+            demo_output.insert(tk.END, f"Key (hex): {key.hex()}\n")
+            demo_output.insert(tk.END, f"Nonce (hex): {nonce.hex()}\n")
+            demo_output.insert(tk.END, f"\nDecrypted: {decrypted.decode('utf-8')}\n")
+            
+        except Exception as e:
+            messagebox.showerror("Lỗi", str(e))
+    
+    worker = None  # BenchmarkWorker đang chạy, None nếu không có
+    
+    def format_row(size: int, encrypt_stats: TimingStats, decrypt_stats: TimingStats) -> str:
+        enc, enc_low, enc_high = throughput(size, encrypt_stats)
+        dec, dec_low, dec_high = throughput(size, decrypt_stats)
+        return (f"{size:>10} | {enc:>8.2f} [{enc_low:>7.2f}-{enc_high:>7.2f}] | "
+                f"{dec:>8.2f} [{dec_low:>7.2f}-{dec_high:>7.2f}]\n")
+    
+    def run_benchmark():
+        nonlocal worker
+        try:
+            sizes = [int(size.strip()) for size in file_sizes_entry.get().split(',')]
+            if not sizes:
+                raise ValueError("Vui lòng nhập ít nhất một kích thước file")
+            if any(size <= 0 for size in sizes):
+                raise ValueError("Kích thước file phải lớn hơn 0")
+        except ValueError as e:
+            messagebox.showerror("Lỗi", str(e))
+            return
+        
+        output_text.delete('1.0', tk.END)
+        output_text.insert(tk.END, f"Bắt đầu benchmark {cipher.name}...\n")
+        output_text.insert(tk.END, format_system_info(get_system_info()) + "\n\n")
+        progress_var.set(0)
+        chart.clear()
+        
+        num_runs = 10
+        job = {'sizes': sizes, 'samples': 0, 'compare_modes': compare_modes_var.get(),
+               'memory': [] if track_memory_var.get() else None}
+        options = {name: value for (name, _, value), var in zip(cipher.options, option_vars) if var.get()}
+        if job['compare_modes']:
+            # So sánh throughput khi cấp phát buffer mới và khi ghi vào buffer có sẵn
+            modes = ('alloc', 'preallocated')
+            job['total'] = len(sizes) * 2 * num_runs * len(modes)
+            task = lambda progress: compare_output_modes(
+                partial(cipher.benchmark, progress=progress, **options), sizes, num_runs, modes)
+        else:
+            job['total'] = len(sizes) * 2 * num_runs
+            task = lambda progress: cipher.benchmark(sizes, num_runs, memory=job['memory'], progress=progress,
+                                                     **options)
+            # Kết quả hiển thị dần: median và khoảng tin cậy 95%
+            output_text.insert(tk.END, "Kết quả benchmark (median [CI 95%]):\n\n")
+            output_text.insert(tk.END, f"{'Size (MB)':>10} | {'Encrypt (MB/s)':>27} | {'Decrypt (MB/s)':>27}\n")
+            output_text.insert(tk.END, "-" * 72 + "\n")
+        
+        # Benchmark chạy ở luồng nền, cửa sổ vẫn phản hồi; kết quả về qua queue
+        worker = BenchmarkWorker(task)
+        run_button.configure(state='disabled')
+        cancel_button.configure(state='normal')
+        worker.start()
+        root.after(100, poll_worker, job)
+    
+    def poll_worker(job: dict):
+        for event in worker.poll():
+            if event['type'] == 'sample':
+                job['samples'] += 1
+                progress_var.set(min(99.0, job['samples'] / job['total'] * 100))
+                status_var.set(f"{event['operation']} {event['size']} MB: "
+                               f"{event['size'] / event['seconds']:.1f} MB/s")
+            elif event['type'] == 'result' and not job['compare_modes']:
+                output_text.insert(tk.END, format_row(event['size'], event['encrypt'], event['decrypt']))
+                output_text.see(tk.END)
+                chart.add(event['size'], throughput(event['size'], event['encrypt'])[0],
+                          throughput(event['size'], event['decrypt'])[0])
+            elif event['type'] == 'done':
+                finish_benchmark(job, event['result'])
+                return
+            elif event['type'] == 'cancelled':
+                output_text.insert(tk.END, "\nĐã hủy benchmark.\n")
+                end_run("Đã hủy")
+                return
+            elif event['type'] == 'error':
+                output_text.insert(tk.END, f"\nLỗi: {str(event['error'])}\n")
+                end_run("Lỗi")
+                messagebox.showerror("Lỗi", str(event['error']))
+                return
+        root.after(100, poll_worker, job)
+    
+    def finish_benchmark(job: dict, result):
+        try:
+            sizes = job['sizes']
+            if job['compare_modes']:
+                output_text.insert(tk.END, "Throughput (MB/s) theo chế độ output:\n\n")
+                output_text.insert(tk.END, format_output_modes(sizes, result) + "\n")
+            else:
+                encrypt_stats, decrypt_stats = result
+                if job['memory']:
+                    output_text.insert(tk.END, "\nBộ nhớ theo phase:\n\n" + format_memory(sizes, job['memory']) + "\n")
+                # Vẽ và lưu biểu đồ (ở luồng chính, vì pyplot không an toàn đa luồng)
+                plot_results(sizes, encrypt_stats, decrypt_stats, cipher.output_name, memory=job['memory'])
+                output_text.insert(tk.END, f"\nĐã lưu biểu đồ kết quả vào data/{cipher.output_name}\n")
+            progress_var.set(100)
+            end_run("Hoàn tất")
+        except Exception as e:
+            output_text.insert(tk.END, f"\nLỗi: {str(e)}\n")
+            end_run("Lỗi")
+            messagebox.showerror("Lỗi", str(e))
+    
+    def end_run(status: str):
+        status_var.set(status)
+        run_button.configure(state='normal')
+        cancel_button.configure(state='disabled')
+    
+    def cancel_benchmark():
+        if worker is not None and worker.is_running():
+            worker.cancel()
+            status_var.set("Đang hủy sau mẫu hiện tại...")
+    
+    # Tạo cửa sổ chính
+    root = tk.Tk()
+    root.title(f"{cipher.name} Demo & Benchmark")
+    root.geometry("900x750")
+    
+    # Tạo notebook tabs
+    notebook = ttk.Notebook(root)
+    notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
+    
+    # Tab Info
+    info_frame = ttk.Frame(notebook, padding="10")
+    notebook.add(info_frame, text=f"Thông tin {cipher.name}")
+    
+    info_text = scrolledtext.ScrolledText(info_frame, height=20, font=('Consolas', 10))
+    info_text.pack(fill=tk.BOTH, expand=True)
+    info_text.insert('1.0', cipher.algorithm_info)
+    info_text.configure(state='disabled')
+    
+    # Tab Demo
+    demo_frame = ttk.Frame(notebook, padding="10")
+    notebook.add(demo_frame, text="Demo Mã hóa/Giải mã")
+    
+    input_frame = ttk.LabelFrame(demo_frame, text="Nhập text để mã hóa", padding="10")
+    input_frame.pack(fill=tk.X, pady=5)
+    
+    demo_text = scrolledtext.ScrolledText(input_frame, height=5)
+    demo_text.pack(fill=tk.X)
+    demo_text.insert('1.0', "Nhập văn bản để mã hóa tại đây...")
+    
+    output_frame = ttk.LabelFrame(demo_frame, text="Kết quả", padding="10")
+    output_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+    
+    demo_output = scrolledtext.ScrolledText(output_frame, height=10)
+    demo_output.pack(fill=tk.BOTH, expand=True)
+    
+    ttk.Button(demo_frame, text="Chạy Demo", command=run_demo).pack(pady=5)
+    
+    # Tab Benchmark
+    benchmark_frame = ttk.Frame(notebook, padding="10")
+    notebook.add(benchmark_frame, text="Benchmark")
+    
+    control_frame = ttk.LabelFrame(benchmark_frame, text="Cấu hình Benchmark", padding="10")
+    control_frame.pack(fill=tk.X)
+    
+    ttk.Label(control_frame, text="Kích thước file (MB, phân cách bằng dấu phẩy):").pack(side=tk.LEFT)
+    file_sizes_entry = ttk.Entry(control_frame, width=30)
+    file_sizes_entry.insert(0, "1, 10, 50, 100")
+    file_sizes_entry.pack(side=tk.LEFT, padx=5)
+    
+    compare_modes_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(control_frame, text="So sánh zero-copy", variable=compare_modes_var).pack(side=tk.LEFT, padx=5)
+    
+    track_memory_var = tk.BooleanVar(value=False)
+    ttk.Checkbutton(control_frame, text="Đo bộ nhớ", variable=track_memory_var).pack(side=tk.LEFT, padx=5)
+    
+    # Checkbox cho tùy chọn riêng của cipher (vd. tắt AES-NI)
+    option_vars = []
+    for _, label, _ in cipher.options:
+        var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(control_frame, text=label, variable=var).pack(side=tk.LEFT, padx=5)
+        option_vars.append(var)
+    
+    run_button = ttk.Button(control_frame, text="Chạy Benchmark", command=run_benchmark)
+    run_button.pack(side=tk.LEFT, padx=5)
+    cancel_button = ttk.Button(control_frame, text="Hủy", command=cancel_benchmark, state='disabled')
+    cancel_button.pack(side=tk.LEFT, padx=5)
+    
+    progress_var = tk.DoubleVar()
+    ttk.Progressbar(benchmark_frame, length=780, variable=progress_var, mode='determinate').pack(pady=(10, 0))
+    
+    status_var = tk.StringVar(value="")
+    ttk.Label(benchmark_frame, textvariable=status_var).pack(anchor=tk.W)
+    
+    chart = LiveThroughputChart(benchmark_frame)
+    chart.widget.pack(fill=tk.X, pady=5)
+    
+    output_text = scrolledtext.ScrolledText(benchmark_frame, height=10, font=('Consolas', 10))
+    output_text.pack(pady=5, fill=tk.BOTH, expand=True)
+    
+    root.mainloop()
+    demo_nonces.close()
@@ -0,0 +1,461 @@
+"""Mã hóa cả cây thư mục trên nhiều process
+
+Mỗi file có nonce riêng (cấp theo counter bởi NonceAllocator), ghi vào manifest nhị phân nén ở gốc
+thư mục đích; cây đích giữ nguyên đường dẫn tương đối, file bản mã cùng kích thước với bản rõ.
+File nhỏ được gom thành lô để giảm chi phí mỗi task, file lớn được chia thành các đoạn theo offset
+counter để nhiều worker cùng mã hóa một file.
+
+Ví dụ:
+    python bulk_encrypt.py encrypt photos/ photos.enc/ --cipher chacha20 --key-file photos.key
+    python bulk_encrypt.py decrypt photos.enc/ photos.out/ --key-file photos.key
+    python bulk_encrypt.py bench --workers 1,2,4 --small 2000 --large 2 --plot
+"""
+import os
+import sys
+import zlib
+import random
+import shutil
+import struct
+import argparse
+import tempfile
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from aes_ctr_benchmark import create_cipher as create_aes_ctr, create_nonce_allocator as aes_ctr_nonces
+from chacha20_benchmark import create_cipher as create_chacha20, create_nonce_allocator as chacha20_nonces
+from autotune import tuned_num_workers, default_worker_counts, parse_list
+from benchmark_core import save_figure
+from nonce_allocator import NonceAllocator, NonceExhausted
+from streaming import _write_all, file_digest
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # Không có khóa file (Windows): không chạy song song nhiều lệnh encrypt cùng key
+
+# Tên -> (mã cipher, kích thước key, kích thước nonce, kích thước block, create_cipher, tạo NonceAllocator)
+CIPHERS = {'aes-ctr': (1, 16, 8, 16, create_aes_ctr, aes_ctr_nonces),
+           'chacha20': (2, 32, 12, 64, create_chacha20, chacha20_nonces)}
+MANIFEST_NAME = '.bulk_manifest'
+NONCE_STATE_SUFFIX = '.slot'               # File trạng thái cạnh file key: slot prefix kế tiếp (uint64 BE)
+MANIFEST_MAGIC = b'BEM1'
+MANIFEST_HEADER = struct.Struct('>4sBBI')  # Magic, mã cipher, kích thước nonce, số file
+MANIFEST_ENTRY = struct.Struct('>QH')      # Kích thước file, độ dài đường dẫn; tiếp theo là nonce và đường dẫn UTF-8
+DEFAULT_BATCH_BYTES = 1024 * 1024          # Gom file nhỏ tới khoảng này mỗi task
+DEFAULT_BATCH_FILES = 128
+DEFAULT_SEGMENT_SIZE = 8 * 1024 * 1024     # File lớn hơn được chia đoạn (bội của block của mọi cipher)
+WORKER_CHUNK_SIZE = 1024 * 1024
+
+class ManifestEntry(NamedTuple):
+    """Một file trong manifest"""
+    path: str       # Đường dẫn tương đối, phân cách bằng '/'
+    size: int       # byte
+    nonce: bytes
+
+class BulkResult(NamedTuple):
+    """Kết quả mã hóa/giải mã một cây thư mục"""
+    files: int
+    bytes: int
+    tasks: int      # Số task gửi cho process pool (lô file nhỏ hoặc đoạn của file lớn)
+    elapsed: float  # giây, gồm cả duyệt thư mục, lập lịch và khởi động pool
+
+    @property
+    def files_per_sec(self) -> float:
+        return self.files / self.elapsed
+
+    @property
+    def mb_s(self) -> float:
+        return self.bytes / (1024 * 1024) / self.elapsed
+
+def _cipher_info(cipher: str) -> tuple:
+    if cipher not in CIPHERS:
+        raise ValueError(f"Cipher không hợp lệ: {cipher} (hỗ trợ: {', '.join(CIPHERS)})")
+    return CIPHERS[cipher]
+
+def write_manifest(path: str, cipher: str, entries: Sequence[ManifestEntry]):
+    """Ghi manifest: header 10 byte rồi các mục (kích thước, nonce, đường dẫn) nén bằng zlib
+
+    ValueError nếu có đường dẫn mà read_manifest sẽ từ chối (vd. tên file chứa '\\').
+    """
+    cipher_id, _, nonce_size, _, _, _ = _cipher_info(cipher)
+    body = bytearray()
+    for entry in entries:
+        _check_manifest_path(entry.path)
+        name = entry.path.encode('utf-8')
+        body += MANIFEST_ENTRY.pack(entry.size, len(name)) + entry.nonce + name
+    with open(path, 'wb') as f:
+        f.write(MANIFEST_HEADER.pack(MANIFEST_MAGIC, cipher_id, nonce_size, len(entries)))
+        f.write(zlib.compress(bytes(body)))
+
+def _check_manifest_path(path: str):
+    """Đường dẫn trong manifest phải là đường dẫn tương đối nằm trong thư mục gốc"""
+    parts = path.split('/')
+    if (any(part in ('', '.', '..') for part in parts) or '\\' in path or '\0' in path
+            or os.path.isabs(path) or os.path.splitdrive(path)[0]):
+        raise ValueError(f"Manifest không hợp lệ: đường dẫn không an toàn {path!r}")
+
+def read_manifest(path: str) -> Tuple[str, List[ManifestEntry]]:
+    """Đọc manifest, trả về (cipher, các mục); ValueError nếu manifest hỏng"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    if len(data) < MANIFEST_HEADER.size:
+        raise ValueError("Manifest không hợp lệ: thiếu header")
+    magic, cipher_id, nonce_size, count = MANIFEST_HEADER.unpack_from(data)
+    ciphers = {info[0]: name for name, info in CIPHERS.items()}
+    if magic != MANIFEST_MAGIC or cipher_id not in ciphers or nonce_size != CIPHERS[ciphers[cipher_id]][2]:
+        raise ValueError("Manifest không hợp lệ: sai magic hoặc cipher")
+    try:
+        body = zlib.decompress(data[MANIFEST_HEADER.size:])
+        entries = []
+        offset = 0
+        for _ in range(count):
+            size, name_length = MANIFEST_ENTRY.unpack_from(body, offset)
+            offset += MANIFEST_ENTRY.size
+            nonce = body[offset:offset + nonce_size]
+            offset += nonce_size
+            name = body[offset:offset + name_length].decode('utf-8')
+            offset += name_length
+            entries.append(ManifestEntry(name, size, nonce))
+    except (zlib.error, struct.error, UnicodeDecodeError) as e:
+        raise ValueError(f"Manifest không hợp lệ: {e}") from e
+    if offset != len(body) or any(len(entry.nonce) != nonce_size for entry in entries):
+        raise ValueError("Manifest không hợp lệ: sai độ dài")
+    for entry in entries:
+        _check_manifest_path(entry.path)
+    return ciphers[cipher_id], entries
+
+def walk_tree(root: str) -> List[Tuple[str, int]]:
+    """Các file thường trong cây (bỏ qua symlink), theo thứ tự đường dẫn: (đường dẫn tương đối, kích thước)"""
+    files = []
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            path = os.path.join(dirpath, name)
+            if os.path.islink(path) or not os.path.isfile(path):
+                continue
+            files.append((os.path.relpath(path, root).replace(os.sep, '/'), os.path.getsize(path)))
+    return files
+
+def plan_tasks(entries: Sequence[ManifestEntry], src_root: str, dst_root: str,
+               batch_bytes: int = DEFAULT_BATCH_BYTES, batch_files: int = DEFAULT_BATCH_FILES,
+               segment_size: int = DEFAULT_SEGMENT_SIZE) -> List[List[tuple]]:
+    """Chia công việc thành các task cho process pool
+
+    Mỗi task là một list job (src, dst, nonce, start, length, segment). File lớn hơn segment_size
+    thành nhiều job segment=True (mỗi job một task, file đích được tạo sẵn đủ kích thước); các file
+    còn lại được gom lần lượt vào lô tới batch_bytes byte hoặc batch_files file.
+    """
+    if segment_size <= 0 or segment_size % 64:
+        raise ValueError("Kích thước đoạn phải là bội dương của 64 byte (block ChaCha20)")
+    tasks = []
+    batch, batch_size = [], 0
+    for entry in entries:
+        src = os.path.join(src_root, *entry.path.split('/'))
+        dst = os.path.join(dst_root, *entry.path.split('/'))
+        if entry.size > segment_size:
+            tasks.extend([(src, dst, entry.nonce, start, min(segment_size, entry.size - start), True)]
+                         for start in range(0, entry.size, segment_size))
+            continue
+        batch.append((src, dst, entry.nonce, 0, entry.size, False))
+        batch_size += entry.size
+        if batch_size >= batch_bytes or len(batch) >= batch_files:
+            tasks.append(batch)
+            batch, batch_size = [], 0
+    if batch:
+        tasks.append(batch)
+    return tasks
+
+_worker: Dict[str, Any] = {}
+
+def _init_worker(cipher: str, key: bytes, decrypt: bool):
+    _, _, _, block_size, create_cipher, _ = CIPHERS[cipher]
+    _worker.update(key=key, decrypt=decrypt, block_size=block_size, create_cipher=create_cipher,
+                   buffer=memoryview(bytearray(WORKER_CHUNK_SIZE)))
+
+def _run_task(jobs: List[tuple]) -> int:
+    """Xử lý một task trong process con bằng buffer dùng chung của process, trả về số byte"""
+    view = _worker['buffer']
+    total = 0
+    for src_path, dst_path, nonce, start, length, segment in jobs:
+        # start là bội của block nên counter bắt đầu đúng tại start // block_size
+        cipher = _worker['create_cipher'](_worker['key'], nonce, start // _worker['block_size'])
+        transform = cipher.decrypt if _worker['decrypt'] else cipher.encrypt
+        with open(src_path, 'rb', buffering=0) as src, \
+             open(dst_path, 'r+b' if segment else 'wb', buffering=0) as dst:
+            src.seek(start)
+            dst.seek(start)
+            remaining = length
+            while remaining:
+                n = src.readinto(view[:min(len(view), remaining)])
+                if not n:
+                    raise ValueError(f"File bị thay đổi trong lúc xử lý: {src_path}")
+                transform(view[:n], output=view[:n])
+                _write_all(dst, view[:n])
+                remaining -= n
+        total += length
+    return total
+
+def _run_tasks(cipher: str, key: bytes, decrypt: bool, tasks: List[List[tuple]],
+               num_workers: Optional[int], mp_context: Any) -> int:
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=mp_context, initializer=_init_worker,
+                             initargs=(cipher, key, decrypt)) as pool:
+        futures = [pool.submit(_run_task, task) for task in tasks]
+        return sum(future.result() for future in futures)
+
+def _prepare_outputs(entries: Sequence[ManifestEntry], dst_root: str, segment_size: int):
+    """Tạo thư mục đích và tạo sẵn file sẽ được nhiều task ghi theo đoạn"""
+    for entry in entries:
+        dst = os.path.join(dst_root, *entry.path.split('/'))
+        os.makedirs(os.path.dirname(dst), exist_ok=True)
+        if entry.size > segment_size:
+            with open(dst, 'wb') as f:
+                f.truncate(entry.size)
+
+def encrypt_tree(cipher: str, key: bytes, src_dir: str, dst_dir: str, num_workers: Optional[int] = None,
+                 nonces: Optional[NonceAllocator] = None, batch_bytes: int = DEFAULT_BATCH_BYTES,
+                 batch_files: int = DEFAULT_BATCH_FILES, segment_size: int = DEFAULT_SEGMENT_SIZE,
+                 mp_context: Any = None) -> BulkResult:
+    """Mã hóa mọi file trong src_dir sang dst_dir trên process pool, ghi manifest vào dst_dir
+
+    nonces: allocator của key (tạo mới nếu không truyền, khi đó key phải là key mới cho lần gọi này;
+        dùng lại key cho nhiều cây thì truyền cùng một allocator, hoặc dùng encrypt_tree_with_key_file
+        để mỗi lần chạy nhận prefix nonce riêng).
+    num_workers mặc định lấy từ profile của autotune.py, nếu chưa dò thì bằng số core.
+    """
+    _, key_size, _, _, _, new_allocator = _cipher_info(cipher)
+    if len(key) != key_size:
+        raise ValueError(f"Key của {cipher} phải dài {key_size} byte")
+    src_dir, dst_dir = os.path.abspath(src_dir), os.path.abspath(dst_dir)
+    if os.path.commonpath([src_dir, dst_dir]) == src_dir:
+        raise ValueError("Thư mục đích không được nằm trong thư mục nguồn")
+    if num_workers is None:
+        num_workers = tuned_num_workers(cipher)
+
+    begin = perf_counter()
+    files = walk_tree(src_dir)
+    if any(path == MANIFEST_NAME for path, _ in files):
+        raise ValueError(f"Thư mục nguồn đã có file {MANIFEST_NAME}")
+    allocator = nonces or new_allocator()
+    try:
+        entries = [ManifestEntry(path, size, allocator.next_nonce(size)) for path, size in files]
+    finally:
+        if nonces is None:
+            allocator.close()
+    os.makedirs(dst_dir, exist_ok=True)
+    write_manifest(os.path.join(dst_dir, MANIFEST_NAME), cipher, entries)
+    _prepare_outputs(entries, dst_dir, segment_size)
+    tasks = plan_tasks(entries, src_dir, dst_dir, batch_bytes, batch_files, segment_size)
+    total = _run_tasks(cipher, key, False, tasks, num_workers, mp_context)
+    return BulkResult(len(entries), total, len(tasks), perf_counter() - begin)
+
+def decrypt_tree(key: bytes, src_dir: str, dst_dir: str, num_workers: Optional[int] = None,
+                 batch_bytes: int = DEFAULT_BATCH_BYTES, batch_files: int = DEFAULT_BATCH_FILES,
+                 segment_size: int = DEFAULT_SEGMENT_SIZE, mp_context: Any = None) -> BulkResult:
+    """Giải mã cây do encrypt_tree tạo ra (cipher và nonce đọc từ manifest trong src_dir)"""
+    begin = perf_counter()
+    cipher, entries = read_manifest(os.path.join(src_dir, MANIFEST_NAME))
+    if len(key) != CIPHERS[cipher][1]:
+        raise ValueError(f"Key của {cipher} phải dài {CIPHERS[cipher][1]} byte")
+    if num_workers is None:
+        num_workers = tuned_num_workers(cipher)
+    _prepare_outputs(entries, dst_dir, segment_size)
+    tasks = plan_tasks(entries, src_dir, dst_dir, batch_bytes, batch_files, segment_size)
+    total = _run_tasks(cipher, key, True, tasks, num_workers, mp_context)
+    return BulkResult(len(entries), total, len(tasks), perf_counter() - begin)
+
+def create_test_tree(root: str, num_small: int = 2000, small_range: Tuple[int, int] = (1024, 64 * 1024),
+                     num_large: int = 2, large_size: int = 32, files_per_dir: int = 100, seed: int = 0) -> int:
+    """Tạo cây thử: num_small file cỡ ngẫu nhiên trong small_range (byte) và num_large file large_size MB
+
+    Returns: tổng số byte
+    """
+    rng = random.Random(seed)
+    sizes = [rng.randint(*small_range) for _ in range(num_small)] + [large_size * 1024 * 1024] * num_large
+    for index, size in enumerate(sizes):
+        directory = os.path.join(root, f'd{index // files_per_dir:04d}')
+        os.makedirs(directory, exist_ok=True)
+        with open(os.path.join(directory, f'f{index:06d}.bin'), 'wb') as f:
+            f.write(os.urandom(size))
+    return sum(sizes)
+
+def _tree_digests(root: str) -> Dict[str, bytes]:
+    return {path: file_digest(os.path.join(root, path)) for path, _ in walk_tree(root) if path != MANIFEST_NAME}
+
+def benchmark_bulk(ciphers: Sequence[str] = tuple(CIPHERS), worker_counts: Optional[Sequence[int]] = None,
+                   num_small: int = 2000, num_large: int = 2, large_size: int = 32, num_runs: int = 3,
+                   work_dir: Optional[str] = None, **kwargs: Any) -> List[Dict[str, Any]]:
+    """Đo files/s và MB/s khi mã hóa một cây hỗn hợp file nhỏ/lớn theo số worker
+
+    Mỗi lần đo dùng key mới và thư mục đích trống; kết quả là lần có thời gian median.
+    kwargs (batch_bytes, batch_files, segment_size) chuyển cho encrypt_tree.
+    Returns:
+        List dict {cipher, workers, files, bytes, tasks, files_per_sec, mb_s}
+    """
+    if worker_counts is None:
+        worker_counts = default_worker_counts()
+    results = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        src_dir = os.path.join(tmp_dir, 'plain')
+        enc_dir = os.path.join(tmp_dir, 'encrypted')
+        dec_dir = os.path.join(tmp_dir, 'decrypted')
+        create_test_tree(src_dir, num_small, num_large=num_large, large_size=large_size)
+        digests = _tree_digests(src_dir)
+
+        for cipher in ciphers:
+            key_size = CIPHERS[cipher][1]
+            # Verify kết quả một lần (không tính vào thời gian đo), gồm cả hai lần chạy cùng file key
+            key_path = os.path.join(tmp_dir, f'{cipher}.key')
+            for dst in (enc_dir, dec_dir):
+                encrypt_tree_with_key_file(cipher, key_path, src_dir, dst, max(worker_counts), **kwargs)
+            first, second = (read_manifest(os.path.join(dst, MANIFEST_NAME))[1] for dst in (enc_dir, dec_dir))
+            assert not {e.nonce for e in first} & {e.nonce for e in second}, \
+                "Lỗi: Hai lần mã hóa cùng key dùng trùng nonce!"
+            shutil.rmtree(dec_dir)
+            decrypt_tree(load_key(key_path), enc_dir, dec_dir, max(worker_counts), **kwargs)
+            assert _tree_digests(dec_dir) == digests, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+            shutil.rmtree(dec_dir)
+
+            for workers in worker_counts:
+                runs = []
+                for _ in range(num_runs):
+                    shutil.rmtree(enc_dir, ignore_errors=True)
+                    runs.append(encrypt_tree(cipher, os.urandom(key_size), src_dir, enc_dir, workers, **kwargs))
+                median = sorted(runs, key=lambda r: r.elapsed)[len(runs) // 2]
+                results.append({'cipher': cipher, 'workers': workers, 'files': median.files,
+                                'bytes': median.bytes, 'tasks': median.tasks,
+                                'files_per_sec': median.files_per_sec, 'mb_s': median.mb_s})
+            shutil.rmtree(enc_dir)
+    return results
+
+def format_bulk(results: List[Dict[str, Any]]) -> str:
+    """Bảng files/s và MB/s theo cipher và số worker"""
+    header = f"{'Cipher':<9} | {'Worker':>6} | {'File':>6} | {'Task':>5} | {'files/s':>9} | {'MB/s':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r['cipher']:<9} | {r['workers']:>6} | {r['files']:>6} | {r['tasks']:>5} | "
+                     f"{r['files_per_sec']:>9.0f} | {r['mb_s']:>8.1f}")
+    return "\n".join(lines)
+
+def plot_bulk(results: List[Dict[str, Any]], output_name: str = 'bulk_encrypt.png'):
+    """Vẽ files/s và MB/s theo số worker cho từng cipher"""
+    # Import tại chỗ: matplotlib chiếm phần lớn thời gian khởi động module
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(15, 6))
+    for index, (field, label) in enumerate([('files_per_sec', 'File/s'), ('mb_s', 'Throughput (MB/s)')], start=1):
+        plt.subplot(1, 2, index)
+        for cipher in dict.fromkeys(r['cipher'] for r in results):
+            rows = [r for r in results if r['cipher'] == cipher]
+            plt.plot([r['workers'] for r in rows], [r[field] for r in rows], '-o', label=cipher)
+        plt.xlabel('Số worker')
+        plt.ylabel(label)
+        plt.title(f'Mã hóa cây thư mục: {label}')
+        plt.legend()
+        plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    save_figure(plt, output_name)
+
+def load_key(path: str, cipher: Optional[str] = None) -> bytes:
+    """Đọc key thô từ file; chưa có file và biết cipher thì sinh key mới và lưu (quyền 0600)
+
+    Key mới đi kèm file trạng thái nonce (path + NONCE_STATE_SUFFIX) bắt đầu từ slot 0.
+    """
+    if os.path.exists(path) or cipher is None:
+        with open(path, 'rb') as f:
+            return f.read()
+    key = os.urandom(CIPHERS[cipher][1])
+    with open(os.open(path + NONCE_STATE_SUFFIX, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+        f.write(bytes(8))
+    with open(os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600), 'wb') as f:
+        f.write(key)
+    return key
+
+def reserve_nonce_slot(key_path: str) -> int:
+    """Giữ chỗ slot prefix nonce kế tiếp của key trong file trạng thái cạnh file key
+
+    Trạng thái được ghi (và fsync) trước khi mã hóa, nên lần chạy bị ngắt giữa chừng cũng không
+    để lần sau dùng lại prefix của nó. ValueError nếu thiếu file trạng thái: không biết key đã dùng
+    những prefix nào, dùng lại key lúc đó có thể lặp nonce.
+    """
+    state_path = key_path + NONCE_STATE_SUFFIX
+    try:
+        fd = os.open(state_path, os.O_RDWR)
+    except FileNotFoundError:
+        raise ValueError(f"Thiếu file trạng thái nonce {state_path} của key: "
+                         f"không thể dùng lại key an toàn, hãy tạo key mới") from None
+    with open(fd, 'r+b', buffering=0) as f:
+        if fcntl is not None:
+            fcntl.flock(f, fcntl.LOCK_EX)  # Nhả khi đóng file
+        data = f.read()
+        if len(data) != 8:
+            raise ValueError(f"File trạng thái nonce không hợp lệ: {state_path}")
+        slot = int.from_bytes(data, 'big')
+        f.seek(0)
+        f.write((slot + 1).to_bytes(8, 'big'))
+        os.fsync(f.fileno())
+    return slot
+
+def encrypt_tree_with_key_file(cipher: str, key_path: str, src_dir: str, dst_dir: str,
+                               num_workers: Optional[int] = None, **kwargs: Any) -> BulkResult:
+    """encrypt_tree với key trong key_path (tự sinh nếu chưa có), dùng lại key an toàn qua nhiều lần chạy
+
+    Mỗi lần gọi giữ chỗ một slot prefix mới (reserve_nonce_slot), nên hai lần chạy cùng key không bao
+    giờ cấp trùng nonce. kwargs chuyển cho encrypt_tree.
+    """
+    _cipher_info(cipher)
+    key = load_key(key_path, cipher)
+    slot = reserve_nonce_slot(key_path)
+    try:
+        nonces = NonceAllocator(cipher, first_slot=slot)
+    except NonceExhausted:
+        raise NonceExhausted(f"Key {key_path} đã dùng hết prefix nonce của {cipher}, hãy tạo key mới") from None
+    with nonces:
+        return encrypt_tree(cipher, key, src_dir, dst_dir, num_workers, nonces, **kwargs)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mã hóa cây thư mục song song trên nhiều process")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name in ('encrypt', 'decrypt', 'bench'):
+        sub = subparsers.add_parser(name)
+        sub.add_argument('--batch-bytes', type=int, default=DEFAULT_BATCH_BYTES)
+        sub.add_argument('--batch-files', type=int, default=DEFAULT_BATCH_FILES)
+        sub.add_argument('--segment-size', type=int, default=DEFAULT_SEGMENT_SIZE)
+    for name in ('encrypt', 'decrypt'):
+        sub = subparsers.choices[name]
+        sub.add_argument('src')
+        sub.add_argument('dst')
+        sub.add_argument('--key-file', required=True,
+                         help="File key thô (khi mã hóa: tự sinh nếu chưa có)")
+        sub.add_argument('--workers', type=int, help="Số process (mặc định theo autotune hoặc số core)")
+    subparsers.choices['encrypt'].add_argument('--cipher', choices=tuple(CIPHERS), default='chacha20')
+    bench = subparsers.choices['bench']
+    bench.add_argument('--cipher', choices=tuple(CIPHERS) + ('all',), default='all')
+    bench.add_argument('--workers', type=parse_list, help="Số worker cần thử (mặc định: 1, 2, 4, ... số core)")
+    bench.add_argument('--small', type=int, default=2000, help="Số file nhỏ (1-64 KB)")
+    bench.add_argument('--large', type=int, default=2, help="Số file lớn")
+    bench.add_argument('--large-size', type=int, default=32, help="Kích thước file lớn (MB)")
+    bench.add_argument('--runs', type=int, default=3)
+    bench.add_argument('--work-dir', help="Thư mục chứa cây thử")
+    bench.add_argument('--plot', action='store_true', help="Lưu biểu đồ vào data/bulk_encrypt.png")
+    args = parser.parse_args(argv)
+
+    options = {'batch_bytes': args.batch_bytes, 'batch_files': args.batch_files,
+               'segment_size': args.segment_size}
+    if args.command == 'bench':
+        ciphers = tuple(CIPHERS) if args.cipher == 'all' else (args.cipher,)
+        results = benchmark_bulk(ciphers, args.workers, args.small, args.large, args.large_size,
+                                 args.runs, args.work_dir, **options)
+        print(format_bulk(results))
+        if args.plot:
+            plot_bulk(results)
+        return 0
+    if args.command == 'encrypt':
+        result = encrypt_tree_with_key_file(args.cipher, args.key_file, args.src, args.dst,
+                                            args.workers, **options)
+    else:
+        result = decrypt_tree(load_key(args.key_file), args.src, args.dst, args.workers, **options)
+    print(f"{result.files} file, {result.bytes / (1024 * 1024):.1f} MB, {result.tasks} task trong "
+          f"{result.elapsed:.2f} s: {result.files_per_sec:.0f} file/s, {result.mb_s:.1f} MB/s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
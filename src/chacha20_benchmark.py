@@ -1,134 +1,279 @@
-from time import time
 import os
-from typing import Tuple, List
-import matplotlib.pyplot as plt
-import numpy as np
+import threading
+from functools import partial
+from typing import Callable, Tuple, List, Optional, Sequence
 from Crypto.Cipher import ChaCha20
-import platform
-import cpuinfo
+from benchmark_core import benchmark_cipher, plot_results as core_plot_results
+from benchmark_core import CipherDescriptor, create_gui as core_create_gui
+from streaming import benchmark_file_streaming, DEFAULT_CHUNK_SIZE
+from streaming import encrypt_file as stream_encrypt_file, decrypt_file as stream_decrypt_file
+from autotune import tuned_chunk_size, tuned_num_workers
+from timing import TimingStats
+from profiling import PhaseProfiler, profile_hot_loop, DEFAULT_PROFILE_SIZES
+from message_rate import benchmark_message_rate, MessageRateResult, DEFAULT_MESSAGE_SIZES
+from context_cache import ContextCache, benchmark_context_cache
+from batch import check_batch, benchmark_batch
+from chacha20_numpy import NumpyChaCha20, encrypt_batch as numpy_encrypt_batch, self_test as numpy_self_test
+from keystream_pool import KeystreamPool, benchmark_keystream_pool
+from range_reader import RangeReader, benchmark_range_reads
+from parallel import parallel_encrypt, parallel_decrypt, benchmark_parallel_scaling
+from nonce_allocator import NonceAllocator, DEFAULT_RESERVE_BLOCK
 
-def get_system_info() -> dict:
-    """Lấy thông tin hệ thống"""
-    cpu_info = cpuinfo.get_cpu_info()
-    return {
-        'cpu_brand': cpu_info['brand_raw'],
-        'python_version': platform.python_version(),
-        'os': f"{platform.system()} {platform.release()}",
-        'architecture': platform.machine(),
-        'pycryptodome_version': '3.19.0'  # Hoặc lấy động từ pkg_resources
-    }
+# Backend ChaCha20: mã C của pycryptodome hoặc bản NumPy tính nhiều block cùng lúc
+BACKENDS = ('pycryptodome', 'numpy')
+BATCH_NUMPY_MAX_SIZE = 1024  # byte, ngưỡng chọn backend numpy cho encrypt_batch
 
-def benchmark_chacha20(file_sizes: List[int], num_runs: int = 10) -> Tuple[List[float], List[float], List[float], List[float]]:
-    """Đo hiệu năng ChaCha20 với các kích thước file khác nhau
-    Returns:
-        encrypt_times: Thời gian mã hóa trung bình
-        encrypt_stds: Độ lệch chuẩn thời gian mã hóa
-        decrypt_times: Thời gian giải mã trung bình
-        decrypt_stds: Độ lệch chuẩn thời gian giải mã
+def create_cipher(key: bytes, nonce: bytes, initial_block: int = 0, backend: str = 'pycryptodome'):
+    """Tạo cipher ChaCha20 (IETF) và seek tới block initial_block (mỗi block 64 byte)"""
+    if backend == 'pycryptodome':
+        cipher = ChaCha20.new(key=key, nonce=nonce)
+    elif backend == 'numpy':
+        cipher = NumpyChaCha20(key, nonce)
+    else:
+        raise ValueError(f"Backend không hợp lệ: {backend} (hỗ trợ: {', '.join(BACKENDS)})")
+    if initial_block:
+        cipher.seek(initial_block * 64)
+    return cipher
+
+class ChaCha20Context:
+    """Context ChaCha20 đã khởi tạo cho một cặp (key, nonce), định vị bằng seek
+    
+    Mỗi lần mã hóa seek tới initial_block nên không phải gọi lại ChaCha20.new.
     """
-    key = os.urandom(32)  # ChaCha20 sử dụng khóa 256-bit
-    encrypt_times = []
-    encrypt_stds = []
-    decrypt_times = []
-    decrypt_stds = []
+    entry_size = 512  # Ước lượng bộ nhớ mỗi context (byte), dùng cho giới hạn max_bytes
     
-    for size in file_sizes:
-        data = os.urandom(size * 1024 * 1024)  # Tạo dữ liệu ngẫu nhiên
-        encrypt_runs = []
-        decrypt_runs = []
-        
-        for _ in range(num_runs):
-            # Mỗi lần chạy dùng nonce mới
-            nonce = os.urandom(12)  # ChaCha20 IETF dùng nonce 96-bit
-            
-            # Đo thời gian mã hóa
-            cipher = ChaCha20.new(key=key, nonce=nonce)
-            start_time = time()
-            encrypted = cipher.encrypt(data)
-            encrypt_runs.append(time() - start_time)
-            
-            # Đo thời gian giải mã
-            cipher = ChaCha20.new(key=key, nonce=nonce)
-            start_time = time()
-            decrypted = cipher.decrypt(encrypted)
-            decrypt_runs.append(time() - start_time)
-            
-            # Verify kết quả
-            assert data == decrypted, "Lỗi: Giải mã không khớp dữ liệu gốc!"
-        
-        # Tính trung bình và độ lệch chuẩn
-        encrypt_times.append(np.mean(encrypt_runs))
-        encrypt_stds.append(np.std(encrypt_runs))
-        decrypt_times.append(np.mean(decrypt_runs))
-        decrypt_stds.append(np.std(decrypt_runs))
-        
-        # Giải phóng bộ nhớ
-        del data, encrypted, decrypted
+    def __init__(self, key: bytes, nonce: bytes):
+        self._cipher = ChaCha20.new(key=key, nonce=nonce)
+        self._nonce = nonce
+        self._lock = threading.Lock()
     
-    return encrypt_times, encrypt_stds, decrypt_times, decrypt_stds
+    def encrypt(self, data: bytes, nonce: bytes, initial_block: int = 0,
+                output: Optional[bytearray] = None) -> bytes:
+        if nonce != self._nonce:
+            raise ValueError("Nonce không khớp với context")
+        with self._lock:
+            self._cipher.seek(initial_block * 64)
+            result = self._cipher.encrypt(data, output=output)
+        return output if output is not None else result
+    
+    decrypt = encrypt  # Keystream XOR: giải mã giống hệt mã hóa
 
-def plot_results(file_sizes: List[int], 
-                encrypt_times: List[float], encrypt_stds: List[float],
-                decrypt_times: List[float], decrypt_stds: List[float]):
-    """Vẽ biểu đồ kết quả với error bars"""
-    system_info = get_system_info()
+def new_context(key: bytes, nonce: bytes) -> ChaCha20Context:
+    """Tạo context ChaCha20 cho cặp (key, nonce)"""
+    return ChaCha20Context(key, nonce)
+
+def create_context_cache(max_entries: int = 1024, max_bytes: Optional[int] = None) -> ContextCache:
+    """Tạo cache LRU trạng thái ChaCha20 theo cặp (key, nonce)"""
+    return ContextCache(new_context, max_entries, max_bytes, ChaCha20Context.entry_size, per_nonce=True)
+
+def encrypt_batch(key: bytes, nonces: Sequence[bytes], messages: Sequence[bytes],
+                  backend: Optional[str] = None) -> List[bytes]:
+    """Mã hóa ChaCha20 nhiều thông điệp độc lập (mỗi thông điệp một nonce) trong một lần gọi
     
-    plt.rcParams['figure.facecolor'] = 'white'
-    plt.rcParams['axes.facecolor'] = 'white'
-    plt.rcParams['axes.grid'] = True
-    plt.rcParams['grid.alpha'] = 0.3
-    plt.rcParams['lines.linewidth'] = 2
+    Backend 'numpy' tính keystream của mọi thông điệp trong một lần chạy vector hóa;
+    backend 'pycryptodome' khởi tạo cipher cho từng thông điệp. Mặc định chọn 'numpy'
+    khi thông điệp trung bình không quá BATCH_NUMPY_MAX_SIZE byte (nhanh hơn trong đo đạc).
+    Kết quả giống hệt encrypt(key, nonce, message).
+    """
+    check_batch(nonces, messages, 12)
+    if backend is None:
+        total = sum(len(message) for message in messages)
+        backend = 'numpy' if total <= BATCH_NUMPY_MAX_SIZE * len(messages) else 'pycryptodome'
+    if backend == 'numpy':
+        return numpy_encrypt_batch(key, nonces, messages)
+    new = ChaCha20.new
+    return [new(key=key, nonce=nonce).encrypt(message) for nonce, message in zip(nonces, messages)]
+
+def decrypt_batch(key: bytes, nonces: Sequence[bytes], messages: Sequence[bytes],
+                  backend: Optional[str] = None) -> List[bytes]:
+    """Giải mã ChaCha20 nhiều thông điệp trong một lần gọi, xem encrypt_batch"""
+    return encrypt_batch(key, nonces, messages, backend)
+
+def create_nonce_allocator(max_messages: Optional[int] = None,
+                           reserve_block: int = DEFAULT_RESERVE_BLOCK) -> NonceAllocator:
+    """Bộ cấp nonce ChaCha20 theo counter cho một khóa, thay cho os.urandom(12) mỗi thông điệp
     
-    plt.figure(figsize=(15, 6))
+    Nonce 12 byte = counter 64-bit sau prefix 32-bit của process; thông điệp tối đa 2^32 block.
+    Dùng chung được giữa các thread và process (xem NonceAllocator).
+    """
+    return NonceAllocator('chacha20', max_messages, reserve_block)
+
+def create_keystream_pool(key: bytes, nonce: bytes, capacity: int = 4 * 1024 * 1024,
+                          chunk_size: int = 64 * 1024) -> KeystreamPool:
+    """Tạo pool sinh trước keystream ChaCha20 cho (key, nonce) bằng luồng nền
     
-    # Biểu đồ thời gian
-    plt.subplot(1, 2, 1)
-    plt.errorbar(file_sizes, encrypt_times, yerr=encrypt_stds, fmt='b-o', 
-                label='Encryption', capsize=5, capthick=1, elinewidth=1)
-    plt.errorbar(file_sizes, decrypt_times, yerr=decrypt_stds, fmt='r-o',
-                label='Decryption', capsize=5, capthick=1, elinewidth=1)
-    plt.xlabel('Kích thước file (MB)')
-    plt.ylabel('Thời gian xử lý (giây)')
-    plt.title('Thời gian mã hóa/giải mã theo kích thước file')
-    plt.legend()
-    plt.grid(True)
+    pool.encrypt(data) trả về (bản mã, vị trí byte); giải mã bằng
+    cipher_at(partial(create_cipher, key, nonce), 64, vị trí, decrypt=True).decrypt(bản mã).
+    """
+    return KeystreamPool(partial(create_cipher, key, nonce), capacity, chunk_size)
+
+def open_range_reader(path: str, key: bytes, nonce: bytes) -> RangeReader:
+    """Mở file bản mã ChaCha20 để giải mã ngẫu nhiên từng khoảng byte (seek tới block offset // 64)"""
+    return RangeReader(path, partial(create_cipher, key, nonce), 64)
+
+def encrypt_parallel(key: bytes, nonce: bytes, data: bytes, num_workers: Optional[int] = None,
+                     output: Optional[bytearray] = None, use_processes: bool = False) -> bytearray:
+    """Mã hóa ChaCha20 song song trên nhiều core, kết quả giống hệt mã hóa tuần tự
     
-    # Biểu đồ throughput
-    plt.subplot(1, 2, 2)
-    encrypt_throughput = [(size * 1024 * 1024) / (time * 1024 * 1024) for size, time in zip(file_sizes, encrypt_times)]
-    decrypt_throughput = [(size * 1024 * 1024) / (time * 1024 * 1024) for size, time in zip(file_sizes, decrypt_times)]
-    encrypt_throughput_std = [throughput * (std/time) for throughput, std, time in zip(encrypt_throughput, encrypt_stds, encrypt_times)]
-    decrypt_throughput_std = [throughput * (std/time) for throughput, std, time in zip(decrypt_throughput, decrypt_stds, decrypt_times)]
+    num_workers mặc định lấy từ profile của autotune.py, nếu chưa dò thì bằng số core.
+    """
+    if num_workers is None:
+        num_workers = tuned_num_workers('chacha20')
+    return parallel_encrypt(partial(create_cipher, key, nonce), data, 64,
+                            num_workers, output, use_processes)
+
+def decrypt_parallel(key: bytes, nonce: bytes, data: bytes, num_workers: Optional[int] = None,
+                     output: Optional[bytearray] = None, use_processes: bool = False) -> bytearray:
+    """Giải mã ChaCha20 song song trên nhiều core, num_workers như encrypt_parallel"""
+    if num_workers is None:
+        num_workers = tuned_num_workers('chacha20')
+    return parallel_decrypt(partial(create_cipher, key, nonce), data, 64,
+                            num_workers, output, use_processes)
+
+def encrypt_file(key: bytes, nonce: bytes, src_path: str, dst_path: str,
+                 chunk_size: Optional[int] = None, use_mmap: bool = False) -> int:
+    """Mã hóa file ChaCha20 theo luồng, trả về số byte đã xử lý
+    
+    chunk_size mặc định lấy từ profile của autotune.py, nếu chưa dò thì là DEFAULT_CHUNK_SIZE.
+    """
+    if chunk_size is None:
+        chunk_size = tuned_chunk_size('chacha20', DEFAULT_CHUNK_SIZE)
+    return stream_encrypt_file(create_cipher(key, nonce), src_path, dst_path, chunk_size, use_mmap)
+
+def decrypt_file(key: bytes, nonce: bytes, src_path: str, dst_path: str,
+                 chunk_size: Optional[int] = None, use_mmap: bool = False) -> int:
+    """Giải mã file ChaCha20 theo luồng, chunk_size như encrypt_file"""
+    if chunk_size is None:
+        chunk_size = tuned_chunk_size('chacha20', DEFAULT_CHUNK_SIZE)
+    return stream_decrypt_file(create_cipher(key, nonce), src_path, dst_path, chunk_size, use_mmap)
+
+def encrypt(key: bytes, nonce: bytes, data: bytes, output: Optional[bytearray] = None) -> bytes:
+    """Mã hóa ChaCha20 một thông điệp
     
-    plt.errorbar(file_sizes, encrypt_throughput, yerr=encrypt_throughput_std,
-                fmt='b-o', label='Encryption', capsize=5, capthick=1, elinewidth=1)
-    plt.errorbar(file_sizes, decrypt_throughput, yerr=decrypt_throughput_std,
-                fmt='r-o', label='Decryption', capsize=5, capthick=1, elinewidth=1)
-    plt.xlabel('Kích thước file (MB)')
-    plt.ylabel('Throughput (MB/s)')
-    plt.title('Throughput theo kích thước file')
-    plt.legend()
-    plt.grid(True)
+    Nếu có output (bytearray/memoryview cùng kích thước) thì ghi bản mã thẳng vào đó
+    thay vì cấp phát buffer mới; output có thể chính là data để mã hóa tại chỗ.
+    """
+    result = create_cipher(key, nonce).encrypt(data, output=output)
+    return output if output is not None else result
+
+def decrypt(key: bytes, nonce: bytes, data: bytes, output: Optional[bytearray] = None) -> bytes:
+    """Giải mã ChaCha20 một thông điệp, output giống như encrypt"""
+    result = create_cipher(key, nonce).decrypt(data, output=output)
+    return output if output is not None else result
+
+def benchmark_chacha20(file_sizes: List[int], num_runs: int = 10,
+                       output_mode: str = 'alloc', warmup: int = 2,
+                       min_sample_time: float = 0.05,
+                       backend: str = 'pycryptodome',
+                       memory: Optional[List[dict]] = None,
+                       progress: Optional[Callable[[dict], None]] = None) -> Tuple[List[TimingStats], List[TimingStats]]:
+    """Đo hiệu năng ChaCha20 với các kích thước file khác nhau
+    num_runs: Số mẫu thời gian cho mỗi kích thước (mỗi mẫu gồm nhiều lần gọi,
+        số lần gọi được hiệu chỉnh để mẫu kéo dài ít nhất min_sample_time giây)
+    output_mode: 'alloc' (cấp phát buffer mới mỗi lần), 'preallocated' (ghi vào
+        buffer cấp phát sẵn) hoặc 'inplace' (mã hóa tại chỗ)
+    backend: 'pycryptodome' (mã C) hoặc 'numpy' (ChaCha20 vector hóa bằng NumPy)
+    memory: Nếu truyền list, mỗi kích thước được thêm một dict phase -> MemoryStats
+        (data, setup, encrypt, decrypt, verify), đo trong lần verify ngoài vùng đo thời gian
+    progress: Hàm nhận sự kiện dict: {'type': 'sample', 'size', 'operation', 'seconds'} sau mỗi mẫu
+        và {'type': 'result', 'size', 'encrypt', 'decrypt'} khi xong một kích thước;
+        raise ngoại lệ trong progress để dừng benchmark
+    Returns:
+        encrypt_stats: Thống kê thời gian mã hóa (median, percentile, khoảng tin cậy)
+        decrypt_stats: Thống kê thời gian giải mã
+    """
+    if backend == 'numpy':
+        numpy_self_test()  # Kiểm tra với vector RFC 8439 và ChaCha20.new trước khi đo
+    # ChaCha20 sử dụng khóa 256-bit, nonce 96-bit (IETF)
+    return benchmark_cipher(partial(create_cipher, backend=backend), 32, 12, file_sizes, num_runs,
+                            output_mode, warmup, min_sample_time, memory, progress)
+
+def benchmark_chacha20_backends(file_sizes: List[int], num_runs: int = 10,
+                                backends: Sequence[str] = BACKENDS) -> dict:
+    """Chạy benchmark_chacha20 với từng backend để so sánh mã C và bản NumPy"""
+    return {backend: benchmark_chacha20(file_sizes, num_runs, backend=backend) for backend in backends}
+
+def profile_chacha20(sizes: Optional[List[int]] = None, iterations: int = 1000,
+                     use_cprofile: bool = False, trace_file: Optional[str] = None,
+                     backend: str = 'pycryptodome') -> PhaseProfiler:
+    """Đo từng bước của vòng benchmark ChaCha20: os.urandom, ChaCha20.new, encrypt, decrypt, verify
     
-    # Thêm thông tin cấu hình
-    info_text = f'CPU: {system_info["cpu_brand"]}\n'
-    info_text += f'OS: {system_info["os"]}\n'
-    info_text += f'Python {system_info["python_version"]}, PyCryptodome {system_info["pycryptodome_version"]}'
-    plt.figtext(0.02, 0.02, info_text, fontsize=8)
+    sizes tính bằng byte (mặc định DEFAULT_PROFILE_SIZES). trace_file: ghi thêm Chrome trace-event JSON.
+    """
+    key = os.urandom(32)
+    profiler = profile_hot_loop(lambda: os.urandom(12), None,
+                                lambda nonce: create_cipher(key, nonce, backend=backend),
+                                sizes or DEFAULT_PROFILE_SIZES, iterations, PhaseProfiler(use_cprofile))
+    if trace_file:
+        profiler.write_chrome_trace(trace_file)
+    return profiler
+
+def benchmark_chacha20_stream(file_sizes: List[int], num_runs: int = 3,
+                              chunk_size: Optional[int] = None,
+                              work_dir: Optional[str] = None,
+                              use_mmap: bool = False) -> Tuple[List[TimingStats], List[TimingStats]]:
+    """Đo hiệu năng ChaCha20 khi mã hóa/giải mã file thật trên đĩa theo luồng
     
-    plt.tight_layout()
+    Bộ nhớ sử dụng cố định theo chunk_size (mặc định như encrypt_file), nên có thể đo với file lớn hơn RAM.
+    """
+    if chunk_size is None:
+        chunk_size = tuned_chunk_size('chacha20', DEFAULT_CHUNK_SIZE)
+    key = os.urandom(32)
+    return benchmark_file_streaming(lambda nonce: create_cipher(key, nonce), 12,
+                                    file_sizes, num_runs, chunk_size, work_dir, use_mmap)
+
+def benchmark_chacha20_parallel(size: int, worker_counts: List[int], num_runs: int = 5,
+                               use_processes: bool = False) -> List[float]:
+    """Đo throughput ChaCha20 (MB/s) trên buffer size MB theo số worker"""
+    key = os.urandom(32)
+    return benchmark_parallel_scaling(lambda nonce: partial(create_cipher, key, nonce), 12, 64,
+                                      size, worker_counts, num_runs, use_processes)
+
+def benchmark_chacha20_messages(message_sizes: List[int] = DEFAULT_MESSAGE_SIZES,
+                                num_messages: int = 10000) -> List[MessageRateResult]:
+    """Đo ops/sec và độ trễ p50/p99 của ChaCha20 với thông điệp nhỏ
     
-    # Lưu biểu đồ
-    try:
-        data_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data")
-        os.makedirs(data_dir, exist_ok=True)
-        output_file = os.path.join(data_dir, 'chacha20_performance.png')
-        plt.savefig(output_file, dpi=300, bbox_inches='tight')
-        print(f"Đã lưu biểu đồ tại: {output_file}")
-    except Exception as e:
-        print(f"Lỗi khi lưu biểu đồ: {str(e)}")
-    finally:
-        plt.close()
+    Tách thời gian khởi tạo (ChaCha20.new) và thời gian encrypt, so sánh
+    tạo cipher mới cho mỗi thông điệp với dùng lại một cipher.
+    """
+    key = os.urandom(32)
+    return benchmark_message_rate(lambda nonce: create_cipher(key, nonce), 12,
+                                  message_sizes, num_messages)
+
+def benchmark_chacha20_context_cache(num_keys: int = 10000, cache_size: int = 1024,
+                                     num_messages: int = 50000, message_size: int = 256,
+                                     zipf_s: float = 1.1) -> dict:
+    """So sánh throughput ChaCha20 có/không cache context khi (key, nonce) được truy cập theo Zipf"""
+    return benchmark_context_cache(create_cipher, new_context, 32, 12, True, ChaCha20Context.entry_size,
+                                   num_keys, cache_size, num_messages, message_size, zipf_s)
+
+def benchmark_chacha20_batch(message_sizes: List[int] = DEFAULT_MESSAGE_SIZES,
+                             batch_size: int = 1000, num_runs: int = 5) -> List[dict]:
+    """So sánh throughput ChaCha20 giữa encrypt từng thông điệp và encrypt_batch"""
+    return benchmark_batch(encrypt_batch, encrypt, 32, 12, message_sizes, batch_size, num_runs)
+
+def benchmark_chacha20_keystream_pool(message_size: int = 256, burst_size: int = 200,
+                                      num_bursts: int = 50, idle_time: float = 0.005) -> dict:
+    """Đo độ trễ ChaCha20 với lưu lượng thông điệp nhỏ theo đợt, có và không có keystream pool"""
+    key = os.urandom(32)
+    return benchmark_keystream_pool(lambda nonce: partial(create_cipher, key, nonce), 12, 64,
+                                    message_size, burst_size, num_bursts, idle_time)
+
+def benchmark_chacha20_range_reads(file_size: int = 256, offsets: Optional[List[int]] = None,
+                                   lengths: Optional[List[int]] = None, num_runs: int = 10,
+                                   work_dir: Optional[str] = None) -> List[dict]:
+    """Đo độ trễ đọc khoảng byte từ file bản mã ChaCha20 theo offset và độ dài"""
+    key = os.urandom(32)
+    return benchmark_range_reads(lambda nonce: partial(create_cipher, key, nonce), 12, 64,
+                                 file_size, offsets, lengths, num_runs, work_dir)
+
+def plot_results(file_sizes: List[int], 
+                encrypt_stats: List[TimingStats], decrypt_stats: List[TimingStats],
+                output_name: str = 'chacha20_performance.png',
+                x_values: Optional[list] = None, x_label: str = 'Kích thước file (MB)',
+                memory: Optional[List[dict]] = None):
+    """Vẽ biểu đồ kết quả ChaCha20 (xem benchmark_core.plot_results)"""
+    core_plot_results(file_sizes, encrypt_stats, decrypt_stats, output_name, x_values, x_label, memory)
 
 def get_algorithm_info() -> str:
     """Trả về thông tin về thuật toán ChaCha20"""
@@ -160,140 +305,9 @@ def get_algorithm_info() -> str:
   - Mã hóa dữ liệu lưu trữ"""
 
 def create_gui():
-    """Tạo giao diện đồ họa cho demo và benchmark"""
-    import tkinter as tk
-    from tkinter import ttk, scrolledtext, messagebox
-    
-    def demo_encryption() -> Tuple[bytes, bytes, bytes]:
-        """Demo mã hóa/giải mã với văn bản"""
-        text = demo_text.get('1.0', tk.END).strip()
-        if not text:
-            raise ValueError("Vui lòng nhập text để mã hóa")
-        
-        key = os.urandom(32)
-        nonce = os.urandom(12)
-        plaintext = text.encode('utf-8')
-        
-        cipher = ChaCha20.new(key=key, nonce=nonce)
-        encrypted = cipher.encrypt(plaintext)
-        
-        cipher = ChaCha20.new(key=key, nonce=nonce)
-        decrypted = cipher.decrypt(encrypted)
-        
-        return encrypted, key, nonce, decrypted
-    
-    def run_demo():
-        try:
-            encrypted, key, nonce, decrypted = demo_encryption()
-            
-            demo_output.delete('1.0', tk.END)
-            demo_output.insert(tk.END, "=== Demo ChaCha20 ===\n\n")
-            demo_output.insert(tk.END, f"Plaintext: {demo_text.get('1.0', tk.END).strip()}\n\n")
-            demo_output.insert(tk.END, f"Encrypted (hex): {encrypted.hex()}\n\n")
-            demo_output.insert(tk.END, f"Key (hex): {key.hex()}\n")
-            demo_output.insert(tk.END, f"Nonce (hex): {nonce.hex()}\n")
-            demo_output.insert(tk.END, f"\nDecrypted: {decrypted.decode('utf-8')}\n")
-            
-        except Exception as e:
-            messagebox.showerror("Lỗi", str(e))
-    
-    def run_benchmark():
-        try:
-            sizes = [int(size.strip()) for size in file_sizes_entry.get().split(',')]
-            if not sizes:
-                raise ValueError("Vui lòng nhập ít nhất một kích thước file")
-            if any(size <= 0 for size in sizes):
-                raise ValueError("Kích thước file phải lớn hơn 0")
-            
-            output_text.delete('1.0', tk.END)
-            output_text.insert(tk.END, "Bắt đầu benchmark ChaCha20...\n\n")
-            progress_var.set(0)
-            root.update()
-            
-            # Chạy benchmark
-            encrypt_times, encrypt_stds, decrypt_times, decrypt_stds = benchmark_chacha20(sizes)
-            
-            # Hiển thị kết quả
-            output_text.insert(tk.END, "Kết quả benchmark:\n\n")
-            output_text.insert(tk.END, f"{'Size (MB)':>10} | {'Encrypt (MB/s)':>15} | {'Decrypt (MB/s)':>15}\n")
-            output_text.insert(tk.END, "-" * 50 + "\n")
-            
-            for i, size in enumerate(sizes):
-                encrypt_throughput = (size * 1024 * 1024) / (encrypt_times[i] * 1024 * 1024)
-                decrypt_throughput = (size * 1024 * 1024) / (decrypt_times[i] * 1024 * 1024)
-                output_text.insert(tk.END, 
-                    f"{size:>10} | {encrypt_throughput:>6.2f} ± {encrypt_throughput*(encrypt_stds[i]/encrypt_times[i]):>5.2f} | "
-                    f"{decrypt_throughput:>6.2f} ± {decrypt_throughput*(decrypt_stds[i]/decrypt_times[i]):>5.2f}\n")
-                progress_var.set((i + 1) / len(sizes) * 100)
-                root.update()
-            
-            # Vẽ và lưu biểu đồ
-            plot_results(sizes, encrypt_times, encrypt_stds, decrypt_times, decrypt_stds)
-            output_text.insert(tk.END, "\nĐã lưu biểu đồ kết quả vào data/chacha20_performance.png\n")
-            progress_var.set(100)
-            
-        except Exception as e:
-            output_text.insert(tk.END, f"\nLỗi: {str(e)}\n")
-            messagebox.showerror("Lỗi", str(e))
-    
-    # Tạo cửa sổ chính
-    root = tk.Tk()
-    root.title("ChaCha20 Demo & Benchmark")
-    root.geometry("800x600")
-    
-    # Tạo notebook tabs
-    notebook = ttk.Notebook(root)
-    notebook.pack(fill=tk.BOTH, expand=True, padx=10, pady=5)
-    
-    # Tab Info
-    info_frame = ttk.Frame(notebook, padding="10")
-    notebook.add(info_frame, text="Thông tin ChaCha20")
-    
-    info_text = scrolledtext.ScrolledText(info_frame, height=20, font=('Consolas', 10))
-    info_text.pack(fill=tk.BOTH, expand=True)
-    info_text.insert('1.0', get_algorithm_info())
-    info_text.configure(state='disabled')
-    
-    # Tab Demo
-    demo_frame = ttk.Frame(notebook, padding="10")
-    notebook.add(demo_frame, text="Demo Mã hóa/Giải mã")
-    
-    input_frame = ttk.LabelFrame(demo_frame, text="Nhập text để mã hóa", padding="10")
-    input_frame.pack(fill=tk.X, pady=5)
-    
-    demo_text = scrolledtext.ScrolledText(input_frame, height=5)
-    demo_text.pack(fill=tk.X)
-    demo_text.insert('1.0', "Nhập văn bản để mã hóa tại đây...")
-    
-    output_frame = ttk.LabelFrame(demo_frame, text="Kết quả", padding="10")
-    output_frame.pack(fill=tk.BOTH, expand=True, pady=5)
-    
-    demo_output = scrolledtext.ScrolledText(output_frame, height=10)
-    demo_output.pack(fill=tk.BOTH, expand=True)
-    
-    ttk.Button(demo_frame, text="Chạy Demo", command=run_demo).pack(pady=5)
-    
-    # Tab Benchmark
-    benchmark_frame = ttk.Frame(notebook, padding="10")
-    notebook.add(benchmark_frame, text="Benchmark")
-    
-    control_frame = ttk.LabelFrame(benchmark_frame, text="Cấu hình Benchmark", padding="10")
-    control_frame.pack(fill=tk.X)
-    
-    ttk.Label(control_frame, text="Kích thước file (MB, phân cách bằng dấu phẩy):").pack(side=tk.LEFT)
-    file_sizes_entry = ttk.Entry(control_frame, width=30)
-    file_sizes_entry.insert(0, "1, 10, 50, 100")
-    file_sizes_entry.pack(side=tk.LEFT, padx=5)
-    
-    ttk.Button(control_frame, text="Chạy Benchmark", command=run_benchmark).pack(side=tk.LEFT, padx=5)
-    
-    progress_var = tk.DoubleVar()
-    ttk.Progressbar(benchmark_frame, length=780, variable=progress_var, mode='determinate').pack(pady=10)
-    
-    output_text = scrolledtext.ScrolledText(benchmark_frame, height=15, font=('Consolas', 10))
-    output_text.pack(pady=10, fill=tk.BOTH, expand=True)
-    
-    root.mainloop()
+    """Tạo giao diện đồ họa cho demo và benchmark ChaCha20 (giao diện chung trong benchmark_core)"""
+    core_create_gui(CipherDescriptor('ChaCha20', 32, encrypt, decrypt, create_nonce_allocator, benchmark_chacha20,
+                                     'chacha20_performance.png', get_algorithm_info()))
 
 if __name__ == "__main__":
     create_gui()
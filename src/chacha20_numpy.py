@@ -0,0 +1,172 @@
+import os
+from typing import List, Optional, Sequence
+import numpy as np
+from batch import block_layout, block_counters, pack_messages, unpack_messages
+
+# Hằng số "expand 32-byte k" (RFC 8439, mục 2.3)
+CONSTANTS = np.array([0x61707865, 0x3320646e, 0x79622d32, 0x6b206574], dtype=np.uint32)
+BLOCK_SIZE = 64
+CHUNK_BLOCKS = 16384  # Số block tính cùng lúc (1 MB keystream), giữ mảng trung gian vừa cache
+
+def _rotl(v: np.ndarray, n: int, tmp: np.ndarray):
+    """Xoay trái 32-bit tại chỗ"""
+    np.right_shift(v, 32 - n, out=tmp)
+    v <<= n
+    v |= tmp
+
+def _quarter_round(a: np.ndarray, b: np.ndarray, c: np.ndarray, d: np.ndarray, tmp: np.ndarray):
+    """Quarter-round trên 4 cột cùng lúc, mỗi hàng có dạng (4, số block)"""
+    a += b; d ^= a; _rotl(d, 16, tmp)
+    c += d; b ^= c; _rotl(b, 12, tmp)
+    a += b; d ^= a; _rotl(d, 8, tmp)
+    c += d; b ^= c; _rotl(b, 7, tmp)
+
+def chacha20_blocks(key: bytes, nonces: np.ndarray, counters: np.ndarray) -> np.ndarray:
+    """Tính nhiều block ChaCha20 song song bằng NumPy
+
+    nonces: mảng uint32 dạng (3,) dùng chung hoặc (N, 3) cho từng block
+    counters: mảng uint32 dạng (N,), counter của từng block
+    Returns:
+        Keystream N * 64 byte (uint8), block i ứng với (nonces[i], counters[i])
+    """
+    if len(key) != 32:
+        raise ValueError("Khóa ChaCha20 phải dài 32 byte")
+    num_blocks = len(counters)
+    key_words = np.frombuffer(key, dtype='<u4').astype(np.uint32)
+    nonces = np.asarray(nonces, dtype=np.uint32)
+
+    # Trạng thái ban đầu dạng (16, N): hằng số, khóa, counter, nonce
+    initial = np.empty((16, num_blocks), dtype=np.uint32)
+    initial[0:4] = CONSTANTS[:, None]
+    initial[4:12] = key_words[:, None]
+    initial[12] = counters
+    initial[13:16] = nonces.T if nonces.ndim == 2 else nonces[:, None]
+
+    a, b, c, d = (initial[i:i + 4].copy() for i in range(0, 16, 4))
+    tmp = np.empty((4, num_blocks), dtype=np.uint32)
+    for _ in range(10):
+        # Vòng cột
+        _quarter_round(a, b, c, d, tmp)
+        # Vòng chéo: xoay hàng b, c, d để các đường chéo thành cột
+        b, c, d = np.roll(b, -1, axis=0), np.roll(c, -2, axis=0), np.roll(d, -3, axis=0)
+        _quarter_round(a, b, c, d, tmp)
+        b, c, d = np.roll(b, 1, axis=0), np.roll(c, 2, axis=0), np.roll(d, 3, axis=0)
+
+    state = np.concatenate((a, b, c, d))
+    state += initial
+    # Tuần tự hóa little-endian theo từng block
+    return np.ascontiguousarray(state.T).astype('<u4', copy=False).view(np.uint8).reshape(-1)
+
+def nonce_words(nonce: bytes) -> np.ndarray:
+    """Chuyển nonce 12 byte thành 3 từ uint32 little-endian"""
+    if len(nonce) != 12:
+        raise ValueError("Nonce ChaCha20 (IETF) phải dài 12 byte")
+    return np.frombuffer(nonce, dtype='<u4').astype(np.uint32)
+
+class NumpyChaCha20:
+    """ChaCha20 (RFC 8439) thuần Python/NumPy, cùng giao diện với Crypto.Cipher.ChaCha20
+
+    Hỗ trợ encrypt/decrypt (kể cả output=...), seek theo byte. Keystream được
+    tính theo lô CHUNK_BLOCKS block để giới hạn bộ nhớ trung gian.
+    """
+
+    block_size = 1
+
+    def __init__(self, key: bytes, nonce: bytes):
+        self._key = bytes(key)
+        self._nonce = nonce_words(nonce)
+        self.nonce = bytes(nonce)
+        self._position = 0
+
+    def seek(self, position: int):
+        """Định vị keystream tại byte position"""
+        if position < 0 or position // BLOCK_SIZE >= 1 << 32:
+            raise OverflowError("Vị trí vượt quá giới hạn counter 32-bit")
+        self._position = position
+
+    def _keystream(self, first_block: int, num_blocks: int) -> np.ndarray:
+        if first_block + num_blocks > 1 << 32:
+            raise OverflowError("Vượt quá giới hạn 2^32 block cho mỗi cặp key/nonce")
+        counters = np.arange(first_block, first_block + num_blocks, dtype=np.uint64).astype(np.uint32)
+        return chacha20_blocks(self._key, self._nonce, counters)
+
+    def encrypt(self, data: bytes, output: Optional[bytearray] = None) -> Optional[bytes]:
+        src = np.frombuffer(data, dtype=np.uint8)
+        length = len(src)
+        if output is None:
+            result = np.empty(length, dtype=np.uint8)
+        else:
+            if len(output) != length:
+                raise ValueError("Buffer output phải có cùng kích thước với dữ liệu vào")
+            result = np.frombuffer(output, dtype=np.uint8)
+
+        done = 0
+        while done < length:
+            first_block, offset = divmod(self._position, BLOCK_SIZE)
+            n = min(length - done, CHUNK_BLOCKS * BLOCK_SIZE - offset)
+            keystream = self._keystream(first_block, -(-(offset + n) // BLOCK_SIZE))
+            np.bitwise_xor(src[done:done + n], keystream[offset:offset + n], out=result[done:done + n])
+            done += n
+            self._position += n
+
+        return result.tobytes() if output is None else None
+
+    decrypt = encrypt
+
+def encrypt_batch(key: bytes, nonces: Sequence[bytes], messages: Sequence[bytes]) -> List[bytes]:
+    """Mã hóa nhiều thông điệp (mỗi thông điệp một nonce, counter bắt đầu từ 0)
+
+    Keystream của mọi thông điệp được tính trong cùng một lần chạy chacha20_blocks.
+    """
+    if not messages:
+        return []
+    lengths, blocks, first_blocks = block_layout(messages, BLOCK_SIZE)
+    words = np.frombuffer(b''.join(nonces), dtype='<u4').astype(np.uint32).reshape(-1, 3)
+    keystream = chacha20_blocks(key, np.repeat(words, blocks, axis=0),
+                                block_counters(blocks, first_blocks).astype(np.uint32))
+    packed = np.frombuffer(pack_messages(messages, blocks, BLOCK_SIZE), dtype=np.uint8)
+    return unpack_messages(np.bitwise_xor(packed, keystream).tobytes(), lengths, first_blocks, BLOCK_SIZE)
+
+# Vector kiểm thử RFC 8439
+RFC8439_KEY = bytes(range(32))
+# Mục 2.3.2: hàm block với counter = 1
+RFC8439_BLOCK_NONCE = bytes.fromhex('000000090000004a00000000')
+RFC8439_BLOCK = bytes.fromhex(
+    '10f1e7e4d13b5915500fdd1fa32071c4c7d1f4c733c068030422aa9ac3d46c4e'
+    'd2826446079faa0914c2d705d98b02a2b5129cd1de164eb9cbd083e8a2503c4e')
+# Mục 2.4.2: mã hóa với counter = 1
+RFC8439_NONCE = bytes.fromhex('000000000000004a00000000')
+RFC8439_PLAINTEXT = (b"Ladies and Gentlemen of the class of '99: If I could offer you only one tip "
+                     b"for the future, sunscreen would be it.")
+RFC8439_CIPHERTEXT = bytes.fromhex(
+    '6e2e359a2568f98041ba0728dd0d6981e97e7aec1d4360c20a27afccfd9fae0b'
+    'f91b65c5524733ab8f593dabcd62b3571639d624e65152ab8f530c359f0861d8'
+    '07ca0dbf500d6a6156a38e088a22b65e52bc514d16ccf806818ce91ab7793736'
+    '5af90bbf74a35be6b40b8eedf2785e42874d')
+
+def self_test() -> bool:
+    """Kiểm tra backend với vector RFC 8439 và với Crypto.Cipher.ChaCha20"""
+    block = chacha20_blocks(RFC8439_KEY, nonce_words(RFC8439_BLOCK_NONCE), np.array([1], dtype=np.uint32))
+    assert block.tobytes() == RFC8439_BLOCK, "Lỗi: Sai vector block RFC 8439 (2.3.2)"
+
+    cipher = NumpyChaCha20(RFC8439_KEY, RFC8439_NONCE)
+    cipher.seek(BLOCK_SIZE)
+    assert cipher.encrypt(RFC8439_PLAINTEXT) == RFC8439_CIPHERTEXT, "Lỗi: Sai vector mã hóa RFC 8439 (2.4.2)"
+
+    # Import tại chỗ để backend không phụ thuộc pycryptodome khi chỉ dùng để mã hóa
+    from Crypto.Cipher import ChaCha20
+    key, nonce = os.urandom(32), os.urandom(12)
+    data = os.urandom(3 * CHUNK_BLOCKS * BLOCK_SIZE // 2 + 13)
+    reference = ChaCha20.new(key=key, nonce=nonce)
+    cipher = NumpyChaCha20(key, nonce)
+    # Các đoạn có độ dài lẻ để kiểm tra vị trí nằm giữa block
+    for start, end in [(0, 1), (1, 100), (100, 5000), (5000, len(data))]:
+        assert cipher.encrypt(data[start:end]) == reference.encrypt(data[start:end]), \
+            "Lỗi: Kết quả khác Crypto.Cipher.ChaCha20"
+
+    nonces = [os.urandom(12) for _ in range(3)]
+    messages = [data[:1], data[:64], data[:200]]
+    assert encrypt_batch(key, nonces, messages) == \
+        [ChaCha20.new(key=key, nonce=n).encrypt(msg) for n, msg in zip(nonces, messages)], \
+        "Lỗi: Kết quả batch khác Crypto.Cipher.ChaCha20"
+    return True
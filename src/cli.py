@@ -0,0 +1,207 @@
+"""Chạy benchmark không cần GUI, xuất kết quả JSON/CSV
+
+Ví dụ:
+    python cli.py --cipher all --sizes 1,10,50 --runs 10 --format json --output results.json
+    python cli.py --cipher chacha20 --backend numpy --sizes 1 --format csv --plot
+    python cli.py --sizes 1,10 --history    # lưu thêm vào lịch sử SQLite (xem history.py)
+    python cli.py --backends all --sizes 1,10 --plot   # so sánh mọi backend trong backends.py
+"""
+import sys
+import csv
+import json
+import argparse
+from contextlib import redirect_stdout
+from typing import Any, Dict, List, Optional, TextIO
+from system_info import get_system_info, feature_tag
+from timing import TimingStats, throughput
+from autotune import parse_list
+
+CIPHERS = ('aes-ctr', 'chacha20')
+OPERATIONS = ('encrypt', 'decrypt')
+
+CSV_FIELDS = ['cipher', 'backend', 'use_aesni', 'output_mode', 'size_mb', 'operation',
+              'median', 'p5', 'p25', 'p75', 'p95', 'ci_low', 'ci_high', 'mean', 'std',
+              'iterations', 'outliers', 'throughput_mb_s', 'throughput_low', 'throughput_high',
+              'cpu_brand', 'cpu_features', 'python_version', 'pycryptodome_version', 'samples']
+# Cột bộ nhớ (khi chạy với --memory): số liệu của phase trùng với thao tác của dòng
+MEMORY_FIELDS = ['peak_rss', 'traced_peak', 'allocated_blocks', 'minor_faults', 'major_faults']
+
+def run_benchmark(cipher: str, sizes: List[int], num_runs: int = 10, backend: str = 'pycryptodome',
+                  output_mode: str = 'alloc', warmup: int = 2, min_sample_time: float = 0.05,
+                  use_aesni: bool = True, plot: bool = False,
+                  track_memory: bool = False) -> List[Dict[str, Any]]:
+    """Chạy benchmark_aes_ctr hoặc benchmark_chacha20, trả về một bản ghi cho mỗi (kích thước, thao tác)
+
+    track_memory=True: mỗi bản ghi có thêm 'memory' (phase -> MemoryStats) của kích thước đó.
+    """
+    memory = [] if track_memory else None
+    if cipher == 'aes-ctr':
+        from aes_ctr_benchmark import benchmark_aes_ctr, plot_results
+        if backend != 'pycryptodome':
+            raise ValueError("AES-CTR chỉ hỗ trợ backend 'pycryptodome'")
+        encrypt_stats, decrypt_stats = benchmark_aes_ctr(sizes, num_runs, output_mode, warmup,
+                                                         min_sample_time, use_aesni, memory)
+    elif cipher == 'chacha20':
+        from chacha20_benchmark import benchmark_chacha20, plot_results
+        encrypt_stats, decrypt_stats = benchmark_chacha20(sizes, num_runs, output_mode, warmup,
+                                                          min_sample_time, backend, memory)
+        use_aesni = None
+    else:
+        raise ValueError(f"Cipher không hợp lệ: {cipher} (hỗ trợ: {', '.join(CIPHERS)})")
+
+    if plot:
+        # Giữ tên biểu đồ mặc định của GUI, thêm hậu tố khi đổi backend hoặc tắt AES-NI
+        name = cipher.replace('-', '_')
+        if backend != 'pycryptodome':
+            name += f'_{backend}'
+        if use_aesni is False:
+            name += '_no_aesni'
+        plot_results(sizes, encrypt_stats, decrypt_stats, output_name=f'{name}_performance.png',
+                     memory=memory)
+
+    records = []
+    for operation, stats_list in zip(OPERATIONS, (encrypt_stats, decrypt_stats)):
+        for i, (size, stats) in enumerate(zip(sizes, stats_list)):
+            record = {'cipher': cipher, 'backend': backend, 'use_aesni': use_aesni,
+                      'output_mode': output_mode, 'size_mb': size, 'operation': operation,
+                      'stats': stats}
+            if memory is not None:
+                record['memory'] = memory[i]
+            records.append(record)
+    return records
+
+def run_backends(names: Optional[List[str]], sizes: List[int], num_runs: int = 10,
+                 output_mode: str = 'alloc', warmup: int = 2, min_sample_time: float = 0.05,
+                 plot: bool = False, track_memory: bool = False) -> List[Dict[str, Any]]:
+    """Chạy benchmark_backends (names=None: mọi backend), bản ghi có cipher là tên backend trong registry"""
+    from backends import benchmark_backends, get_backend, plot_backends
+    memory = {} if track_memory else None
+    results = benchmark_backends(sizes, names, num_runs, output_mode, warmup, min_sample_time, memory)
+    if plot:
+        plot_backends(sizes, results)
+
+    records = []
+    for name, stats_lists in results.items():
+        for operation, stats_list in zip(OPERATIONS, stats_lists):
+            for i, (size, stats) in enumerate(zip(sizes, stats_list)):
+                record = {'cipher': name, 'backend': get_backend(name).library, 'use_aesni': None,
+                          'output_mode': output_mode, 'size_mb': size, 'operation': operation,
+                          'stats': stats}
+                if memory is not None:
+                    record['memory'] = memory[name][i]
+                records.append(record)
+    return records
+
+def stats_to_dict(size: int, stats: TimingStats) -> Dict[str, Any]:
+    """Chuyển TimingStats thành dict (giây) kèm throughput MB/s"""
+    result = stats._asdict()
+    result['throughput_mb_s'], result['throughput_low'], result['throughput_high'] = throughput(size, stats)
+    return result
+
+def to_json(records: List[Dict[str, Any]], system_info: dict, config: Dict[str, Any]) -> Dict[str, Any]:
+    """Tài liệu JSON: metadata hệ thống, cấu hình và từng kết quả (gồm mẫu thô)"""
+    return {
+        'system': system_info,
+        'cpu_features': feature_tag(system_info),
+        'config': config,
+        'results': [{**{k: v for k, v in r.items() if k not in ('stats', 'memory')},
+                     'stats': stats_to_dict(r['size_mb'], r['stats']),
+                     **({'memory': {phase: m._asdict() for phase, m in r['memory'].items()}}
+                        if 'memory' in r else {})} for r in records],
+    }
+
+def write_csv(records: List[Dict[str, Any]], system_info: dict, out: TextIO):
+    """Mỗi dòng một (cipher, kích thước, thao tác); các mẫu thô nối bằng ';'"""
+    fields = CSV_FIELDS + (MEMORY_FIELDS if records and 'memory' in records[0] else [])
+    writer = csv.DictWriter(out, fieldnames=fields)
+    writer.writeheader()
+    for r in records:
+        row = {k: v for k, v in r.items() if k not in ('stats', 'memory')}
+        if 'memory' in r:
+            row.update(r['memory'][r['operation']]._asdict())
+        row.update(stats_to_dict(r['size_mb'], r['stats']))
+        row['samples'] = ';'.join(f"{s:.9g}" for s in row['samples'])
+        row['cpu_features'] = feature_tag(system_info)
+        for key in ('cpu_brand', 'python_version', 'pycryptodome_version'):
+            row[key] = system_info[key]
+        writer.writerow({k: row[k] for k in fields})
+
+def parse_backends(text: str) -> List[str]:
+    from backends import available_backends
+    if text == 'all':
+        return available_backends()
+    names = [name.strip() for name in text.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available_backends()]
+    if not names or unknown:
+        raise argparse.ArgumentTypeError(f"Backend không hợp lệ: {', '.join(unknown) or text} "
+                                         f"(hỗ trợ: all, {', '.join(available_backends())})")
+    return names
+
+def build_parser() -> argparse.ArgumentParser:
+    from chacha20_benchmark import BACKENDS
+    parser = argparse.ArgumentParser(description="Benchmark AES-CTR / ChaCha20 không cần GUI")
+    parser.add_argument('--cipher', choices=CIPHERS + ('all',), default='all')
+    parser.add_argument('--sizes', type=parse_list, default=[1, 10, 50, 100],
+                        help="Kích thước file (MB), phân cách bằng dấu phẩy")
+    parser.add_argument('--runs', type=int, default=10, help="Số mẫu thời gian cho mỗi kích thước")
+    parser.add_argument('--backend', choices=BACKENDS, default='pycryptodome',
+                        help="Backend ChaCha20 (AES-CTR luôn dùng pycryptodome)")
+    parser.add_argument('--backends', type=parse_backends, metavar='NAMES',
+                        help="So sánh các backend của registry (tên phân cách bằng dấu phẩy, hoặc 'all'); "
+                             "bỏ qua --cipher/--backend/--no-aesni")
+    parser.add_argument('--output-mode', choices=('alloc', 'preallocated', 'inplace'), default='alloc')
+    parser.add_argument('--warmup', type=int, default=2)
+    parser.add_argument('--min-sample-time', type=float, default=0.05)
+    parser.add_argument('--no-aesni', action='store_true', help="Tắt AES-NI cho AES-CTR")
+    parser.add_argument('--format', choices=('json', 'csv'), default='json')
+    parser.add_argument('--output', '-o', help="File kết quả (mặc định: stdout)")
+    parser.add_argument('--plot', action='store_true', help="Lưu thêm biểu đồ PNG vào data/")
+    parser.add_argument('--memory', action='store_true',
+                        help="Đo bộ nhớ theo phase (RSS đỉnh, tracemalloc, số block, page fault)")
+    parser.add_argument('--history', nargs='?', const='', metavar='DB',
+                        help="Lưu kết quả vào lịch sử SQLite (mặc định: data/benchmark_history.sqlite)")
+    return parser
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = build_parser().parse_args(argv)
+    ciphers = CIPHERS if args.cipher == 'all' else (args.cipher,)
+    system_info = get_system_info()
+
+    records = []
+    if args.backends:
+        print(f"Đang chạy các backend: {', '.join(args.backends)}...", file=sys.stderr)
+        with redirect_stdout(sys.stderr):
+            records = run_backends(args.backends, args.sizes, args.runs, args.output_mode, args.warmup,
+                                   args.min_sample_time, args.plot, args.memory)
+        ciphers = ()
+    for cipher in ciphers:
+        # AES-CTR không có backend numpy: khi chạy 'all' thì AES-CTR dùng pycryptodome
+        backend = args.backend if cipher == 'chacha20' else 'pycryptodome'
+        print(f"Đang chạy {cipher} ({backend})...", file=sys.stderr)
+        # Thông báo tiến trình (vd. khi lưu biểu đồ) ra stderr để stdout chỉ chứa JSON/CSV
+        with redirect_stdout(sys.stderr):
+            records.extend(run_benchmark(cipher, args.sizes, args.runs, backend, args.output_mode,
+                                         args.warmup, args.min_sample_time, not args.no_aesni, args.plot,
+                                         args.memory))
+
+    config = {k: v for k, v in vars(args).items() if k not in ('format', 'output', 'history')}
+    if args.history is not None:
+        from history import HistoryStore, DEFAULT_DB
+        with HistoryStore(args.history or DEFAULT_DB) as store:
+            run_id = store.record(records, system_info, config)
+        print(f"Đã lưu vào lịch sử (run {run_id})", file=sys.stderr)
+
+    out = open(args.output, 'w', encoding='utf-8', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump(to_json(records, system_info, config), out, indent=2, ensure_ascii=False)
+            out.write('\n')
+        else:
+            write_csv(records, system_info, out)
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
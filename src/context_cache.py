@@ -0,0 +1,124 @@
+import os
+import threading
+from collections import OrderedDict
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, Optional
+import numpy as np
+
+class ContextCache:
+    """Cache LRU các context cipher đã khởi tạo (key schedule đã mở rộng)
+
+    new_context(key, nonce) tạo context khi cache miss. Context phải có
+    encrypt(data, nonce, initial_block=0, output=None) và decrypt tương tự.
+    per_nonce=False: một context dùng chung cho mọi nonce của cùng key (AES: key schedule);
+    per_nonce=True: mỗi cặp (key, nonce) một context (ChaCha20: trạng thái đã khởi tạo, dùng seek).
+    Giới hạn theo số entry (max_entries) và/hoặc bộ nhớ ước lượng (max_bytes, entry_size byte/entry).
+    """
+
+    def __init__(self, new_context: Callable[[bytes, bytes], Any], max_entries: int = 1024,
+                 max_bytes: Optional[int] = None, entry_size: int = 0, per_nonce: bool = False):
+        if max_entries <= 0:
+            raise ValueError("Số entry tối đa phải lớn hơn 0")
+        if max_bytes is not None:
+            if entry_size <= 0:
+                raise ValueError("Cần entry_size > 0 khi giới hạn theo bộ nhớ")
+            max_entries = min(max_entries, max(1, max_bytes // entry_size))
+        self._new_context = new_context
+        self._per_nonce = per_nonce
+        self._entries: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self.entry_size = entry_size
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key: bytes, nonce: bytes) -> Any:
+        """Trả về context sẵn sàng cho (key, nonce), tạo mới nếu chưa có trong cache"""
+        cache_key = key + nonce if self._per_nonce else key
+        with self._lock:
+            context = self._entries.get(cache_key)
+            if context is not None:
+                self._entries.move_to_end(cache_key)
+                self.hits += 1
+                return context
+            self.misses += 1
+
+        # Khởi tạo ngoài lock để các luồng khác không phải chờ key schedule
+        context = self._new_context(key, nonce)
+        with self._lock:
+            self._entries[cache_key] = context
+            self._entries.move_to_end(cache_key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+        return context
+
+    def clear(self):
+        """Xóa toàn bộ cache và thống kê"""
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        """Thống kê hit/miss của cache"""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'entries': len(self._entries),
+                'estimated_bytes': len(self._entries) * self.entry_size,
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+def zipf_indices(num_items: int, count: int, s: float = 1.1, seed: Optional[int] = 0) -> np.ndarray:
+    """Sinh count chỉ số trong [0, num_items) theo phân phối Zipf với tham số s"""
+    weights = 1.0 / np.arange(1, num_items + 1) ** s
+    rng = np.random.default_rng(seed)
+    return rng.choice(num_items, size=count, p=weights / weights.sum())
+
+def benchmark_context_cache(create_cipher: Callable[[bytes, bytes], Any],
+                            new_context: Callable[[bytes, bytes], Any],
+                            key_size: int, nonce_size: int, per_nonce: bool = False,
+                            entry_size: int = 0, num_keys: int = 10000, cache_size: int = 1024,
+                            num_messages: int = 50000, message_size: int = 256,
+                            zipf_s: float = 1.1) -> Dict[str, float]:
+    """So sánh throughput có và không có cache context khi truy cập key theo Zipf
+
+    Mô phỏng giải mã bản ghi của num_keys đối tượng (mỗi đối tượng một cặp key/nonce),
+    đối tượng được truy cập theo phân phối Zipf.
+    Returns:
+        Dict gồm ops/sec không cache, ops/sec có cache, tỉ lệ tăng tốc và thống kê cache
+    """
+    pairs = [(os.urandom(key_size), os.urandom(nonce_size)) for _ in range(num_keys)]
+    indices = zipf_indices(num_keys, num_messages, zipf_s)
+    message = os.urandom(message_size)
+    output = bytearray(message_size)
+
+    # Kiểm tra context cho kết quả giống cipher gốc
+    key, nonce = pairs[0]
+    assert new_context(key, nonce).decrypt(message, nonce) == create_cipher(key, nonce).decrypt(message), \
+        "Lỗi: Context trong cache cho kết quả khác cipher gốc!"
+
+    start = perf_counter_ns()
+    for i in indices:
+        key, nonce = pairs[i]
+        create_cipher(key, nonce).decrypt(message, output=output)
+    uncached = num_messages / ((perf_counter_ns() - start) / 1e9)
+
+    cache = ContextCache(new_context, cache_size, entry_size=entry_size, per_nonce=per_nonce)
+    start = perf_counter_ns()
+    for i in indices:
+        key, nonce = pairs[i]
+        cache.get(key, nonce).decrypt(message, nonce, output=output)
+    cached = num_messages / ((perf_counter_ns() - start) / 1e9)
+
+    result = {'uncached_ops_per_sec': uncached, 'cached_ops_per_sec': cached,
+              'speedup': cached / uncached}
+    result.update(cache.stats())
+    return result
@@ -0,0 +1,389 @@
+"""Dịch vụ mã hóa asyncio qua TCP/Unix socket và bộ sinh tải nhiều client
+
+Giao thức: client gửi header phiên (thao tác, cipher, độ dài key, độ dài nonce, key, nonce) rồi
+các frame (độ dài uint32 BE || dữ liệu). Server trả về từng frame đã mã hóa/giải mã với cùng độ dài;
+keystream nối tiếp qua các frame nên kết quả giống xử lý cả luồng một lần. Frame độ dài 0 kết thúc phiên.
+
+Ví dụ:
+    python crypto_server.py serve --port 9000
+    python crypto_server.py bench --cipher all --concurrency 1,4,16,64 --plot
+"""
+import os
+import sys
+import struct
+import socket
+import asyncio
+import argparse
+import tempfile
+import multiprocessing
+from time import perf_counter
+from typing import Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+from aes_ctr_benchmark import create_cipher as create_aes_ctr
+from chacha20_benchmark import create_cipher as create_chacha20
+from benchmark_core import save_figure
+from autotune import parse_list
+
+SESSION_HEADER = struct.Struct('>BBBB')  # Thao tác, mã cipher, độ dài key, độ dài nonce
+FRAME_HEADER = struct.Struct('>I')
+OPERATIONS = {'encrypt': 1, 'decrypt': 2}
+# Tên -> (mã cipher, kích thước key, kích thước nonce, create_cipher của module tương ứng)
+CIPHERS = {'aes-ctr': (1, 16, 8, create_aes_ctr), 'chacha20': (2, 32, 12, create_chacha20)}
+DEFAULT_MAX_FRAME = 4 * 1024 * 1024
+DEFAULT_OFFLOAD_THRESHOLD = 64 * 1024  # Frame từ kích thước này được mã hóa trong executor
+DEFAULT_WRITE_HIGH_WATER = 1024 * 1024
+
+class ProtocolError(Exception):
+    """Client gửi header hoặc frame không hợp lệ"""
+
+class CryptoServer:
+    """Server mã hóa/giải mã luồng theo frame
+
+    Mỗi kết nối xử lý tuần tự từng frame với một cipher riêng. Frame lớn (>= offload_threshold)
+    chạy trong thread pool, pycryptodome nhả GIL nên event loop vẫn phục vụ kết nối khác.
+    Backpressure:
+    - Mỗi kết nối chỉ đọc frame tiếp theo sau khi đã ghi xong frame trước (writer.drain());
+      client không đọc kết quả thì buffer ghi vượt write_high_water, server ngừng đọc socket
+      và TCP/Unix socket đẩy ngược áp lực về client.
+    - Tổng số frame đang ở executor bị giới hạn bởi max_inflight; kết nối phải chờ chỗ trống
+      thì cũng ngừng đọc, nên hàng đợi executor và bộ nhớ không tăng vô hạn.
+    """
+
+    def __init__(self, max_frame: int = DEFAULT_MAX_FRAME,
+                 offload_threshold: int = DEFAULT_OFFLOAD_THRESHOLD,
+                 max_workers: Optional[int] = None, max_inflight: Optional[int] = None,
+                 write_high_water: int = DEFAULT_WRITE_HIGH_WATER):
+        self.max_frame = max_frame
+        self.offload_threshold = offload_threshold
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.max_inflight = max_inflight or 2 * self.max_workers
+        self.write_high_water = write_high_water
+        self.stats = {'connections': 0, 'frames': 0, 'bytes': 0, 'offloaded': 0,
+                      'inflight_waits': 0, 'drain_waits': 0, 'errors': 0}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._inflight: Optional[asyncio.Semaphore] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._connections: Dict[asyncio.Task, asyncio.StreamWriter] = {}
+
+    async def start(self, host: str = '127.0.0.1', port: int = 0, path: Optional[str] = None):
+        """Lắng nghe TCP (host, port; port 0 = cổng tự chọn) hoặc Unix socket path, trả về địa chỉ"""
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='crypto')
+        self._inflight = asyncio.Semaphore(self.max_inflight)
+        if path is not None:
+            if not hasattr(socket, 'AF_UNIX'):
+                raise ValueError("Hệ điều hành không hỗ trợ Unix socket")
+            self._server = await asyncio.start_unix_server(self._handle, path)
+            return path
+        self._server = await asyncio.start_server(self._handle, host, port)
+        return self._server.sockets[0].getsockname()[:2]
+
+    async def close(self):
+        """Ngừng nhận kết nối, đóng các kết nối đang mở và chờ handler của chúng kết thúc"""
+        if self._server is not None:
+            self._server.close()
+        for writer in self._connections.values():
+            # abort(): close() chờ gửi hết buffer, mà client bị backpressure có thể không bao giờ đọc
+            writer.transport.abort()
+        await asyncio.gather(*self._connections, return_exceptions=True)
+        if self._server is not None:
+            await self._server.wait_closed()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+
+    async def _read_session(self, reader: asyncio.StreamReader):
+        operation, cipher_id, key_size, nonce_size = SESSION_HEADER.unpack(
+            await reader.readexactly(SESSION_HEADER.size))
+        key = await reader.readexactly(key_size)
+        nonce = await reader.readexactly(nonce_size)
+        for cipher_name, (known_id, _, _, create_cipher) in CIPHERS.items():
+            if known_id == cipher_id:
+                break
+        else:
+            raise ProtocolError(f"Mã cipher không hỗ trợ: {cipher_id}")
+        if operation not in OPERATIONS.values():
+            raise ProtocolError(f"Thao tác không hỗ trợ: {operation}")
+        try:
+            cipher = create_cipher(key, nonce)
+        except (ValueError, TypeError) as e:
+            raise ProtocolError(f"Key/nonce không hợp lệ cho {cipher_name}: {e}") from None
+        return cipher.encrypt if operation == OPERATIONS['encrypt'] else cipher.decrypt
+
+    async def _transform(self, transform, payload: bytes) -> bytes:
+        if len(payload) < self.offload_threshold:
+            return transform(payload)  # Frame nhỏ: chuyển sang thread tốn hơn tự mã hóa
+        if self._inflight.locked():
+            self.stats['inflight_waits'] += 1
+        async with self._inflight:
+            self.stats['offloaded'] += 1
+            return await asyncio.get_running_loop().run_in_executor(self._executor, transform, payload)
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.stats['connections'] += 1
+        task = asyncio.current_task()
+        self._connections[task] = writer
+        writer.transport.set_write_buffer_limits(high=self.write_high_water)
+        try:
+            transform = await self._read_session(reader)
+            while True:
+                length, = FRAME_HEADER.unpack(await reader.readexactly(FRAME_HEADER.size))
+                if length > self.max_frame:
+                    raise ProtocolError(f"Frame {length} byte vượt giới hạn {self.max_frame} byte")
+                if length == 0:
+                    writer.write(FRAME_HEADER.pack(0))
+                    await writer.drain()
+                    break
+                result = await self._transform(transform, await reader.readexactly(length))
+                writer.write(FRAME_HEADER.pack(length))
+                writer.write(result)
+                if writer.transport.get_write_buffer_size() > self.write_high_water:
+                    self.stats['drain_waits'] += 1
+                await writer.drain()
+                self.stats['frames'] += 1
+                self.stats['bytes'] += length
+        except (ProtocolError, asyncio.IncompleteReadError, ConnectionError):
+            self.stats['errors'] += 1
+        finally:
+            del self._connections[task]
+            writer.close()
+
+class CryptoClient:
+    """Một phiên mã hóa/giải mã với server: transform(frame) gửi frame và chờ kết quả"""
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self._reader = reader
+        self._writer = writer
+
+    @classmethod
+    async def connect(cls, address, operation: str, cipher: str, key: bytes, nonce: bytes) -> 'CryptoClient':
+        """address: (host, port) cho TCP hoặc đường dẫn Unix socket"""
+        if operation not in OPERATIONS:
+            raise ValueError(f"Thao tác không hợp lệ: {operation} (hỗ trợ: {', '.join(OPERATIONS)})")
+        if cipher not in CIPHERS:
+            raise ValueError(f"Cipher không hợp lệ: {cipher} (hỗ trợ: {', '.join(CIPHERS)})")
+        if isinstance(address, str):
+            reader, writer = await asyncio.open_unix_connection(address)
+        else:
+            reader, writer = await asyncio.open_connection(*address)
+        writer.write(SESSION_HEADER.pack(OPERATIONS[operation], CIPHERS[cipher][0], len(key), len(nonce)))
+        writer.write(key + nonce)
+        return cls(reader, writer)
+
+    async def transform(self, payload: bytes) -> bytes:
+        if not payload:
+            raise ValueError("Frame rỗng dùng để kết thúc phiên, hãy gọi close()")
+        self._writer.write(FRAME_HEADER.pack(len(payload)))
+        self._writer.write(payload)
+        await self._writer.drain()
+        return await self._read_frame()
+
+    async def _read_frame(self) -> bytes:
+        try:
+            length, = FRAME_HEADER.unpack(await self._reader.readexactly(FRAME_HEADER.size))
+            return await self._reader.readexactly(length)
+        except asyncio.IncompleteReadError:
+            raise ConnectionError("Server đóng kết nối (frame hoặc header phiên không hợp lệ)") from None
+
+    async def close(self):
+        """Gửi frame kết thúc, chờ server xác nhận rồi đóng kết nối"""
+        try:
+            self._writer.write(FRAME_HEADER.pack(0))
+            await self._writer.drain()
+            await self._read_frame()
+        finally:
+            self._writer.close()
+
+class LoadResult(NamedTuple):
+    """Kết quả sinh tải với một mức đồng thời"""
+    cipher: str
+    concurrency: int
+    frame_size: int         # byte
+    frames: int             # Tổng số frame của mọi client
+    throughput_mb_s: float  # Tổng byte / thời gian từ lúc mọi client bắt đầu tới khi xong
+    p50: float              # Độ trễ một frame (giây): gửi -> nhận kết quả
+    p95: float
+    p99: float
+    max: float
+
+async def run_load(address, cipher: str = 'chacha20', concurrency: int = 8, frame_size: int = 64 * 1024,
+                   frames_per_client: int = 32, operation: str = 'encrypt') -> LoadResult:
+    """Chạy concurrency client đồng thời, mỗi client gửi frames_per_client frame tuần tự"""
+    _, key_size, nonce_size, _ = CIPHERS[cipher]
+    payload = os.urandom(frame_size)
+    latencies: List[float] = []
+
+    async def client():
+        session = await CryptoClient.connect(address, operation, cipher,
+                                             os.urandom(key_size), os.urandom(nonce_size))
+        try:
+            for _ in range(frames_per_client):
+                begin = perf_counter()
+                await session.transform(payload)
+                latencies.append(perf_counter() - begin)
+        finally:
+            await session.close()
+
+    begin = perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = perf_counter() - begin
+    p50, p95, p99 = (float(p) for p in np.percentile(latencies, [50, 95, 99]))
+    return LoadResult(cipher, concurrency, frame_size, len(latencies),
+                      len(latencies) * frame_size / 1024 / 1024 / elapsed, p50, p95, p99, max(latencies))
+
+async def transform_stream(address, operation: str, cipher: str, key: bytes, nonce: bytes,
+                           data: bytes, frame_size: int = 64 * 1024) -> bytes:
+    """Mã hóa/giải mã data qua server trong một phiên, chia thành các frame frame_size byte"""
+    session = await CryptoClient.connect(address, operation, cipher, key, nonce)
+    try:
+        return b''.join([await session.transform(data[i:i + frame_size])
+                         for i in range(0, len(data), frame_size)])
+    finally:
+        await session.close()
+
+async def check_roundtrip(address, cipher: str, size: int = 256 * 1024, frame_size: int = 64 * 1024):
+    """Mã hóa rồi giải mã qua server, so với create_cipher của module chạy cục bộ"""
+    _, key_size, nonce_size, create_cipher = CIPHERS[cipher]
+    key, nonce, data = os.urandom(key_size), os.urandom(nonce_size), os.urandom(size)
+    encrypted = await transform_stream(address, 'encrypt', cipher, key, nonce, data, frame_size)
+    assert encrypted == create_cipher(key, nonce).encrypt(data), "Lỗi: Bản mã từ server sai!"
+    decrypted = await transform_stream(address, 'decrypt', cipher, key, nonce, encrypted, frame_size)
+    assert decrypted == data, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+
+def _serve_process(conn, path: Optional[str], server_kwargs: Dict[str, Any]):
+    """Chạy server trong process con: gửi địa chỉ qua conn, dừng khi nhận lệnh rồi gửi lại stats"""
+    async def main():
+        server = CryptoServer(**server_kwargs)
+        conn.send(await server.start(path=path))
+        await asyncio.get_running_loop().run_in_executor(None, conn.recv)
+        await server.close()
+        conn.send(server.stats)
+    asyncio.run(main())
+
+def benchmark_server(ciphers: Sequence[str] = tuple(CIPHERS),
+                     concurrency_levels: Sequence[int] = (1, 2, 4, 8, 16, 32, 64),
+                     frame_size: int = 64 * 1024, frames_per_client: int = 32,
+                     transport: str = 'tcp', **server_kwargs: Any) -> Tuple[List[LoadResult], Dict[str, int]]:
+    """Đo throughput tổng và độ trễ đuôi theo số client đồng thời
+
+    Server chạy trong process riêng (như một dịch vụ thật), bộ sinh tải chạy trong process hiện tại.
+    transport: 'tcp' (127.0.0.1) hoặc 'unix'. server_kwargs chuyển cho CryptoServer.
+    Returns:
+        (kết quả theo cipher và mức đồng thời, stats của server)
+    """
+    if transport not in ('tcp', 'unix'):
+        raise ValueError("Transport phải là 'tcp' hoặc 'unix'")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        path = os.path.join(tmp_dir, 'crypto.sock') if transport == 'unix' else None
+        conn, child_conn = multiprocessing.Pipe()
+        process = multiprocessing.Process(target=_serve_process, args=(child_conn, path, server_kwargs),
+                                          daemon=True)
+        process.start()
+        try:
+            address = conn.recv()
+
+            async def run_all():
+                results = []
+                for cipher in ciphers:
+                    await check_roundtrip(address, cipher)
+                    # Một vòng nhỏ làm nóng kết nối, executor và bộ cấp phát
+                    await run_load(address, cipher, 1, frame_size, 4)
+                    for concurrency in concurrency_levels:
+                        results.append(await run_load(address, cipher, concurrency, frame_size,
+                                                      frames_per_client))
+                return results
+
+            results = asyncio.run(run_all())
+            conn.send('stop')
+            stats = conn.recv()
+        finally:
+            process.join(timeout=10)
+            if process.is_alive():
+                process.terminate()
+    return results, stats
+
+def format_load(results: List[LoadResult]) -> str:
+    """Bảng throughput tổng và độ trễ p50/p95/p99 (ms) theo cipher và số client"""
+    header = (f"{'Cipher':<9} | {'Client':>6} | {'Frame (KB)':>10} | {'MB/s':>8} | "
+              f"{'p50 (ms)':>8} | {'p95 (ms)':>8} | {'p99 (ms)':>8} | {'max (ms)':>8}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(f"{r.cipher:<9} | {r.concurrency:>6} | {r.frame_size / 1024:>10g} | "
+                     f"{r.throughput_mb_s:>8.1f} | {r.p50 * 1e3:>8.2f} | {r.p95 * 1e3:>8.2f} | "
+                     f"{r.p99 * 1e3:>8.2f} | {r.max * 1e3:>8.2f}")
+    return "\n".join(lines)
+
+def plot_load(results: List[LoadResult], output_name: str = 'server_load.png'):
+    """Vẽ throughput tổng và độ trễ p99 (p50 nét đứt) theo số client đồng thời"""
+    # Import tại chỗ: matplotlib chiếm phần lớn thời gian khởi động module
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(15, 6))
+    for cipher in dict.fromkeys(r.cipher for r in results):
+        rows = [r for r in results if r.cipher == cipher]
+        concurrency = [r.concurrency for r in rows]
+        plt.subplot(1, 2, 1)
+        plt.plot(concurrency, [r.throughput_mb_s for r in rows], '-o', label=cipher)
+        plt.subplot(1, 2, 2)
+        line, = plt.plot(concurrency, [r.p99 * 1e3 for r in rows], '-o', label=f'{cipher} p99')
+        plt.plot(concurrency, [r.p50 * 1e3 for r in rows], '--', color=line.get_color(), alpha=0.6,
+                 label=f'{cipher} p50')
+    for index, (ylabel, title) in enumerate([('Throughput tổng (MB/s)', 'Throughput theo số client'),
+                                             ('Độ trễ một frame (ms)', 'Độ trễ đuôi theo số client')], start=1):
+        plt.subplot(1, 2, index)
+        plt.xscale('log', base=2)
+        plt.xlabel('Số client đồng thời')
+        plt.ylabel(ylabel)
+        plt.title(title)
+        plt.legend(fontsize=8)
+        plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    save_figure(plt, output_name)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Dịch vụ mã hóa asyncio và bộ sinh tải")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    for name in ('serve', 'bench'):
+        sub = subparsers.add_parser(name)
+        sub.add_argument('--max-workers', type=int, help="Số thread của executor (mặc định: số core)")
+        sub.add_argument('--max-inflight', type=int, help="Số frame tối đa đang ở executor")
+        sub.add_argument('--offload-threshold', type=int, default=DEFAULT_OFFLOAD_THRESHOLD)
+    serve = subparsers.choices['serve']
+    serve.add_argument('--host', default='127.0.0.1')
+    serve.add_argument('--port', type=int, default=9000)
+    serve.add_argument('--unix', metavar='PATH', help="Lắng nghe trên Unix socket thay vì TCP")
+    bench = subparsers.choices['bench']
+    bench.add_argument('--cipher', choices=tuple(CIPHERS) + ('all',), default='all')
+    bench.add_argument('--concurrency', type=parse_list, default=[1, 2, 4, 8, 16, 32, 64])
+    bench.add_argument('--frame-size', type=int, default=64 * 1024, help="Kích thước frame (byte)")
+    bench.add_argument('--frames', type=int, default=32, help="Số frame mỗi client")
+    bench.add_argument('--transport', choices=('tcp', 'unix'), default='tcp')
+    bench.add_argument('--plot', action='store_true', help="Lưu biểu đồ vào data/server_load.png")
+    args = parser.parse_args(argv)
+    server_kwargs = {'max_workers': args.max_workers, 'max_inflight': args.max_inflight,
+                     'offload_threshold': args.offload_threshold}
+
+    if args.command == 'serve':
+        async def serve():
+            server = CryptoServer(**server_kwargs)
+            address = await server.start(args.host, args.port, args.unix)
+            print(f"Đang lắng nghe tại {address}", file=sys.stderr)
+            try:
+                await asyncio.Event().wait()
+            finally:
+                await server.close()
+        try:
+            asyncio.run(serve())
+        except KeyboardInterrupt:
+            pass
+        return 0
+
+    ciphers = tuple(CIPHERS) if args.cipher == 'all' else (args.cipher,)
+    results, stats = benchmark_server(ciphers, args.concurrency, args.frame_size, args.frames,
+                                      args.transport, **server_kwargs)
+    print(format_load(results))
+    print("Server: " + ", ".join(f"{name}={value}" for name, value in stats.items()))
+    if args.plot:
+        plot_load(results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
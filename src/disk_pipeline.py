@@ -0,0 +1,328 @@
+"""Mã hóa file trên đĩa theo pipeline: đọc, mã hóa và ghi chạy chồng lên nhau
+
+Ba thread (đọc bằng readinto, mã hóa tại chỗ, ghi) chuyền cho nhau num_buffers buffer cấp phát sẵn:
+trong lúc một chunk đang được mã hóa, chunk sau đang được đọc và chunk trước đang được ghi.
+num_buffers=1 là chạy tuần tự, 2 là double buffering, 3 là triple buffering. Tỉ lệ thời gian bận của
+từng stage cho biết lần chạy bị giới hạn bởi I/O (đọc/ghi) hay CPU (mã hóa).
+
+Ví dụ:
+    python disk_pipeline.py --size 256 --buffers 1,2,3
+    python disk_pipeline.py --cipher chacha20 --direct --work-dir /mnt/data --plot
+"""
+import os
+import sys
+import mmap
+import queue
+import argparse
+import tempfile
+import threading
+import traceback
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Sequence
+from aes_ctr_benchmark import create_cipher as create_aes_ctr
+from chacha20_benchmark import create_cipher as create_chacha20
+from autotune import tuned_chunk_size, parse_list
+from benchmark_core import save_figure
+from streaming import DEFAULT_CHUNK_SIZE, create_random_file, file_digest, drop_file_cache
+from system_info import get_system_info, format_system_info
+
+# Tên -> (kích thước key, kích thước nonce, create_cipher của module tương ứng)
+CIPHERS = {'aes-ctr': (16, 8, create_aes_ctr), 'chacha20': (32, 12, create_chacha20)}
+STAGES = ('read', 'cipher', 'write')
+DEFAULT_NUM_BUFFERS = 3
+DIRECT_ALIGNMENT = 4096  # O_DIRECT cần buffer, offset và độ dài căn theo block của thiết bị
+
+class StageStats(NamedTuple):
+    """Thời gian của một stage trong một lần chạy pipeline (giây)"""
+    busy: float         # Thời gian làm việc (đọc, mã hóa hoặc ghi)
+    wait: float         # Thời gian chờ buffer từ stage khác
+    utilization: float  # busy / thời gian cả pipeline
+
+class PipelineResult(NamedTuple):
+    """Kết quả một lần xử lý file qua pipeline"""
+    size: int                       # byte
+    elapsed: float                  # giây
+    stages: Dict[str, StageStats]
+
+    @property
+    def bottleneck(self) -> str:
+        """Stage bận nhất: 'cipher' là giới hạn bởi CPU, 'read'/'write' là giới hạn bởi I/O"""
+        return max(self.stages, key=lambda stage: self.stages[stage].utilization)
+
+def _open(path: str, flags: int, direct: bool, mode: str):
+    if direct:
+        flags |= os.O_DIRECT
+    return open(os.open(path, flags, 0o666), mode, buffering=0)
+
+def pipeline_file(transform: Callable, src_path: str, dst_path: str,
+                  chunk_size: int = DEFAULT_CHUNK_SIZE, num_buffers: int = DEFAULT_NUM_BUFFERS,
+                  direct: bool = False, fadvise: bool = True, fsync: bool = False) -> PipelineResult:
+    """Áp dụng transform (cipher.encrypt/decrypt) lên file qua pipeline đọc -> mã hóa -> ghi
+
+    Buffer được cấp phát một lần (mmap ẩn danh, căn theo trang) và mã hóa tại chỗ, nên bộ nhớ dùng
+    là num_buffers * chunk_size bất kể kích thước file.
+    direct: mở file với O_DIRECT, bỏ qua page cache (chunk_size phải là bội của DIRECT_ALIGNMENT;
+        chunk cuối được ghi đủ block rồi cắt file về đúng kích thước).
+    fadvise: báo kernel đọc tuần tự và bỏ trang đã đọc khỏi page cache (posix_fadvise).
+    fsync: đợi dữ liệu xuống đĩa trước khi kết thúc (tính vào stage ghi).
+    """
+    if chunk_size <= 0:
+        raise ValueError("Kích thước chunk phải lớn hơn 0")
+    if num_buffers <= 0:
+        raise ValueError("Số buffer phải lớn hơn 0")
+    if direct:
+        if not hasattr(os, 'O_DIRECT'):
+            raise ValueError("Hệ điều hành không hỗ trợ O_DIRECT")
+        if chunk_size % DIRECT_ALIGNMENT:
+            raise ValueError(f"Với O_DIRECT, kích thước chunk phải là bội của {DIRECT_ALIGNMENT}")
+    fadvise = fadvise and hasattr(os, 'posix_fadvise')
+
+    buffers = [mmap.mmap(-1, chunk_size) for _ in range(num_buffers)]
+    views = [memoryview(buf) for buf in buffers]
+    # Chỉ số buffer đi vòng: free -> (đọc) -> filled -> (mã hóa) -> done -> (ghi) -> free; None là kết thúc
+    free, filled, done = queue.Queue(), queue.Queue(), queue.Queue()
+    for index in range(num_buffers):
+        free.put(index)
+    busy = dict.fromkeys(STAGES, 0)
+    wait = dict.fromkeys(STAGES, 0)
+    errors = []
+
+    def read_stage():
+        fd = src.fileno()
+        if fadvise:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_SEQUENTIAL)
+        offset = 0
+        while True:
+            begin = perf_counter_ns()
+            index = free.get()
+            start = perf_counter_ns()
+            wait['read'] += start - begin
+            if index is None or errors:
+                break
+            n = src.readinto(views[index])
+            if n and fadvise:
+                os.posix_fadvise(fd, offset, n, os.POSIX_FADV_DONTNEED)
+            busy['read'] += perf_counter_ns() - start
+            if not n:
+                break
+            offset += n
+            filled.put((index, n))
+        filled.put(None)
+
+    def cipher_stage():
+        while True:
+            begin = perf_counter_ns()
+            item = filled.get()
+            start = perf_counter_ns()
+            wait['cipher'] += start - begin
+            if item is None:
+                break
+            index, n = item
+            chunk = views[index][:n]
+            transform(chunk, output=chunk)
+            busy['cipher'] += perf_counter_ns() - start
+            done.put(item)
+        done.put(None)
+
+    def write_stage():
+        total = 0
+        while True:
+            begin = perf_counter_ns()
+            item = done.get()
+            start = perf_counter_ns()
+            wait['write'] += start - begin
+            if item is None:
+                break
+            index, n = item
+            # O_DIRECT: ghi đủ block (phần thừa của chunk cuối bị cắt bỏ sau vòng lặp)
+            length = -(-n // DIRECT_ALIGNMENT) * DIRECT_ALIGNMENT if direct else n
+            view = views[index][:length]
+            while view:
+                view = view[dst.write(view):]
+            total += n
+            busy['write'] += perf_counter_ns() - start
+            free.put(index)
+        start = perf_counter_ns()
+        if direct and total % DIRECT_ALIGNMENT:
+            os.ftruncate(dst.fileno(), total)
+        if fsync:
+            os.fsync(dst.fileno())
+        busy['write'] += perf_counter_ns() - start
+        result['size'] = total
+
+    def run(stage: Callable):
+        try:
+            stage()
+        except BaseException as e:
+            # Bỏ biến cục bộ (slice của buffer) khỏi traceback để đóng được mmap
+            traceback.clear_frames(e.__traceback__)
+            errors.append(e)
+            # Đánh thức mọi stage đang chờ để pipeline dừng
+            for q in (free, filled, done):
+                q.put(None)
+
+    result = {'size': 0}
+    try:
+        with _open(src_path, os.O_RDONLY, direct, 'rb') as src, \
+             _open(dst_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, direct, 'wb') as dst:
+            threads = [threading.Thread(target=run, args=(stage,), daemon=True)
+                       for stage in (read_stage, cipher_stage, write_stage)]
+            begin = perf_counter_ns()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = perf_counter_ns() - begin
+    finally:
+        for view in views:
+            view.release()
+        for buf in buffers:
+            buf.close()
+    if errors:
+        raise errors[0]
+
+    elapsed = max(elapsed, 1)
+    stages = {stage: StageStats(busy[stage] / 1e9, wait[stage] / 1e9, busy[stage] / elapsed)
+              for stage in STAGES}
+    return PipelineResult(result['size'], elapsed / 1e9, stages)
+
+def _pipeline(cipher: str, key: bytes, nonce: bytes, src_path: str, dst_path: str, decrypt: bool,
+              chunk_size: Optional[int], **kwargs: Any) -> PipelineResult:
+    if cipher not in CIPHERS:
+        raise ValueError(f"Cipher không hợp lệ: {cipher} (hỗ trợ: {', '.join(CIPHERS)})")
+    if chunk_size is None:
+        chunk_size = tuned_chunk_size(cipher, DEFAULT_CHUNK_SIZE)
+    context = CIPHERS[cipher][2](key, nonce)
+    return pipeline_file(context.decrypt if decrypt else context.encrypt, src_path, dst_path,
+                         chunk_size, **kwargs)
+
+def encrypt_file(cipher: str, key: bytes, nonce: bytes, src_path: str, dst_path: str,
+                 chunk_size: Optional[int] = None, num_buffers: int = DEFAULT_NUM_BUFFERS,
+                 direct: bool = False, fadvise: bool = True, fsync: bool = False) -> PipelineResult:
+    """Mã hóa file bằng 'aes-ctr' hoặc 'chacha20' qua pipeline, bản mã giống encrypt_file của module cipher
+
+    chunk_size mặc định lấy từ profile của autotune.py; các tham số khác như pipeline_file.
+    """
+    return _pipeline(cipher, key, nonce, src_path, dst_path, False, chunk_size,
+                     num_buffers=num_buffers, direct=direct, fadvise=fadvise, fsync=fsync)
+
+def decrypt_file(cipher: str, key: bytes, nonce: bytes, src_path: str, dst_path: str,
+                 chunk_size: Optional[int] = None, num_buffers: int = DEFAULT_NUM_BUFFERS,
+                 direct: bool = False, fadvise: bool = True, fsync: bool = False) -> PipelineResult:
+    """Giải mã file qua pipeline, xem encrypt_file"""
+    return _pipeline(cipher, key, nonce, src_path, dst_path, True, chunk_size,
+                     num_buffers=num_buffers, direct=direct, fadvise=fadvise, fsync=fsync)
+
+def benchmark_disk_pipeline(ciphers: Sequence[str] = tuple(CIPHERS), file_size: int = 256,
+                            buffer_counts: Sequence[int] = (1, 2, 3), chunk_size: Optional[int] = None,
+                            num_runs: int = 3, work_dir: Optional[str] = None, direct: bool = False,
+                            fadvise: bool = True, fsync: bool = True) -> List[Dict[str, Any]]:
+    """Đo mã hóa file -> file trên đĩa theo số buffer của pipeline
+
+    Mỗi lần đo bắt đầu với file nguồn đã bị bỏ khỏi page cache và (mặc định) kết thúc bằng fsync,
+    nên thời gian gồm cả đọc và ghi đĩa thật. Lần chạy được giữ lại là lần có thời gian median.
+    Returns:
+        List dict {cipher, buffers, chunk_size, mb_s, result: PipelineResult}
+    """
+    results = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        plain_path = os.path.join(tmp_dir, 'plain.bin')
+        enc_path = os.path.join(tmp_dir, 'encrypted.bin')
+        dec_path = os.path.join(tmp_dir, 'decrypted.bin')
+        create_random_file(plain_path, file_size * 1024 * 1024)
+        plain_digest = file_digest(plain_path)
+
+        for cipher in ciphers:
+            key_size, nonce_size, _ = CIPHERS[cipher]
+            size = chunk_size or tuned_chunk_size(cipher, DEFAULT_CHUNK_SIZE)
+            key = os.urandom(key_size)
+            options = {'direct': direct, 'fadvise': fadvise, 'fsync': fsync}
+
+            # Verify kết quả một lần (không tính vào thời gian đo)
+            nonce = os.urandom(nonce_size)
+            encrypt_file(cipher, key, nonce, plain_path, enc_path, size, max(buffer_counts), **options)
+            decrypt_file(cipher, key, nonce, enc_path, dec_path, size, max(buffer_counts), **options)
+            assert file_digest(dec_path) == plain_digest, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+            os.remove(dec_path)
+
+            for buffers in buffer_counts:
+                runs = []
+                for _ in range(num_runs):
+                    drop_file_cache(plain_path)
+                    runs.append(encrypt_file(cipher, key, os.urandom(nonce_size), plain_path, enc_path,
+                                             size, buffers, **options))
+                median = sorted(runs, key=lambda r: r.elapsed)[len(runs) // 2]
+                results.append({'cipher': cipher, 'buffers': buffers, 'chunk_size': size,
+                                'mb_s': file_size / median.elapsed, 'result': median})
+    return results
+
+def format_disk_pipeline(results: List[Dict[str, Any]]) -> str:
+    """Bảng throughput và tỉ lệ bận của từng stage; stage bận nhất quyết định giới hạn I/O hay CPU"""
+    header = (f"{'Cipher':<9} | {'Buffer':>6} | {'Chunk KB':>8} | {'MB/s':>8} | "
+              + " | ".join(f"{stage:>6}" for stage in STAGES) + f" | {'Giới hạn':<10}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        result = r['result']
+        bound = 'CPU' if result.bottleneck == 'cipher' else f"I/O ({result.bottleneck})"
+        lines.append(f"{r['cipher']:<9} | {r['buffers']:>6} | {r['chunk_size'] // 1024:>8} | {r['mb_s']:>8.1f} | "
+                     + " | ".join(f"{result.stages[stage].utilization:>6.0%}" for stage in STAGES)
+                     + f" | {bound:<10}")
+    return "\n".join(lines)
+
+def plot_disk_pipeline(results: List[Dict[str, Any]], output_name: str = 'disk_pipeline.png'):
+    """Vẽ throughput theo số buffer và tỉ lệ bận của từng stage"""
+    # Import tại chỗ: matplotlib chiếm phần lớn thời gian khởi động module
+    import matplotlib.pyplot as plt
+    import numpy as np
+    plt.figure(figsize=(15, 6))
+
+    plt.subplot(1, 2, 1)
+    for cipher in dict.fromkeys(r['cipher'] for r in results):
+        rows = [r for r in results if r['cipher'] == cipher]
+        plt.plot([r['buffers'] for r in rows], [r['mb_s'] for r in rows], '-o', label=cipher)
+    plt.xlabel('Số buffer')
+    plt.ylabel('Throughput (MB/s)')
+    plt.title('Đĩa -> mã hóa -> đĩa')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+
+    plt.subplot(1, 2, 2)
+    positions = np.arange(len(results))
+    width = 0.8 / len(STAGES)
+    for i, stage in enumerate(STAGES):
+        plt.bar(positions + (i - 1) * width, [100 * r['result'].stages[stage].utilization for r in results],
+                width, label=stage)
+    plt.xticks(positions, [f"{r['cipher']}\n{r['buffers']} buf" for r in results], fontsize=8)
+    plt.ylabel('Thời gian bận (%)')
+    plt.title('Tỉ lệ bận của từng stage')
+    plt.legend()
+    plt.grid(True, alpha=0.3, axis='y')
+
+    plt.figtext(0.02, 0.02, format_system_info(get_system_info()), fontsize=8)
+    plt.tight_layout()
+    save_figure(plt, output_name)
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark pipeline đọc -> mã hóa -> ghi file trên đĩa")
+    parser.add_argument('--cipher', choices=tuple(CIPHERS) + ('all',), default='all')
+    parser.add_argument('--size', type=int, default=256, help="Kích thước file (MB)")
+    parser.add_argument('--buffers', type=parse_list, default=[1, 2, 3], help="Số buffer cần thử")
+    parser.add_argument('--chunk-size', type=int, help="Kích thước chunk (byte, mặc định theo autotune)")
+    parser.add_argument('--runs', type=int, default=3)
+    parser.add_argument('--work-dir', help="Thư mục chứa file tạm (nên nằm trên đĩa cần đo)")
+    parser.add_argument('--direct', action='store_true', help="Dùng O_DIRECT, bỏ qua page cache")
+    parser.add_argument('--no-fadvise', action='store_true', help="Không gọi posix_fadvise")
+    parser.add_argument('--no-fsync', action='store_true', help="Không đợi dữ liệu xuống đĩa")
+    parser.add_argument('--plot', action='store_true', help="Lưu biểu đồ vào data/disk_pipeline.png")
+    args = parser.parse_args(argv)
+
+    ciphers = tuple(CIPHERS) if args.cipher == 'all' else (args.cipher,)
+    results = benchmark_disk_pipeline(ciphers, args.size, args.buffers, args.chunk_size, args.runs,
+                                      args.work_dir, args.direct, not args.no_fadvise, not args.no_fsync)
+    print(format_disk_pipeline(results))
+    if args.plot:
+        plot_disk_pipeline(results)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
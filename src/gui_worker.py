@@ -0,0 +1,104 @@
+import queue
+import threading
+from typing import Any, Callable, List, Optional
+
+class BenchmarkCancelled(Exception):
+    """Benchmark bị người dùng hủy"""
+
+def sample_callback(progress: Optional[Callable[[dict], None]], size: int,
+                    operation: str) -> Optional[Callable[[float], None]]:
+    """Tạo hàm on_sample cho measure(), chuyển mỗi mẫu thành sự kiện 'sample' của progress"""
+    if progress is None:
+        return None
+    return lambda seconds: progress({'type': 'sample', 'size': size,
+                                     'operation': operation, 'seconds': seconds})
+
+class BenchmarkWorker:
+    """Chạy benchmark trong luồng nền, gửi sự kiện về luồng GUI qua queue
+
+    task(progress) là hàm benchmark nhận tham số progress. Mọi sự kiện progress được
+    đưa vào queue; khi kết thúc có thêm {'type': 'done', 'result'}, {'type': 'cancelled'}
+    hoặc {'type': 'error', 'error'}. Luồng GUI lấy sự kiện bằng poll() (vd. qua root.after),
+    nên Tk chỉ được gọi từ luồng chính. cancel() làm lần gọi progress kế tiếp raise
+    BenchmarkCancelled, nên benchmark dừng sau mẫu đang chạy.
+    """
+
+    def __init__(self, task: Callable[[Callable[[dict], None]], Any]):
+        self._task = task
+        self._events: queue.Queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='benchmark-worker', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _progress(self, event: dict):
+        if self._cancel.is_set():
+            raise BenchmarkCancelled()
+        self._events.put(event)
+
+    def _run(self):
+        try:
+            result = self._task(self._progress)
+        except BenchmarkCancelled:
+            self._events.put({'type': 'cancelled'})
+        except Exception as e:
+            self._events.put({'type': 'error', 'error': e})
+        else:
+            self._events.put({'type': 'done', 'result': result})
+
+    def cancel(self):
+        self._cancel.set()
+
+    def is_running(self) -> bool:
+        return self._thread.is_alive()
+
+    def poll(self) -> List[dict]:
+        """Lấy mọi sự kiện đang chờ mà không chặn"""
+        events = []
+        while True:
+            try:
+                events.append(self._events.get_nowait())
+            except queue.Empty:
+                return events
+
+class LiveThroughputChart:
+    """Biểu đồ throughput nhúng trong Tk, cập nhật khi từng kích thước có kết quả
+
+    Dùng matplotlib.figure.Figure trực tiếp (không qua pyplot) để vẽ an toàn trong cửa sổ Tk.
+    """
+
+    def __init__(self, parent):
+        # Import tại chỗ: chỉ GUI cần matplotlib/Tk
+        from matplotlib.figure import Figure
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        self._figure = Figure(figsize=(7, 2.6), dpi=100)
+        self._axes = self._figure.add_subplot(1, 1, 1)
+        self._canvas = FigureCanvasTkAgg(self._figure, master=parent)
+        self.widget = self._canvas.get_tk_widget()
+        self.clear()
+
+    def clear(self):
+        self._sizes: List[int] = []
+        self._encrypt: List[float] = []
+        self._decrypt: List[float] = []
+        self._draw()
+
+    def add(self, size: int, encrypt_mb_s: float, decrypt_mb_s: float):
+        self._sizes.append(size)
+        self._encrypt.append(encrypt_mb_s)
+        self._decrypt.append(decrypt_mb_s)
+        self._draw()
+
+    def _draw(self):
+        ax = self._axes
+        ax.clear()
+        if self._sizes:
+            ax.plot(self._sizes, self._encrypt, 'b-o', label='Encryption')
+            ax.plot(self._sizes, self._decrypt, 'r-o', label='Decryption')
+            ax.legend(fontsize=8)
+        ax.set_xlabel('Kích thước file (MB)')
+        ax.set_ylabel('MB/s (median)')
+        ax.grid(True, alpha=0.3)
+        self._figure.tight_layout()
+        self._canvas.draw_idle()
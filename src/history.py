@@ -0,0 +1,278 @@
+"""Lưu lịch sử benchmark vào SQLite, phát hiện hồi quy và vẽ xu hướng
+
+Ví dụ:
+    python cli.py --sizes 1,10 --history                   # chạy và lưu vào lịch sử
+    python history.py runs                                 # liệt kê các lần chạy
+    python history.py compare --baseline a1b2c3d           # so sánh HEAD hiện tại với baseline
+    python history.py trend --cipher aes-ctr --size 10     # vẽ xu hướng throughput
+"""
+import os
+import sys
+import json
+import socket
+import sqlite3
+import argparse
+import subprocess
+from statistics import median
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from system_info import get_system_info, hardware_fingerprint
+from timing import TimingStats, mann_whitney_u
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_DB = os.path.join(REPO_DIR, "data", "benchmark_history.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    timestamp TEXT NOT NULL,
+    host TEXT NOT NULL,
+    fingerprint TEXT NOT NULL,
+    git_revision TEXT NOT NULL,
+    system TEXT NOT NULL,
+    config TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    cipher TEXT NOT NULL,
+    backend TEXT NOT NULL,
+    use_aesni INTEGER,
+    output_mode TEXT NOT NULL,
+    size_mb INTEGER NOT NULL,
+    operation TEXT NOT NULL,
+    median REAL NOT NULL,
+    stats TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS results_key ON results (cipher, backend, size_mb, operation);
+"""
+
+def host_fingerprint() -> str:
+    """Vân tay host: tên máy và vân tay phần cứng"""
+    return f"{socket.gethostname()}:{hardware_fingerprint()}"
+
+def git_revision(repo_dir: str = REPO_DIR) -> str:
+    """Commit hiện tại (rút gọn), thêm '-dirty' nếu cây làm việc có thay đổi; 'unknown' nếu không có git"""
+    try:
+        revision = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=repo_dir, check=True,
+                                  capture_output=True, text=True).stdout.strip()
+        dirty = subprocess.run(['git', 'diff', '--quiet', 'HEAD'], cwd=repo_dir).returncode != 0
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+    return revision + ('-dirty' if dirty else '')
+
+def resolve_revision(rev: str, repo_dir: str = REPO_DIR) -> Optional[str]:
+    """SHA đầy đủ của commit rev (SHA rút gọn, nhánh, tag); None nếu git không phân giải được"""
+    if rev.startswith('-') or rev.endswith('-dirty'):
+        return None
+    try:
+        result = subprocess.run(['git', 'rev-parse', '--verify', '--quiet', rev + '^{commit}'],
+                                cwd=repo_dir, capture_output=True, text=True)
+    except OSError:
+        return None
+    return result.stdout.strip() if result.returncode == 0 else None
+
+class HistoryStore:
+    """Kho lịch sử benchmark trong SQLite
+
+    Mỗi lần chạy (run) lưu host, vân tay phần cứng, git revision, thông tin hệ thống và cấu hình;
+    mỗi kết quả lưu khóa (cipher, backend, kích thước, thao tác) cùng toàn bộ TimingStats (gồm mẫu thô).
+    """
+
+    def __init__(self, path: str = DEFAULT_DB):
+        if path != ':memory:':
+            os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._conn = sqlite3.connect(path)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.executescript(SCHEMA)
+
+    def record(self, records: List[Dict[str, Any]], system_info: Optional[dict] = None,
+               config: Optional[dict] = None, git_rev: Optional[str] = None) -> int:
+        """Thêm một lần chạy (danh sách bản ghi như cli.run_benchmark trả về), trả về run id"""
+        if system_info is None:
+            system_info = get_system_info()
+        with self._conn:
+            cursor = self._conn.execute(
+                "INSERT INTO runs (timestamp, host, fingerprint, git_revision, system, config) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (datetime.now(timezone.utc).isoformat(timespec='seconds'), socket.gethostname(),
+                 host_fingerprint(), git_rev or git_revision(), json.dumps(system_info),
+                 json.dumps(config or {})))
+            run_id = cursor.lastrowid
+            self._conn.executemany(
+                "INSERT INTO results (run_id, cipher, backend, use_aesni, output_mode, size_mb, operation, "
+                "median, stats) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, r['cipher'], r['backend'], r['use_aesni'], r['output_mode'], r['size_mb'],
+                  r['operation'], r['stats'].median, json.dumps(r['stats']._asdict())) for r in records])
+        return run_id
+
+    def runs(self) -> List[Dict[str, Any]]:
+        """Danh sách các lần chạy, cũ nhất trước"""
+        rows = self._conn.execute(
+            "SELECT id, timestamp, host, fingerprint, git_revision FROM runs ORDER BY id").fetchall()
+        return [dict(row) for row in rows]
+
+    def results(self, cipher: Optional[str] = None, backend: Optional[str] = None,
+                size_mb: Optional[int] = None, operation: Optional[str] = None,
+                fingerprint: Optional[str] = None, git_rev: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Các kết quả khớp bộ lọc theo thứ tự lần chạy
+
+        git_rev khớp chính xác revision đã lưu; nếu git phân giải được git_rev thành một commit
+        (SHA rút gọn, nhánh, tag) thì khớp thêm các SHA rút gọn đã lưu của commit đó.
+        Các lần chạy '-dirty' chỉ được chọn khi git_rev ghi rõ hậu tố '-dirty'.
+        """
+        query = ("SELECT r.*, runs.timestamp, runs.fingerprint, runs.git_revision "
+                 "FROM results r JOIN runs ON runs.id = r.run_id WHERE 1 = 1")
+        params: list = []
+        for column, value in [('r.cipher', cipher), ('r.backend', backend), ('r.size_mb', size_mb),
+                              ('r.operation', operation), ('runs.fingerprint', fingerprint)]:
+            if value is not None:
+                query += f" AND {column} = ?"
+                params.append(value)
+        if git_rev is not None:
+            commit = resolve_revision(git_rev)
+            if commit is None:
+                query += " AND runs.git_revision = ?"
+                params.append(git_rev)
+            else:
+                # SHA rút gọn đã lưu là tiền tố của SHA đầy đủ; bản '-dirty' không bao giờ khớp
+                query += (" AND (runs.git_revision = ? OR (length(runs.git_revision) >= 4"
+                          " AND runs.git_revision = substr(?, 1, length(runs.git_revision))))")
+                params.extend([git_rev, commit])
+        rows = self._conn.execute(query + " ORDER BY r.run_id, r.id", params).fetchall()
+        results = []
+        for row in rows:
+            result = dict(row)
+            result['stats'] = TimingStats(**json.loads(result['stats']))
+            results.append(result)
+        return results
+
+    def close(self):
+        self._conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _group_samples(results: List[Dict[str, Any]]) -> Dict[tuple, List[float]]:
+    groups: Dict[tuple, List[float]] = {}
+    for r in results:
+        key = (r['cipher'], r['backend'], r['use_aesni'], r['output_mode'], r['size_mb'], r['operation'])
+        groups.setdefault(key, []).extend(r['stats'].samples)
+    return groups
+
+def compare(store: HistoryStore, baseline_rev: str, candidate_rev: Optional[str] = None,
+            fingerprint: Optional[str] = None, alpha: float = 0.05) -> List[Dict[str, Any]]:
+    """So sánh mẫu thời gian của candidate với baseline bằng kiểm định Mann-Whitney U một phía
+
+    Chỉ so sánh kết quả cùng host (mặc định: host hiện tại) và cùng khóa
+    (cipher, backend, AES-NI, chế độ output, kích thước, thao tác); mẫu của nhiều lần chạy
+    cùng revision được gộp lại. candidate_rev mặc định là revision hiện tại.
+    Raise ValueError nếu baseline hoặc candidate không có kết quả, hoặc hai bên không có khóa chung.
+    Returns:
+        Danh sách dict cho từng khóa: throughput hai bên, thay đổi (%), p_value, regression
+    """
+    if fingerprint is None:
+        fingerprint = host_fingerprint()
+    if candidate_rev is None:
+        candidate_rev = git_revision()
+    baseline = _group_samples(store.results(fingerprint=fingerprint, git_rev=baseline_rev))
+    candidate = _group_samples(store.results(fingerprint=fingerprint, git_rev=candidate_rev))
+    if not baseline:
+        raise ValueError(f"Không có kết quả cho baseline {baseline_rev} trên host này")
+    if not candidate:
+        raise ValueError(f"Không có kết quả cho candidate {candidate_rev} trên host này")
+    common = set(baseline) & set(candidate)
+    if not common:
+        raise ValueError(f"Baseline {baseline_rev} và candidate {candidate_rev} không có kết quả cùng "
+                         "cấu hình (cipher, backend, AES-NI, chế độ output, kích thước, thao tác) để so sánh")
+
+    comparisons = []
+    for key in sorted(common, key=str):
+        size = key[4]
+        base_mb_s = size / median(baseline[key])
+        cand_mb_s = size / median(candidate[key])
+        # Hồi quy: thời gian của candidate lớn hơn baseline một cách có ý nghĩa
+        _, p_value = mann_whitney_u(candidate[key], baseline[key])
+        comparisons.append({
+            'cipher': key[0], 'backend': key[1], 'use_aesni': key[2], 'output_mode': key[3],
+            'size_mb': size, 'operation': key[5],
+            'baseline_mb_s': base_mb_s, 'candidate_mb_s': cand_mb_s,
+            'change_pct': (cand_mb_s / base_mb_s - 1) * 100, 'p_value': p_value,
+            'regression': p_value < alpha,
+        })
+    return comparisons
+
+def format_comparison(comparisons: List[Dict[str, Any]]) -> str:
+    """Bảng so sánh throughput baseline/candidate, đánh dấu hồi quy"""
+    header = (f"{'Cipher':<9} | {'Backend':<12} | {'Size':>5} | {'Thao tác':<8} | {'Baseline':>9} | "
+              f"{'Candidate':>9} | {'Δ (%)':>7} | {'p':>7} |")
+    lines = [header, "-" * len(header)]
+    for c in comparisons:
+        lines.append(f"{c['cipher']:<9} | {c['backend']:<12} | {c['size_mb']:>5} | {c['operation']:<8} | "
+                     f"{c['baseline_mb_s']:>9.1f} | {c['candidate_mb_s']:>9.1f} | {c['change_pct']:>+7.1f} | "
+                     f"{c['p_value']:>7.4f} | {'HỒI QUY' if c['regression'] else ''}")
+    return "\n".join(lines)
+
+def plot_trend(store: HistoryStore, cipher: str, size_mb: int, backend: str = 'pycryptodome',
+               fingerprint: Optional[str] = None, output_name: Optional[str] = None):
+    """Vẽ xu hướng thời gian/throughput theo các lần chạy bằng plot_results của cipher tương ứng"""
+    if cipher == 'aes-ctr':
+        from aes_ctr_benchmark import plot_results
+    elif cipher == 'chacha20':
+        from chacha20_benchmark import plot_results
+    else:
+        raise ValueError(f"Cipher không hợp lệ: {cipher}")
+    if fingerprint is None:
+        fingerprint = host_fingerprint()
+
+    by_run: Dict[int, Dict[str, TimingStats]] = {}
+    for r in store.results(cipher, backend, size_mb, fingerprint=fingerprint):
+        by_run.setdefault(r['run_id'], {})[r['operation']] = r['stats']
+    runs = [run_id for run_id, ops in by_run.items() if 'encrypt' in ops and 'decrypt' in ops]
+    if not runs:
+        raise ValueError("Không có dữ liệu lịch sử phù hợp để vẽ xu hướng")
+
+    if output_name is None:
+        output_name = f"{cipher.replace('-', '_')}_{backend}_{size_mb}mb_trend.png"
+    plot_results([size_mb] * len(runs),
+                 [by_run[run_id]['encrypt'] for run_id in runs],
+                 [by_run[run_id]['decrypt'] for run_id in runs],
+                 output_name=output_name, x_values=runs, x_label='Lần chạy (run id)')
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Lịch sử benchmark: liệt kê, so sánh, vẽ xu hướng")
+    parser.add_argument('--db', default=DEFAULT_DB, help="File SQLite lịch sử")
+    commands = parser.add_subparsers(dest='command', required=True)
+    commands.add_parser('runs', help="Liệt kê các lần chạy")
+    compare_parser = commands.add_parser('compare', help="Phát hiện hồi quy so với baseline")
+    compare_parser.add_argument('--baseline', required=True, help="Git revision baseline (SHA, nhánh hoặc tag; thêm -dirty để chọn cây chưa commit)")
+    compare_parser.add_argument('--candidate', help="Git revision cần kiểm tra (mặc định: hiện tại)")
+    compare_parser.add_argument('--alpha', type=float, default=0.05)
+    trend_parser = commands.add_parser('trend', help="Vẽ xu hướng theo các lần chạy")
+    trend_parser.add_argument('--cipher', choices=('aes-ctr', 'chacha20'), required=True)
+    trend_parser.add_argument('--size', type=int, required=True, help="Kích thước file (MB)")
+    trend_parser.add_argument('--backend', default='pycryptodome')
+    args = parser.parse_args(argv)
+
+    with HistoryStore(args.db) as store:
+        if args.command == 'runs':
+            for run in store.runs():
+                print(f"{run['id']:>5}  {run['timestamp']}  {run['git_revision']:<16} {run['host']}")
+        elif args.command == 'compare':
+            try:
+                comparisons = compare(store, args.baseline, args.candidate, alpha=args.alpha)
+            except ValueError as e:
+                print(f"Lỗi: {str(e)}", file=sys.stderr)
+                return 2
+            print(format_comparison(comparisons))
+            # Mã thoát 1 khi có hồi quy để dùng được trong CI
+            return 1 if any(c['regression'] for c in comparisons) else 0
+        else:
+            plot_trend(store, args.cipher, args.size, args.backend)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
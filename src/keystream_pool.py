@@ -0,0 +1,164 @@
+import os
+import threading
+import tracemalloc
+from time import perf_counter_ns, sleep
+from typing import Any, Callable, Dict, Optional, Tuple
+import numpy as np
+from parallel import cipher_at
+
+DEFAULT_CAPACITY = 4 * 1024 * 1024   # Dung lượng ring buffer (byte)
+DEFAULT_CHUNK_SIZE = 64 * 1024       # Mỗi lần worker sinh thêm bao nhiêu keystream
+
+class KeystreamPool:
+    """Sinh trước keystream của một cặp (key, nonce) vào ring buffer bằng luồng nền
+
+    Keystream không phụ thuộc bản rõ, nên worker sinh sẵn các đoạn counter tiếp theo;
+    khi mã hóa chỉ còn XOR với keystream đã có. Mỗi thông điệp nhận một đoạn keystream
+    liên tiếp và vị trí byte của đoạn đó để bên nhận giải mã bằng cipher_at(..., decrypt=True).
+    new_cipher(initial_block) trả về cipher có counter bắt đầu tại initial_block.
+    """
+
+    def __init__(self, new_cipher: Callable[[int], Any], capacity: int = DEFAULT_CAPACITY,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        if chunk_size <= 0 or capacity % chunk_size:
+            raise ValueError("capacity phải là bội số dương của chunk_size")
+        self.capacity = capacity
+        self.chunk_size = chunk_size
+        self._cipher = new_cipher(0)
+        self._ring = np.zeros(capacity, dtype=np.uint8)
+        self._zeros = bytes(chunk_size)
+        self._produced = 0   # Vị trí byte đã sinh keystream tới
+        self._consumed = 0   # Vị trí byte đã cấp cho thông điệp tới
+        self._cond = threading.Condition()
+        self._closed = False
+        self.waits = 0       # Số lần mã hóa phải chờ worker (pool cạn)
+        self._worker = threading.Thread(target=self._produce, name='keystream-pool', daemon=True)
+        self._worker.start()
+
+    def _produce(self):
+        ring = memoryview(self._ring)
+        while True:
+            with self._cond:
+                while not self._closed and self._produced - self._consumed > self.capacity - self.chunk_size:
+                    self._cond.wait()
+                if self._closed:
+                    return
+                start = self._produced % self.capacity
+            # Sinh keystream ngoài lock: vùng này chưa được cấp cho thông điệp nào
+            self._cipher.encrypt(self._zeros, output=ring[start:start + self.chunk_size])
+            with self._cond:
+                self._produced += self.chunk_size
+                self._cond.notify_all()
+
+    def encrypt(self, data: bytes, output: Optional[bytearray] = None) -> Tuple[bytes, int]:
+        """Mã hóa data bằng keystream đã sinh sẵn
+
+        Returns:
+            ciphertext: Bản mã (hoặc output nếu được truyền vào)
+            position: Vị trí byte của keystream đã dùng, cần để giải mã
+        """
+        length = len(data)
+        if length > self.capacity:
+            raise ValueError("Thông điệp lớn hơn dung lượng pool")
+        src = np.frombuffer(data, dtype=np.uint8)
+        result = np.empty(length, dtype=np.uint8) if output is None else np.frombuffer(output, dtype=np.uint8)
+        with self._cond:
+            if self._produced - self._consumed < length:
+                self.waits += 1
+                while self._produced - self._consumed < length:
+                    self._cond.wait()
+            position = self._consumed
+            start = position % self.capacity
+            first = min(length, self.capacity - start)
+            np.bitwise_xor(src[:first], self._ring[start:start + first], out=result[:first])
+            if first < length:
+                # Đoạn keystream vòng qua cuối ring buffer
+                np.bitwise_xor(src[first:], self._ring[:length - first], out=result[first:])
+            self._consumed += length
+            self._cond.notify_all()
+        return (result.tobytes() if output is None else output), position
+
+    def available(self) -> int:
+        """Số byte keystream đang sẵn sàng"""
+        with self._cond:
+            return self._produced - self._consumed
+
+    def memory_overhead(self) -> int:
+        """Bộ nhớ pool giữ thêm (byte): ring buffer và chunk 0 dùng để sinh keystream"""
+        return self._ring.nbytes + len(self._zeros)
+
+    def close(self):
+        """Dừng worker nền"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def _latency_percentiles(values_ns: list) -> Dict[str, float]:
+    p50, p99 = np.percentile(values_ns, [50, 99])
+    return {'p50': float(p50) / 1e9, 'p99': float(p99) / 1e9}
+
+def benchmark_keystream_pool(new_cipher: Callable[[bytes], Callable[[int], Any]], nonce_size: int,
+                             block_size: int, message_size: int = 256, burst_size: int = 200,
+                             num_bursts: int = 50, idle_time: float = 0.005,
+                             capacity: int = DEFAULT_CAPACITY,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE) -> Dict[str, Any]:
+    """Đo độ trễ thông điệp nhỏ theo từng đợt (burst) có và không có keystream pool
+
+    new_cipher(nonce) trả về factory initial_block -> cipher. Giữa các đợt nghỉ
+    idle_time giây, cho worker kịp bù keystream. Ba chế độ được so sánh:
+    'direct': tạo cipher tại vị trí counter của từng thông điệp (không pool),
+    'stream': dùng lại một cipher chạy liên tục, 'pool': XOR với keystream sinh sẵn.
+    Returns:
+        Dict độ trễ p50/p99 (giây) theo chế độ, số lần pool cạn và bộ nhớ pool dùng thêm
+    """
+    nonce = os.urandom(nonce_size)
+    factory = new_cipher(nonce)
+    messages = [os.urandom(message_size) for _ in range(burst_size)]
+    output = bytearray(message_size)
+
+    def run_bursts(encrypt_one: Callable[[bytes, int], Any]) -> list:
+        latencies = []
+        position = 0
+        for _ in range(num_bursts):
+            for message in messages:
+                start = perf_counter_ns()
+                encrypt_one(message, position)
+                latencies.append(perf_counter_ns() - start)
+                position += message_size
+            sleep(idle_time)
+        return latencies
+
+    results = {}
+    results['direct'] = _latency_percentiles(run_bursts(
+        lambda message, position: cipher_at(factory, block_size, position).encrypt(message, output=output)))
+
+    stream = factory(0)
+    results['stream'] = _latency_percentiles(run_bursts(
+        lambda message, position: stream.encrypt(message, output=output)))
+
+    tracemalloc.start()
+    baseline = tracemalloc.get_traced_memory()[0]
+    pool = KeystreamPool(factory, capacity, chunk_size)
+    allocated = tracemalloc.get_traced_memory()[1] - baseline
+    tracemalloc.stop()
+    try:
+        # Kiểm tra bản mã từ pool giải mã đúng tại vị trí được trả về
+        ciphertext, position = pool.encrypt(messages[0])
+        assert cipher_at(factory, block_size, position, decrypt=True).decrypt(ciphertext) == messages[0], \
+            "Lỗi: Bản mã từ pool không giải mã đúng!"
+        sleep(idle_time)
+        results['pool'] = _latency_percentiles(run_bursts(
+            lambda message, position: pool.encrypt(message, output=output)))
+        results['pool_waits'] = pool.waits
+        results['pool_memory_bytes'] = pool.memory_overhead()
+        results['pool_traced_bytes'] = allocated
+    finally:
+        pool.close()
+    return results
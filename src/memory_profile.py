@@ -0,0 +1,122 @@
+import re
+import sys
+import tracemalloc
+from contextlib import contextmanager
+from typing import Dict, List, NamedTuple
+try:
+    import resource  # Không có trên Windows
+except ImportError:
+    resource = None
+
+# Thứ tự các phase trong benchmark_aes_ctr / benchmark_chacha20
+PHASES = ('data', 'setup', 'encrypt', 'decrypt', 'verify')
+
+class MemoryStats(NamedTuple):
+    """Bộ nhớ của một phase (byte / số lần)"""
+    peak_rss: int          # RSS đỉnh trong phase (VmHWM sau khi reset); 0 nếu không đo được
+    traced_peak: int       # Đỉnh bộ nhớ Python cấp phát mới trong phase (tracemalloc)
+    allocated_blocks: int  # Số block còn sống được cấp phát thêm trong phase (sys.getallocatedblocks)
+    minor_faults: int      # Page fault không cần I/O
+    major_faults: int      # Page fault phải đọc từ đĩa
+
+def _reset_peak_rss() -> bool:
+    """Đặt lại VmHWM của tiến trình (Linux), trả về False nếu không hỗ trợ"""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+def _peak_rss(reset_ok: bool) -> int:
+    if reset_ok:
+        try:
+            with open('/proc/self/status') as f:
+                match = re.search(r'VmHWM:\s+(\d+) kB', f.read())
+            if match:
+                return int(match.group(1)) * 1024
+        except OSError:
+            pass
+    if resource is None:
+        return 0
+    # ru_maxrss là đỉnh của cả tiến trình: KB trên Linux, byte trên macOS
+    maxrss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return maxrss if sys.platform == 'darwin' else maxrss * 1024
+
+def _faults() -> tuple:
+    if resource is None:
+        return 0, 0
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    return usage.ru_minflt, usage.ru_majflt
+
+class MemoryTracker:
+    """Đo bộ nhớ theo phase bằng context manager phase(name)
+
+    enabled=False: phase() không làm gì, để benchmark giữ một đường code duy nhất.
+    tracemalloc chỉ bật trong phase, nên không được dùng quanh vùng đo thời gian.
+    Gọi nhiều lần cùng một phase thì lấy đỉnh lớn nhất và cộng dồn các bộ đếm.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self.phases: Dict[str, MemoryStats] = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        if not self.enabled:
+            yield
+            return
+        was_tracing = tracemalloc.is_tracing()
+        if not was_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        traced_start = tracemalloc.get_traced_memory()[0]
+        blocks_start = sys.getallocatedblocks()
+        minor_start, major_start = _faults()
+        reset_ok = _reset_peak_rss()
+        try:
+            yield
+        finally:
+            peak_rss = _peak_rss(reset_ok)
+            minor_end, major_end = _faults()
+            blocks = sys.getallocatedblocks() - blocks_start
+            traced_peak = tracemalloc.get_traced_memory()[1] - traced_start
+            if not was_tracing:
+                tracemalloc.stop()
+            stats = MemoryStats(peak_rss, traced_peak, blocks, minor_end - minor_start, major_end - major_start)
+            previous = self.phases.get(name)
+            if previous is not None:
+                stats = MemoryStats(max(previous.peak_rss, stats.peak_rss),
+                                    max(previous.traced_peak, stats.traced_peak),
+                                    previous.allocated_blocks + stats.allocated_blocks,
+                                    previous.minor_faults + stats.minor_faults,
+                                    previous.major_faults + stats.major_faults)
+            self.phases[name] = stats
+
+def format_memory(file_sizes: List[int], memory: List[Dict[str, MemoryStats]]) -> str:
+    """Bảng bộ nhớ theo kích thước và phase: RSS đỉnh, tracemalloc đỉnh (MB), số block, page fault"""
+    header = (f"{'Size (MB)':>9} | {'Phase':<8} | {'RSS đỉnh (MB)':>13} | {'Python đỉnh (MB)':>16} | "
+              f"{'Blocks':>8} | {'Minor PF':>9} | {'Major PF':>8}")
+    lines = [header, "-" * len(header)]
+    for size, phases in zip(file_sizes, memory):
+        for name in PHASES:
+            if name in phases:
+                m = phases[name]
+                lines.append(f"{size:>9} | {name:<8} | {m.peak_rss / 1024 / 1024:>13.1f} | "
+                             f"{m.traced_peak / 1024 / 1024:>16.1f} | {m.allocated_blocks:>8} | "
+                             f"{m.minor_faults:>9} | {m.major_faults:>8}")
+    return "\n".join(lines)
+
+def plot_memory(x_values: list, memory: List[Dict[str, MemoryStats]], x_label: str = 'Kích thước file (MB)'):
+    """Vẽ RSS đỉnh (nét liền) và tracemalloc đỉnh (nét đứt) theo phase vào subplot hiện tại"""
+    import matplotlib.pyplot as plt
+    for name in PHASES:
+        if all(name in phases for phases in memory):
+            line, = plt.plot(x_values, [p[name].peak_rss / 1024 / 1024 for p in memory], '-o', label=f'{name} (RSS)')
+            plt.plot(x_values, [p[name].traced_peak / 1024 / 1024 for p in memory], '--',
+                     color=line.get_color(), alpha=0.6)
+    plt.xlabel(x_label)
+    plt.ylabel('Bộ nhớ đỉnh (MB)')
+    plt.title('Bộ nhớ theo phase (liền: RSS, đứt: tracemalloc)')
+    plt.legend(fontsize=8)
+    plt.grid(True)
@@ -0,0 +1,98 @@
+import os
+from time import perf_counter_ns
+from typing import Any, Callable, List, NamedTuple
+import numpy as np
+
+DEFAULT_MESSAGE_SIZES = [64, 256, 1024, 4096, 16384]  # byte
+
+class MessageRateResult(NamedTuple):
+    """Kết quả đo tốc độ thông điệp nhỏ cho một kích thước và một chế độ"""
+    size: int             # Kích thước thông điệp (byte)
+    mode: str             # 'fresh': cipher mới cho mỗi thông điệp, 'reuse': dùng lại một cipher
+    ops_per_sec: float    # Số thông điệp mỗi giây (đo trên cả lô, không đo từng thông điệp)
+    setup_p50: float      # Thời gian khởi tạo cipher (giây)
+    setup_p99: float
+    encrypt_p50: float    # Thời gian encrypt (giây)
+    encrypt_p99: float
+    total_p50: float      # Khởi tạo + encrypt (giây); reuse: khởi tạo chia đều cho mỗi thông điệp
+    total_p99: float
+
+def _percentiles(values_ns: List[int]) -> tuple:
+    p50, p99 = np.percentile(values_ns, [50, 99])
+    return float(p50) / 1e9, float(p99) / 1e9
+
+def benchmark_message_rate(new_cipher: Callable[[bytes], Any], nonce_size: int,
+                           message_sizes: List[int] = DEFAULT_MESSAGE_SIZES,
+                           num_messages: int = 10000, warmup: int = 1000) -> List[MessageRateResult]:
+    """Đo độ trễ và số thông điệp mỗi giây với thông điệp nhỏ
+
+    new_cipher(nonce) trả về cipher mới. Với mỗi kích thước đo hai chế độ:
+    'fresh' tạo cipher mới cho từng thông điệp (tính cả chi phí khởi tạo),
+    'reuse' tạo một cipher rồi mã hóa liên tiếp các thông điệp trên cùng keystream.
+    """
+    results = []
+    for size in message_sizes:
+        messages = [os.urandom(size) for _ in range(num_messages)]
+        nonces = [os.urandom(nonce_size) for _ in range(num_messages)]
+
+        # Làm nóng cache và bộ cấp phát
+        for i in range(min(warmup, num_messages)):
+            new_cipher(nonces[i]).encrypt(messages[i])
+
+        # fresh: đo riêng từng thông điệp, tách khởi tạo và encrypt
+        setup_ns = []
+        encrypt_ns = []
+        for nonce, message in zip(nonces, messages):
+            t0 = perf_counter_ns()
+            cipher = new_cipher(nonce)
+            t1 = perf_counter_ns()
+            cipher.encrypt(message)
+            t2 = perf_counter_ns()
+            setup_ns.append(t1 - t0)
+            encrypt_ns.append(t2 - t1)
+        total_ns = [s + e for s, e in zip(setup_ns, encrypt_ns)]
+
+        # ops/sec đo trên cả lô để không cộng chi phí gọi timer vào từng thông điệp
+        start = perf_counter_ns()
+        for nonce, message in zip(nonces, messages):
+            new_cipher(nonce).encrypt(message)
+        ops_per_sec = num_messages / ((perf_counter_ns() - start) / 1e9)
+        results.append(MessageRateResult(size, 'fresh', ops_per_sec,
+                                         *_percentiles(setup_ns), *_percentiles(encrypt_ns),
+                                         *_percentiles(total_ns)))
+
+        # reuse: một cipher cho tất cả thông điệp, chi phí khởi tạo chia đều
+        t0 = perf_counter_ns()
+        cipher = new_cipher(nonces[0])
+        reuse_setup = (perf_counter_ns() - t0) / 1e9
+        encrypt_ns = []
+        for message in messages:
+            t1 = perf_counter_ns()
+            cipher.encrypt(message)
+            encrypt_ns.append(perf_counter_ns() - t1)
+
+        cipher = new_cipher(nonces[0])
+        start = perf_counter_ns()
+        for message in messages:
+            cipher.encrypt(message)
+        ops_per_sec = num_messages / ((perf_counter_ns() - start) / 1e9)
+        # total gồm phần khởi tạo chia đều cho mỗi thông điệp, so sánh được với total của fresh
+        amortized_ns = reuse_setup * 1e9 / num_messages
+        total_ns = [e + amortized_ns for e in encrypt_ns]
+        results.append(MessageRateResult(size, 'reuse', ops_per_sec,
+                                         reuse_setup / num_messages, reuse_setup / num_messages,
+                                         *_percentiles(encrypt_ns), *_percentiles(total_ns)))
+    return results
+
+def format_message_rate(results: List[MessageRateResult]) -> str:
+    """Bảng ops/sec và độ trễ p50/p99 (µs) cho kết quả benchmark_message_rate"""
+    header = (f"{'Size (B)':>9} | {'Mode':>6} | {'ops/sec':>12} | {'setup p50/p99':>15} | "
+              f"{'encrypt p50/p99':>15} | {'total p50/p99':>15}")
+    lines = [header, "-" * len(header)]
+    for r in results:
+        lines.append(
+            f"{r.size:>9} | {r.mode:>6} | {r.ops_per_sec:>12,.0f} | "
+            f"{r.setup_p50 * 1e6:>6.2f}/{r.setup_p99 * 1e6:>8.2f} | "
+            f"{r.encrypt_p50 * 1e6:>6.2f}/{r.encrypt_p99 * 1e6:>8.2f} | "
+            f"{r.total_p50 * 1e6:>6.2f}/{r.total_p99 * 1e6:>8.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,44 @@
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+# alloc: mỗi lần gọi cipher cấp phát buffer kết quả mới (hành vi mặc định)
+# preallocated: ghi vào bytearray cấp phát sẵn do người gọi cung cấp
+# inplace: mã hóa/giải mã tại chỗ trên chính buffer dữ liệu
+OUTPUT_MODES = ('alloc', 'preallocated', 'inplace')
+
+def prepare_buffers(data: bytes, output_mode: str) -> Tuple[Optional[bytearray], Optional[bytearray]]:
+    """Chuẩn bị buffer mã hóa/giải mã cho output_mode
+
+    Buffer được ghi một lần trước khi đo để các page đã được map sẵn,
+    tránh tính page fault vào thời gian của lần chạy đầu.
+    Returns:
+        enc_buf: Buffer nhận bản mã (None với chế độ alloc)
+        dec_buf: Buffer nhận bản rõ (None với chế độ alloc, trùng enc_buf với inplace)
+    """
+    if output_mode == 'alloc':
+        return None, None
+    if output_mode == 'preallocated':
+        return bytearray(data), bytearray(data)
+    if output_mode == 'inplace':
+        buf = bytearray(data)
+        return buf, buf
+    raise ValueError(f"Chế độ output không hợp lệ: {output_mode} (hỗ trợ: {', '.join(OUTPUT_MODES)})")
+
+def compare_output_modes(benchmark: Callable, file_sizes: List[int], num_runs: int = 10,
+                         modes: Sequence[str] = ('alloc', 'preallocated')) -> Dict[str, tuple]:
+    """Chạy benchmark(file_sizes, num_runs, output_mode=...) cho từng chế độ output"""
+    return {mode: benchmark(file_sizes, num_runs, output_mode=mode) for mode in modes}
+
+def format_output_modes(file_sizes: List[int], results: Dict[str, tuple]) -> str:
+    """Bảng throughput (MB/s, theo median) mã hóa/giải mã của các chế độ output đặt cạnh nhau"""
+    modes = list(results)
+    header = f"{'Size (MB)':>10}"
+    for mode in modes:
+        header += f" | {'Enc ' + mode:>17} | {'Dec ' + mode:>17}"
+    lines = [header, "-" * len(header)]
+    for i, size in enumerate(file_sizes):
+        line = f"{size:>10}"
+        for mode in modes:
+            encrypt_stats, decrypt_stats = results[mode]
+            line += f" | {size / encrypt_stats[i].median:>17.2f} | {size / decrypt_stats[i].median:>17.2f}"
+        lines.append(line)
+    return "\n".join(lines)
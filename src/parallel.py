@@ -0,0 +1,156 @@
+import os
+from typing import Callable, List, Optional, Any, Union
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+from timing import measure
+from benchmark_core import save_figure
+
+Buffer = Union[bytes, bytearray, memoryview]
+
+def split_segments(length: int, block_size: int, num_segments: int) -> List[range]:
+    """Chia [0, length) thành các đoạn liên tiếp, mỗi điểm bắt đầu chia hết cho block_size
+
+    Nhờ đó đoạn bắt đầu tại byte start ứng với counter start // block_size.
+    """
+    if num_segments <= 0:
+        raise ValueError("Số đoạn phải lớn hơn 0")
+    num_blocks = -(-length // block_size)
+    blocks_per_segment = max(1, -(-num_blocks // num_segments))
+    step = blocks_per_segment * block_size
+    return [range(start, min(start + step, length)) for start in range(0, length, step)]
+
+def cipher_at(new_cipher: Callable[[int], Any], block_size: int, position: int,
+              decrypt: bool = False) -> Any:
+    """Trả về cipher có keystream đặt tại byte position (có thể nằm giữa block)
+
+    Counter được đặt tại block chứa position, phần keystream thừa đầu block bị bỏ qua.
+    decrypt=True nếu cipher sẽ được dùng để giải mã (AES-CTR không cho trộn encrypt/decrypt).
+    """
+    cipher = new_cipher(position // block_size)
+    skip = position % block_size
+    if skip:
+        (cipher.decrypt if decrypt else cipher.encrypt)(bytes(skip))
+    return cipher
+
+def _crypt_segment(new_cipher: Callable[[int], Any], decrypt: bool, block_size: int,
+                   src: memoryview, dst: memoryview, segment: range):
+    """Mã hóa/giải mã một đoạn với cipher đã đặt counter tại vị trí đầu đoạn"""
+    cipher = new_cipher(segment.start // block_size)
+    transform = cipher.decrypt if decrypt else cipher.encrypt
+    transform(src[segment.start:segment.stop], output=dst[segment.start:segment.stop])
+
+def _crypt_segment_shm(new_cipher: Callable[[int], Any], decrypt: bool, block_size: int,
+                       src_name: str, dst_name: str, segment: range):
+    """Phiên bản chạy trong process con: đọc/ghi trực tiếp trên shared memory"""
+    src_shm = shared_memory.SharedMemory(name=src_name)
+    dst_shm = shared_memory.SharedMemory(name=dst_name)
+    try:
+        with src_shm.buf as src, dst_shm.buf as dst:
+            _crypt_segment(new_cipher, decrypt, block_size, src, dst, segment)
+    finally:
+        src_shm.close()
+        dst_shm.close()
+
+def _parallel_crypt(new_cipher: Callable[[int], Any], data: Buffer, block_size: int,
+                    num_workers: Optional[int], output: Optional[Buffer],
+                    use_processes: bool, decrypt: bool) -> Buffer:
+    num_workers = num_workers or os.cpu_count() or 1
+    length = len(data)
+    if output is None:
+        output = bytearray(length)
+    elif len(output) != length:
+        raise ValueError("Buffer output phải có cùng kích thước với dữ liệu vào")
+    if length == 0:
+        return output
+
+    segments = split_segments(length, block_size, num_workers)
+
+    if not use_processes:
+        # Thread pool: pycryptodome nhả GIL trong lời gọi C nên các luồng chạy song song thật
+        with memoryview(data) as src, memoryview(output) as dst:
+            with ThreadPoolExecutor(max_workers=num_workers) as pool:
+                futures = [pool.submit(_crypt_segment, new_cipher, decrypt, block_size, src, dst, seg)
+                           for seg in segments]
+                for future in futures:
+                    future.result()
+        return output
+
+    # Process pool: dữ liệu vào/ra đặt trong shared memory, mỗi process xử lý một đoạn.
+    # new_cipher phải pickle được (vd. functools.partial của một hàm cấp module).
+    src_shm = shared_memory.SharedMemory(create=True, size=length)
+    dst_shm = shared_memory.SharedMemory(create=True, size=length)
+    try:
+        src_shm.buf[:length] = data
+        with ProcessPoolExecutor(max_workers=num_workers) as pool:
+            futures = [pool.submit(_crypt_segment_shm, new_cipher, decrypt, block_size,
+                                   src_shm.name, dst_shm.name, seg)
+                       for seg in segments]
+            for future in futures:
+                future.result()
+        memoryview(output)[:] = dst_shm.buf[:length]
+    finally:
+        src_shm.close()
+        src_shm.unlink()
+        dst_shm.close()
+        dst_shm.unlink()
+    return output
+
+def parallel_encrypt(new_cipher: Callable[[int], Any], data: Buffer, block_size: int,
+                     num_workers: Optional[int] = None, output: Optional[Buffer] = None,
+                     use_processes: bool = False) -> Buffer:
+    """Mã hóa song song bằng cách chia keystream theo offset của counter
+
+    new_cipher(initial_block) trả về cipher có counter bắt đầu tại block initial_block.
+    Kết quả giống hệt từng byte so với mã hóa tuần tự bằng new_cipher(0).
+    """
+    return _parallel_crypt(new_cipher, data, block_size, num_workers, output, use_processes, False)
+
+def parallel_decrypt(new_cipher: Callable[[int], Any], data: Buffer, block_size: int,
+                     num_workers: Optional[int] = None, output: Optional[Buffer] = None,
+                     use_processes: bool = False) -> Buffer:
+    """Giải mã song song, xem parallel_encrypt"""
+    return _parallel_crypt(new_cipher, data, block_size, num_workers, output, use_processes, True)
+
+def benchmark_parallel_scaling(new_cipher: Callable[[bytes], Callable[[int], Any]], nonce_size: int,
+                               block_size: int, size: int, worker_counts: List[int],
+                               num_runs: int = 5, use_processes: bool = False) -> List[float]:
+    """Đo throughput (MB/s) mã hóa song song theo số worker
+
+    new_cipher(nonce) trả về factory initial_block -> cipher.
+    Returns:
+        throughputs: Throughput (theo median thời gian) ứng với từng phần tử của worker_counts
+    """
+    data = os.urandom(size * 1024 * 1024)
+    output = bytearray(len(data))
+    throughputs = []
+
+    # Kiểm tra một lần rằng kết quả song song khớp với kết quả tuần tự
+    nonce = os.urandom(nonce_size)
+    serial = new_cipher(nonce)(0).encrypt(data)
+    for workers in worker_counts:
+        parallel_encrypt(new_cipher(nonce), data, block_size, workers, output, use_processes)
+        assert output == serial, f"Lỗi: Kết quả song song ({workers} worker) khác kết quả tuần tự!"
+    del serial
+
+    for workers in worker_counts:
+        # Mỗi lần gọi dùng nonce mới, factory được tạo ngoài vùng đo
+        stats = measure(lambda factory: parallel_encrypt(factory, data, block_size, workers, output, use_processes),
+                        lambda: new_cipher(os.urandom(nonce_size)), num_runs, warmup=1)
+        throughputs.append(size / stats.median)
+
+    return throughputs
+
+def plot_scaling(worker_counts: List[int], throughputs: dict, output_name: str):
+    """Vẽ biểu đồ throughput theo số worker, throughputs: nhãn -> danh sách MB/s"""
+    # Import tại chỗ: matplotlib chiếm phần lớn thời gian khởi động module
+    import matplotlib.pyplot as plt
+    plt.figure(figsize=(8, 6))
+    for label, values in throughputs.items():
+        plt.plot(worker_counts, values, '-o', label=label)
+    plt.xlabel('Số worker')
+    plt.ylabel('Throughput (MB/s)')
+    plt.title('Khả năng mở rộng theo số worker')
+    plt.legend()
+    plt.grid(True, alpha=0.3)
+    plt.tight_layout()
+    save_figure(plt, output_name)
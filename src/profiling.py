@@ -0,0 +1,138 @@
+import os
+import io
+import json
+import pstats
+import cProfile
+import threading
+from contextlib import contextmanager
+from time import perf_counter_ns
+from typing import Any, Callable, Dict, List, Optional
+
+# Kích thước (byte) mặc định: thông điệp nhỏ là nơi chi phí Python chiếm phần lớn
+DEFAULT_PROFILE_SIZES = [64, 1024, 16 * 1024, 1024 * 1024]
+
+class PhaseProfiler:
+    """Bộ đếm nanosecond theo phase, ghi sự kiện Chrome trace và cProfile tùy chọn
+
+    Dùng phase(name, **args) quanh từng bước; bộ đếm gộp theo (name, args['size']) nếu có.
+    use_cprofile=True: cProfile chạy giữa start() và stop() để xem hàm Python nào tốn thời gian.
+    Số sự kiện trace giữ lại được giới hạn bởi max_events; bộ đếm luôn đầy đủ.
+    """
+
+    def __init__(self, use_cprofile: bool = False, max_events: int = 100000):
+        self.counters: Dict[tuple, List[int]] = {}  # (phase, size) -> [count, total, min, max]
+        self.events: List[dict] = []
+        self.max_events = max_events
+        self._profile = cProfile.Profile() if use_cprofile else None
+        self._origin = perf_counter_ns()
+        self._pid = os.getpid()
+        self.overhead_ns = self._measure_overhead()
+
+    def _measure_overhead(self, rounds: int = 1000) -> int:
+        """Thời gian đo được của một phase rỗng (ns), để đọc các phase rất ngắn cho đúng"""
+        for _ in range(rounds):
+            with self.phase('_overhead'):
+                pass
+        count, total = self.counters.pop(('_overhead', None))[:2]
+        self.events.clear()
+        return total // count
+
+    def start(self):
+        if self._profile is not None:
+            self._profile.enable()
+
+    def stop(self):
+        if self._profile is not None:
+            self._profile.disable()
+
+    @contextmanager
+    def phase(self, name: str, **args: Any):
+        begin = perf_counter_ns()
+        try:
+            yield
+        finally:
+            elapsed = perf_counter_ns() - begin
+            key = (name, args.get('size'))
+            counter = self.counters.get(key)
+            if counter is None:
+                self.counters[key] = [1, elapsed, elapsed, elapsed]
+            else:
+                counter[0] += 1
+                counter[1] += elapsed
+                counter[2] = min(counter[2], elapsed)
+                counter[3] = max(counter[3], elapsed)
+            if len(self.events) < self.max_events:
+                self.events.append({'name': name, 'cat': 'benchmark', 'ph': 'X',
+                                    'ts': (begin - self._origin) / 1000, 'dur': elapsed / 1000,
+                                    'pid': self._pid, 'tid': threading.get_ident(), 'args': args})
+
+    def summary(self) -> List[Dict[str, Any]]:
+        """Bộ đếm theo (phase, size): số lần, tổng/trung bình/min/max (ns)"""
+        return [{'phase': name, 'size': size, 'count': c[0], 'total_ns': c[1],
+                 'mean_ns': c[1] / c[0], 'min_ns': c[2], 'max_ns': c[3]}
+                for (name, size), c in self.counters.items()]
+
+    def format_summary(self) -> str:
+        """Bảng thời gian trung bình mỗi phase theo kích thước, kèm tỉ lệ trong tổng"""
+        totals: Dict[Any, int] = {}
+        for (_, size), c in self.counters.items():
+            totals[size] = totals.get(size, 0) + c[1]
+        header = f"{'Size (B)':>9} | {'Phase':<11} | {'Lần':>7} | {'TB (ns)':>11} | {'Min (ns)':>9} | {'%':>5}"
+        lines = [header, "-" * len(header)]
+        for row in self.summary():
+            lines.append(f"{str(row['size']):>9} | {row['phase']:<11} | {row['count']:>7} | "
+                         f"{row['mean_ns']:>11.0f} | {row['min_ns']:>9} | "
+                         f"{row['total_ns'] / totals[row['size']] * 100:>5.1f}")
+        lines.append(f"(chi phí đo mỗi phase ≈ {self.overhead_ns} ns)")
+        return "\n".join(lines)
+
+    def write_chrome_trace(self, path: str):
+        """Ghi sự kiện dạng Chrome trace-event JSON (mở bằng chrome://tracing hoặc Perfetto)"""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'traceEvents': self.events, 'displayTimeUnit': 'ns'}, f)
+
+    def cprofile_stats(self, limit: int = 25, sort: str = 'cumulative') -> str:
+        """Bảng pstats của cProfile (rỗng nếu không bật use_cprofile)"""
+        if self._profile is None:
+            return ''
+        out = io.StringIO()
+        pstats.Stats(self._profile, stream=out).sort_stats(sort).print_stats(limit)
+        return out.getvalue()
+
+def profile_hot_loop(new_nonce: Callable[[], bytes], new_state: Optional[Callable[[bytes], Any]],
+                     new_cipher: Callable[[Any], Any], sizes: List[int], iterations: int,
+                     profiler: PhaseProfiler) -> PhaseProfiler:
+    """Chạy vòng mã hóa/giải mã của benchmark với từng bước được đo riêng
+
+    Các phase: 'nonce' (tạo nonce), 'counter' (new_state(nonce), ví dụ Counter.new; bỏ qua nếu None),
+    'cipher_new' (new_cipher(state), ví dụ AES.new/ChaCha20.new), 'encrypt', 'decrypt', 'verify'.
+    """
+    profiler.start()
+    try:
+        for size in sizes:
+            data = os.urandom(size)
+            for _ in range(iterations):
+                with profiler.phase('nonce', size=size):
+                    nonce = new_nonce()
+                state = nonce
+                if new_state is not None:
+                    with profiler.phase('counter', size=size):
+                        state = new_state(nonce)
+                with profiler.phase('cipher_new', size=size):
+                    cipher = new_cipher(state)
+                with profiler.phase('encrypt', size=size):
+                    encrypted = cipher.encrypt(data)
+
+                if new_state is not None:
+                    with profiler.phase('counter', size=size):
+                        state = new_state(nonce)
+                with profiler.phase('cipher_new', size=size):
+                    cipher = new_cipher(state)
+                with profiler.phase('decrypt', size=size):
+                    decrypted = cipher.decrypt(encrypted)
+                with profiler.phase('verify', size=size):
+                    ok = data == decrypted
+                assert ok, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+    finally:
+        profiler.stop()
+    return profiler
@@ -0,0 +1,107 @@
+import os
+import mmap
+import tempfile
+from typing import Any, Callable, Dict, List, Optional
+from parallel import cipher_at
+from streaming import create_random_file, encrypt_file
+from timing import measure
+
+class RangeReader:
+    """Giải mã ngẫu nhiên từng khoảng byte của file bản mã CTR/ChaCha20 qua mmap
+
+    Offset byte được đổi thành counter block (offset // block_size) và phần lẻ trong
+    block được bỏ qua, nên chỉ khoảng được yêu cầu được giải mã.
+    new_cipher(initial_block) trả về cipher có counter bắt đầu tại initial_block.
+    """
+
+    def __init__(self, path: str, new_cipher: Callable[[int], Any], block_size: int):
+        self._new_cipher = new_cipher
+        self._block_size = block_size
+        self._file = open(path, 'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self._view = memoryview(self._mmap) if self._mmap is not None else memoryview(b'')
+
+    def _clamp(self, offset: int, length: int) -> int:
+        if offset < 0 or length < 0:
+            raise ValueError("Offset và độ dài phải không âm")
+        return max(0, min(length, self.size - offset))
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Giải mã và trả về tối đa length byte bản rõ bắt đầu tại offset"""
+        length = self._clamp(offset, length)
+        if not length:
+            return b''
+        cipher = cipher_at(self._new_cipher, self._block_size, offset, decrypt=True)
+        return cipher.decrypt(self._view[offset:offset + length])
+
+    def readinto(self, offset: int, buffer: bytearray) -> int:
+        """Giải mã khoảng bắt đầu tại offset thẳng vào buffer, trả về số byte đã ghi"""
+        length = self._clamp(offset, len(buffer))
+        if length:
+            cipher = cipher_at(self._new_cipher, self._block_size, offset, decrypt=True)
+            cipher.decrypt(self._view[offset:offset + length], output=memoryview(buffer)[:length])
+        return length
+
+    def close(self):
+        self._view.release()
+        if self._mmap is not None:
+            self._mmap.close()
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def benchmark_range_reads(new_cipher: Callable[[bytes], Callable[[int], Any]], nonce_size: int,
+                          block_size: int, file_size: int = 256,
+                          offsets: Optional[List[int]] = None, lengths: Optional[List[int]] = None,
+                          num_runs: int = 10, work_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    """Đo độ trễ đọc khoảng byte từ file bản mã file_size MB theo offset và độ dài
+
+    new_cipher(nonce) trả về factory initial_block -> cipher. Offset mặc định rải đều
+    trên file và lệch khỏi biên block để kiểm tra cả trường hợp offset nằm giữa block.
+    Returns:
+        Danh sách dict gồm offset, length và stats (TimingStats) cho từng tổ hợp
+    """
+    size = file_size * 1024 * 1024
+    if offsets is None:
+        offsets = [0, 12345, size // 2 + 7, size - 1024 * 1024 - 3]
+    if lengths is None:
+        lengths = [16, 4096, 64 * 1024, 1024 * 1024]
+    # Với file nhỏ, offset mặc định có thể âm: kẹp về 0, bỏ offset từ cuối file trở đi và giá trị trùng
+    offsets = list(dict.fromkeys(max(offset, 0) for offset in offsets if offset < size))
+    lengths = list(dict.fromkeys(min(length, size) for length in lengths if length > 0))
+
+    nonce = os.urandom(nonce_size)
+    factory = new_cipher(nonce)
+    results = []
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        plain_path = os.path.join(tmp_dir, 'plain.bin')
+        enc_path = os.path.join(tmp_dir, 'encrypted.bin')
+        create_random_file(plain_path, size)
+        encrypt_file(factory(0), plain_path, enc_path)
+
+        with open(plain_path, 'rb') as plain, RangeReader(enc_path, factory, block_size) as reader:
+            for offset in offsets:
+                # Độ dài được cắt ở cuối file; tổ hợp trùng sau khi cắt chỉ đo một lần
+                for length in dict.fromkeys(min(length, size - offset) for length in lengths):
+                    # Kiểm tra khoảng giải mã khớp bản rõ gốc
+                    plain.seek(offset)
+                    assert reader.read(offset, length) == plain.read(length), \
+                        f"Lỗi: Giải mã sai khoảng [{offset}, {offset + length})!"
+                    stats = measure(lambda _: reader.read(offset, length), num_samples=num_runs)
+                    results.append({'offset': offset, 'length': length, 'stats': stats})
+    return results
+
+def format_range_reads(results: List[Dict[str, Any]]) -> str:
+    """Bảng độ trễ median/p95 (µs) của benchmark_range_reads"""
+    header = f"{'Offset':>12} | {'Length':>9} | {'median (µs)':>12} | {'p95 (µs)':>10} | {'MB/s':>8}"
+    lines = [header, "-" * len(header)]
+    for r in results:
+        stats = r['stats']
+        lines.append(f"{r['offset']:>12} | {r['length']:>9} | {stats.median * 1e6:>12.2f} | "
+                     f"{stats.p95 * 1e6:>10.2f} | {r['length'] / stats.median / 1024 / 1024:>8.1f}")
+    return "\n".join(lines)
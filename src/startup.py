@@ -0,0 +1,69 @@
+import os
+import sys
+import subprocess
+from typing import Dict, List, Optional
+from timing import TimingStats, measure
+
+SRC_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Kịch bản chạy trong tiến trình Python mới: tên -> mã nguồn
+STARTUP_SCENARIOS = {
+    'python': 'pass',
+    'import_aes_ctr': 'import aes_ctr_benchmark',
+    'import_chacha20': 'import chacha20_benchmark',
+    'first_result_aes_ctr': ('import os, aes_ctr_benchmark as m; '
+                             'm.encrypt(os.urandom(16), os.urandom(8), bytes(1024))'),
+    'first_result_chacha20': ('import os, chacha20_benchmark as m; '
+                              'm.encrypt(os.urandom(32), os.urandom(12), bytes(1024))'),
+    'system_info': 'import system_info; system_info.get_system_info()',
+}
+
+# Ngưỡng thời gian (giây) cho phép trên mức khởi động Python trần ('python')
+DEFAULT_BUDGETS = {
+    'import_aes_ctr': 0.5,
+    'import_chacha20': 0.5,
+    'first_result_aes_ctr': 0.5,
+    'first_result_chacha20': 0.5,
+    'system_info': 0.3,
+}
+
+def time_startup(code: str, num_runs: int = 5) -> TimingStats:
+    """Đo thời gian chạy code trong một tiến trình Python mới (thư mục src/ làm cwd)"""
+    command = [sys.executable, '-c', code]
+    return measure(lambda _: subprocess.run(command, cwd=SRC_DIR, check=True),
+                   num_samples=num_runs, warmup=1, min_sample_time=0)
+
+def benchmark_startup(scenarios: Optional[Dict[str, str]] = None,
+                      num_runs: int = 5) -> Dict[str, TimingStats]:
+    """Đo thời gian import module và thời gian tới kết quả đầu tiên
+
+    Lần warmup đầu tiên cũng tạo cache thông tin CPU nếu chưa có, nên các mẫu
+    đo phản ánh lần khởi động thông thường.
+    """
+    if scenarios is None:
+        scenarios = STARTUP_SCENARIOS
+    return {name: time_startup(code, num_runs) for name, code in scenarios.items()}
+
+def check_startup(results: Dict[str, TimingStats],
+                  budgets: Optional[Dict[str, float]] = None) -> List[str]:
+    """Trả về danh sách kịch bản vượt ngưỡng (rỗng nếu không có hồi quy)"""
+    if budgets is None:
+        budgets = DEFAULT_BUDGETS
+    baseline = results['python'].median if 'python' in results else 0.0
+    regressions = []
+    for name, budget in budgets.items():
+        if name in results:
+            overhead = results[name].median - baseline
+            if overhead > budget:
+                regressions.append(f"{name}: {overhead * 1000:.0f} ms > ngưỡng {budget * 1000:.0f} ms")
+    return regressions
+
+def format_startup(results: Dict[str, TimingStats]) -> str:
+    """Bảng thời gian khởi động (ms): median, p95 và phần vượt Python trần"""
+    baseline = results['python'].median if 'python' in results else 0.0
+    header = f"{'Kịch bản':<24} | {'median (ms)':>11} | {'p95 (ms)':>9} | {'+Python (ms)':>12}"
+    lines = [header, "-" * len(header)]
+    for name, stats in results.items():
+        lines.append(f"{name:<24} | {stats.median * 1000:>11.1f} | {stats.p95 * 1000:>9.1f} | "
+                     f"{(stats.median - baseline) * 1000:>12.1f}")
+    return "\n".join(lines)
@@ -0,0 +1,155 @@
+import os
+import mmap
+import hashlib
+import tempfile
+from typing import Callable, List, Tuple, Optional, Any
+from timing import TimingStats, measure
+
+DEFAULT_CHUNK_SIZE = 4 * 1024 * 1024  # 4 MB mỗi chunk
+
+def _write_all(dst, view: memoryview):
+    """Ghi toàn bộ view ra file (FileIO không buffer có thể ghi thiếu)"""
+    while view:
+        written = dst.write(view)
+        view = view[written:]
+
+def _process_file(transform: Callable, src_path: str, dst_path: str,
+                  chunk_size: int, use_mmap: bool) -> int:
+    """Áp dụng transform (cipher.encrypt/decrypt) lên file theo từng chunk
+
+    Buffer đọc và buffer ghi được cấp phát một lần và tái sử dụng cho mọi chunk,
+    nên bộ nhớ sử dụng không phụ thuộc vào kích thước file.
+    """
+    if chunk_size <= 0:
+        raise ValueError("Kích thước chunk phải lớn hơn 0")
+
+    out_buf = bytearray(chunk_size)
+    out_view = memoryview(out_buf)
+    total = 0
+
+    with open(src_path, 'rb', buffering=0) as src, open(dst_path, 'wb', buffering=0) as dst:
+        file_size = os.fstat(src.fileno()).st_size
+
+        if use_mmap and file_size > 0:
+            # Đọc qua mmap: cipher đọc thẳng từ page cache, không copy vào buffer đọc
+            with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                if hasattr(mm, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+                    mm.madvise(mmap.MADV_SEQUENTIAL)
+                src_view = memoryview(mm)
+                try:
+                    for offset in range(0, file_size, chunk_size):
+                        n = min(chunk_size, file_size - offset)
+                        transform(src_view[offset:offset + n], output=out_view[:n])
+                        _write_all(dst, out_view[:n])
+                        total += n
+                finally:
+                    src_view.release()
+        else:
+            # Đọc bằng readinto vào buffer tái sử dụng
+            in_buf = bytearray(chunk_size)
+            in_view = memoryview(in_buf)
+            while True:
+                n = src.readinto(in_buf)
+                if not n:
+                    break
+                transform(in_view[:n], output=out_view[:n])
+                _write_all(dst, out_view[:n])
+                total += n
+
+    return total
+
+def encrypt_file(cipher: Any, src_path: str, dst_path: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False) -> int:
+    """Mã hóa file src_path sang dst_path theo luồng, trả về số byte đã xử lý"""
+    return _process_file(cipher.encrypt, src_path, dst_path, chunk_size, use_mmap)
+
+def decrypt_file(cipher: Any, src_path: str, dst_path: str,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE, use_mmap: bool = False) -> int:
+    """Giải mã file src_path sang dst_path theo luồng, trả về số byte đã xử lý"""
+    return _process_file(cipher.decrypt, src_path, dst_path, chunk_size, use_mmap)
+
+def create_random_file(path: str, size: int, chunk_size: int = DEFAULT_CHUNK_SIZE):
+    """Tạo file dữ liệu ngẫu nhiên size byte mà không giữ toàn bộ trong RAM"""
+    with open(path, 'wb') as f:
+        remaining = size
+        while remaining > 0:
+            n = min(chunk_size, remaining)
+            f.write(os.urandom(n))
+            remaining -= n
+
+def file_digest(path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> bytes:
+    """Tính SHA-256 của file theo từng chunk"""
+    h = hashlib.sha256()
+    buf = bytearray(chunk_size)
+    view = memoryview(buf)
+    with open(path, 'rb', buffering=0) as f:
+        while True:
+            n = f.readinto(buf)
+            if not n:
+                break
+            h.update(view[:n])
+    return h.digest()
+
+def drop_file_cache(path: str):
+    """Yêu cầu kernel bỏ file khỏi page cache (nếu hệ điều hành hỗ trợ)"""
+    if not hasattr(os, 'posix_fadvise'):
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+        os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_DONTNEED)
+    finally:
+        os.close(fd)
+
+def benchmark_file_streaming(new_cipher: Callable[[bytes], Any], nonce_size: int,
+                             file_sizes: List[int], num_runs: int = 3,
+                             chunk_size: int = DEFAULT_CHUNK_SIZE,
+                             work_dir: Optional[str] = None,
+                             use_mmap: bool = False) -> Tuple[List[TimingStats], List[TimingStats]]:
+    """Đo hiệu năng mã hóa/giải mã file trên đĩa theo luồng
+
+    new_cipher(nonce) trả về một đối tượng cipher mới cho nonce đã cho.
+    Kích thước file (MB) có thể lớn hơn RAM vì dữ liệu chỉ đi qua các buffer chunk.
+    Mỗi mẫu là một lần xử lý cả file, bắt đầu với page cache đã được bỏ.
+    Returns:
+        encrypt_stats: Thống kê thời gian mã hóa file -> file
+        decrypt_stats: Thống kê thời gian giải mã file -> file
+    """
+    encrypt_stats = []
+    decrypt_stats = []
+
+    with tempfile.TemporaryDirectory(dir=work_dir) as tmp_dir:
+        plain_path = os.path.join(tmp_dir, 'plain.bin')
+        enc_path = os.path.join(tmp_dir, 'encrypted.bin')
+        dec_path = os.path.join(tmp_dir, 'decrypted.bin')
+
+        def cold_cipher(path: str, nonce: bytes):
+            # Bỏ file khỏi page cache trước mỗi lần đo (không tính thời gian)
+            drop_file_cache(path)
+            return new_cipher(nonce)
+
+        for size in file_sizes:
+            create_random_file(plain_path, size * 1024 * 1024, chunk_size)
+            plain_digest = file_digest(plain_path, chunk_size)
+
+            # Verify kết quả một lần (không tính vào thời gian đo)
+            nonce = os.urandom(nonce_size)
+            encrypt_file(new_cipher(nonce), plain_path, enc_path, chunk_size, use_mmap)
+            decrypt_file(new_cipher(nonce), enc_path, dec_path, chunk_size, use_mmap)
+            assert file_digest(dec_path, chunk_size) == plain_digest, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+
+            # Mỗi lần gọi đã đủ dài nên không cần warmup hay gộp nhiều lần gọi vào một mẫu
+            encrypt_stats.append(measure(
+                lambda cipher: encrypt_file(cipher, plain_path, enc_path, chunk_size, use_mmap),
+                lambda: cold_cipher(plain_path, os.urandom(nonce_size)),
+                num_runs, warmup=0, min_sample_time=0))
+            # Mỗi lần đo mã hóa ghi đè enc_path bằng nonce mới: mã hóa lại bằng nonce của bước
+            # giải mã để lần giải mã được đo trả về đúng bản rõ
+            encrypt_file(new_cipher(nonce), plain_path, enc_path, chunk_size, use_mmap)
+            decrypt_stats.append(measure(
+                lambda cipher: decrypt_file(cipher, enc_path, dec_path, chunk_size, use_mmap),
+                lambda: cold_cipher(enc_path, nonce),
+                num_runs, warmup=0, min_sample_time=0))
+            assert file_digest(dec_path, chunk_size) == plain_digest, "Lỗi: Giải mã không khớp dữ liệu gốc!"
+
+    return encrypt_stats, decrypt_stats
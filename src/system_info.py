@@ -0,0 +1,104 @@
+import os
+import json
+import hashlib
+import platform
+import socket
+from typing import Any, Dict, Optional
+import Crypto
+from Crypto.Util import _cpu_features
+
+# Cờ CPU (theo cpuinfo) ảnh hưởng tới hiệu năng mã hóa: tên cờ -> tên hiển thị
+CPU_FEATURES = {'aes': 'AES-NI', 'sse2': 'SSE2', 'avx2': 'AVX2'}
+
+# cpuinfo.get_cpu_info() dò CPU trong tiến trình con và có thể mất vài giây,
+# nên kết quả được cache trên đĩa theo host và vân tay phần cứng
+CPU_INFO_CACHE = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                              "data", "cpu_info_cache.json")
+_cpu_info = None  # Cache trong tiến trình
+
+def hardware_fingerprint() -> str:
+    """Vân tay phần cứng rẻ để tính: kiến trúc, số core, model và cờ CPU (từ /proc/cpuinfo nếu có)"""
+    parts = [platform.machine(), platform.processor(), str(os.cpu_count())]
+    try:
+        with open('/proc/cpuinfo') as f:
+            parts.extend(sorted({line.strip() for line in f
+                                 if line.startswith(('model name', 'flags', 'Features', 'CPU part'))}))
+    except OSError:
+        pass
+    return hashlib.sha256('\n'.join(parts).encode()).hexdigest()[:16]
+
+def get_cpu_info(refresh: bool = False) -> dict:
+    """Thông tin CPU (brand_raw, flags) từ cache, chỉ gọi cpuinfo khi host hoặc phần cứng thay đổi
+
+    refresh=True bỏ qua cache và dò lại.
+    """
+    global _cpu_info
+    if _cpu_info is not None and not refresh:
+        return _cpu_info
+
+    host = socket.gethostname()
+    fingerprint = hardware_fingerprint()
+    try:
+        with open(CPU_INFO_CACHE, encoding='utf-8') as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        cache = {}
+
+    entry = cache.get(host)
+    if refresh or not entry or entry.get('fingerprint') != fingerprint:
+        # Import tại chỗ: cpuinfo chỉ cần khi cache không dùng được
+        import cpuinfo
+        cpu_info = cpuinfo.get_cpu_info()
+        entry = {'fingerprint': fingerprint,
+                 'brand_raw': cpu_info.get('brand_raw', platform.processor()),
+                 'flags': cpu_info.get('flags', [])}
+        cache[host] = entry
+        try:
+            os.makedirs(os.path.dirname(CPU_INFO_CACHE), exist_ok=True)
+            with open(CPU_INFO_CACHE, 'w', encoding='utf-8') as f:
+                json.dump(cache, f, indent=2)
+        except OSError as e:
+            print(f"Không ghi được cache thông tin CPU: {str(e)}")
+
+    _cpu_info = {'brand_raw': entry['brand_raw'], 'flags': entry['flags']}
+    return _cpu_info
+
+def get_system_info() -> dict:
+    """Lấy thông tin hệ thống, tính năng CPU và phiên bản thư viện thực tế"""
+    cpu_info = get_cpu_info()
+    flags = set(cpu_info['flags'])
+    info = {
+        'cpu_brand': cpu_info['brand_raw'],
+        'python_version': platform.python_version(),
+        'os': f"{platform.system()} {platform.release()}",
+        'architecture': platform.machine(),
+        'pycryptodome_version': Crypto.__version__,
+    }
+    for flag in CPU_FEATURES:
+        info[flag] = flag in flags
+    # pycryptodome tự kiểm tra AES-NI khi chạy; nếu False thì use_aesni=True cũng dùng bản phần mềm
+    info['pycryptodome_aesni'] = bool(_cpu_features.have_aes_ni())
+    return info
+
+def feature_tag(system_info: dict) -> str:
+    """Chuỗi ngắn mô tả tính năng CPU, ví dụ 'AES-NI+SSE2+AVX2'"""
+    names = [name for flag, name in CPU_FEATURES.items() if system_info.get(flag)]
+    return '+'.join(names) if names else 'không có AES-NI/SIMD'
+
+def tag_result(result: Dict[str, Any], system_info: Optional[dict] = None) -> Dict[str, Any]:
+    """Gắn tính năng CPU và phiên bản thư viện vào một kết quả benchmark
+
+    Kết quả từ các máy có tính năng CPU khác nhau nhờ vậy so sánh được trực tiếp.
+    """
+    if system_info is None:
+        system_info = get_system_info()
+    tagged = dict(result)
+    tagged['cpu_features'] = feature_tag(system_info)
+    tagged['system'] = system_info
+    return tagged
+
+def format_system_info(system_info: dict) -> str:
+    """Ba dòng thông tin cấu hình dùng cho chú thích biểu đồ và bảng kết quả"""
+    return (f'CPU: {system_info["cpu_brand"]} ({feature_tag(system_info)})\n'
+            f'OS: {system_info["os"]}\n'
+            f'Python {system_info["python_version"]}, PyCryptodome {system_info["pycryptodome_version"]}')
@@ -0,0 +1,132 @@
+import math
+from time import perf_counter_ns
+from typing import Any, Callable, List, NamedTuple, Optional
+import numpy as np
+
+class TimingStats(NamedTuple):
+    """Thống kê thời gian (giây) cho một lần gọi hàm được đo"""
+    median: float
+    p5: float
+    p25: float
+    p75: float
+    p95: float
+    ci_low: float       # Cận dưới khoảng tin cậy bootstrap của median
+    ci_high: float      # Cận trên khoảng tin cậy bootstrap của median
+    mean: float
+    std: float
+    iterations: int     # Số lần gọi trong mỗi mẫu sau khi hiệu chỉnh
+    samples: List[float]  # Các mẫu đã loại outlier
+    outliers: int       # Số mẫu bị loại
+
+def _run_sample(func: Callable[[Any], Any], setup: Optional[Callable[[], Any]], iterations: int) -> int:
+    """Chạy func iterations lần liên tiếp, trả về tổng thời gian (ns)
+
+    Tham số cho từng lần gọi được setup() chuẩn bị trước, nằm ngoài vùng đo.
+    """
+    args = [setup() if setup is not None else None for _ in range(iterations)]
+    start = perf_counter_ns()
+    for arg in args:
+        func(arg)
+    return perf_counter_ns() - start
+
+def reject_outliers(samples: List[float], k: float = 1.5) -> List[float]:
+    """Loại outlier theo quy tắc Tukey: ngoài [Q1 - k*IQR, Q3 + k*IQR]"""
+    if len(samples) < 4:
+        return list(samples)
+    q1, q3 = np.percentile(samples, [25, 75])
+    iqr = q3 - q1
+    low, high = q1 - k * iqr, q3 + k * iqr
+    return [s for s in samples if low <= s <= high]
+
+def bootstrap_ci(samples: List[float], confidence: float = 0.95,
+                 n_resamples: int = 2000, seed: Optional[int] = 0) -> tuple:
+    """Khoảng tin cậy bootstrap (percentile) cho median của samples"""
+    values = np.asarray(samples, dtype=float)
+    if len(values) < 2:
+        return float(values[0]), float(values[0])
+    rng = np.random.default_rng(seed)
+    resamples = rng.choice(values, size=(n_resamples, len(values)), replace=True)
+    medians = np.median(resamples, axis=1)
+    alpha = (1 - confidence) / 2
+    low, high = np.quantile(medians, [alpha, 1 - alpha])
+    return float(low), float(high)
+
+def summarize(samples: List[float], iterations: int = 1, confidence: float = 0.95) -> TimingStats:
+    """Tính median, percentile và khoảng tin cậy bootstrap sau khi loại outlier"""
+    kept = reject_outliers(samples)
+    values = np.asarray(kept, dtype=float)
+    p5, p25, median, p75, p95 = np.percentile(values, [5, 25, 50, 75, 95])
+    ci_low, ci_high = bootstrap_ci(kept, confidence)
+    return TimingStats(
+        median=float(median), p5=float(p5), p25=float(p25), p75=float(p75), p95=float(p95),
+        ci_low=ci_low, ci_high=ci_high,
+        mean=float(np.mean(values)), std=float(np.std(values)),
+        iterations=iterations, samples=[float(v) for v in kept],
+        outliers=len(samples) - len(kept))
+
+def measure(func: Callable[[Any], Any], setup: Optional[Callable[[], Any]] = None,
+            num_samples: int = 10, warmup: int = 2, min_sample_time: float = 0.05,
+            max_iterations: int = 1 << 20, confidence: float = 0.95,
+            on_sample: Optional[Callable[[float], None]] = None) -> TimingStats:
+    """Đo thời gian một lần gọi func(setup()) bằng perf_counter_ns
+
+    - Chạy warmup lần trước khi đo để làm nóng cache và bộ cấp phát
+    - Tăng dần số lần gọi trong mỗi mẫu cho đến khi một mẫu kéo dài ít nhất
+      min_sample_time giây, để độ phân giải timer không chi phối kết quả
+    - Thu num_samples mẫu, loại outlier, trả về median, percentile và khoảng tin cậy
+    on_sample(giây mỗi lần gọi) được gọi ngay sau mỗi mẫu, ví dụ để hiển thị kết quả trực tiếp
+    hoặc dừng sớm bằng cách raise ngoại lệ.
+    """
+    if num_samples <= 0:
+        raise ValueError("Số mẫu phải lớn hơn 0")
+
+    for _ in range(warmup):
+        _run_sample(func, setup, 1)
+
+    # Hiệu chỉnh số lần gọi mỗi mẫu (bỏ qua nếu min_sample_time <= 0)
+    min_ns = int(min_sample_time * 1e9)
+    iterations = 1
+    elapsed = _run_sample(func, setup, iterations) if min_ns > 0 else 0
+    while elapsed < min_ns and iterations < max_iterations:
+        if elapsed > 0:
+            # Ước lượng từ lần đo trước, tối đa gấp 10 lần để tránh nhảy quá xa
+            iterations = min(max_iterations, max(iterations * 2, min(iterations * 10, int(iterations * min_ns / elapsed) + 1)))
+        else:
+            iterations = min(max_iterations, iterations * 10)
+        elapsed = _run_sample(func, setup, iterations)
+
+    samples = []
+    for _ in range(num_samples):
+        samples.append(_run_sample(func, setup, iterations) / iterations / 1e9)
+        if on_sample is not None:
+            on_sample(samples[-1])
+    return summarize(samples, iterations, confidence)
+
+def throughput(size: float, stats: TimingStats) -> tuple:
+    """Throughput (MB/s) cho size MB: (median, cận dưới, cận trên của khoảng tin cậy)"""
+    return size / stats.median, size / stats.ci_high, size / stats.ci_low
+
+def mann_whitney_u(candidate: List[float], baseline: List[float]) -> tuple:
+    """Kiểm định Mann-Whitney U một phía: candidate có xu hướng lớn hơn baseline hay không
+
+    Dùng xấp xỉ chuẩn có hiệu chỉnh ties và hiệu chỉnh liên tục (đủ chính xác từ ~8 mẫu mỗi bên).
+    Returns:
+        u: Thống kê U của candidate
+        p_value: Xác suất một phía (nhỏ nghĩa là candidate lớn hơn một cách có ý nghĩa)
+    """
+    n1, n2 = len(candidate), len(baseline)
+    if n1 == 0 or n2 == 0:
+        raise ValueError("Cần ít nhất một mẫu ở mỗi nhóm")
+    values = np.concatenate([np.asarray(candidate, dtype=float), np.asarray(baseline, dtype=float)])
+    # Hạng trung bình cho các giá trị bằng nhau
+    uniques, inverse, counts = np.unique(values, return_inverse=True, return_counts=True)
+    ranks = (np.cumsum(counts) - (counts - 1) / 2.0)[inverse]
+    u = float(ranks[:n1].sum() - n1 * (n1 + 1) / 2.0)
+
+    n = n1 + n2
+    tie_term = float(((counts ** 3) - counts).sum()) / (n * (n - 1)) if n > 1 else 0.0
+    variance = n1 * n2 / 12.0 * ((n + 1) - tie_term)
+    if variance <= 0:
+        return u, 1.0
+    z = (u - n1 * n2 / 2.0 - 0.5) / math.sqrt(variance)
+    return u, 0.5 * math.erfc(z / math.sqrt(2))